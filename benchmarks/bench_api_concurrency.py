@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for /api/historical under concurrent clients.
+
+Start the API first (python run_api.py or the Docker stack), then run:
+    python benchmarks/bench_api_concurrency.py --levels 1,10,50,100,200
+
+Each level starts that many clients at once; every client sends the same
+number of requests back to back. With the blocking queries running on the
+query executor, p99 should stay flat as the number of clients grows (until
+the executor limits in /metrics are reached, where requests get a 503).
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+API_BASE_URL = "http://localhost:8000"
+
+
+def percentile(values, pct):
+  """Nearest-rank percentile of a list of floats."""
+  ordered = sorted(values)
+  index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+  return ordered[index]
+
+
+def run_client(url, params, n_requests, start_barrier, latencies, errors, lock):
+  """Send n_requests sequentially and record each latency in milliseconds."""
+  session = requests.Session()
+  local_latencies = []
+  local_errors = 0
+  start_barrier.wait()
+  for _ in range(n_requests):
+    t0 = time.perf_counter()
+    try:
+      response = session.get(url, params=params, timeout=60)
+      if response.status_code != 200:
+        local_errors += 1
+      else:
+        response.content  # Make sure the full body was received
+    except requests.RequestException:
+      local_errors += 1
+    local_latencies.append((time.perf_counter() - t0) * 1000.0)
+  session.close()
+  with lock:
+    latencies.extend(local_latencies)
+    errors[0] += local_errors
+
+
+def run_level(base_url, symbol, params, clients, n_requests):
+  """Run one concurrency level and return its latency summary."""
+  url = f"{base_url}/api/historical/{symbol}"
+  latencies = []
+  errors = [0]
+  lock = threading.Lock()
+  barrier = threading.Barrier(clients)
+
+  t0 = time.perf_counter()
+  with ThreadPoolExecutor(max_workers=clients) as pool:
+    for _ in range(clients):
+      pool.submit(run_client, url, params, n_requests, barrier, latencies, errors, lock)
+  elapsed = time.perf_counter() - t0
+
+  return {
+    "clients": clients,
+    "requests": len(latencies),
+    "errors": errors[0],
+    "rps": len(latencies) / elapsed if elapsed else 0.0,
+    "p50": statistics.median(latencies),
+    "p95": percentile(latencies, 95),
+    "p99": percentile(latencies, 99),
+    "max": max(latencies),
+  }
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--url", default=API_BASE_URL, help="API base URL")
+  parser.add_argument("--symbol", default="BTCUSDT")
+  parser.add_argument("--interval", default="1d")
+  parser.add_argument("--limit", type=int, default=1000, help="Rows per request")
+  parser.add_argument("--levels", default="1,10,50,100,200", help="Comma-separated client counts")
+  parser.add_argument("--requests-per-client", type=int, default=20)
+  args = parser.parse_args()
+
+  params = {"interval": args.interval, "limit": args.limit}
+  levels = [int(level) for level in args.levels.split(",")]
+
+  print(f"Benchmarking {args.url}/api/historical/{args.symbol} {params}")
+  print(f"{'clients':>8} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+  for clients in levels:
+    r = run_level(args.url, args.symbol, params, clients, args.requests_per_client)
+    print(f"{r['clients']:>8} {r['requests']:>9} {r['errors']:>7} {r['rps']:>9.1f} "
+          f"{r['p50']:>9.1f} {r['p95']:>9.1f} {r['p99']:>9.1f} {r['max']:>9.1f}")
+
+  try:
+    metrics = requests.get(f"{args.url}/metrics", timeout=5).json()
+    print(f"\nQuery executor after run: {metrics['query_executor']}")
+  except (requests.RequestException, KeyError, ValueError):
+    pass
+
+
+if __name__ == "__main__":
+  main()
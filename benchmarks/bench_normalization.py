@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Normalization benchmark: iterrows() + normalize_record vs. column-wise frame_to_documents.
+
+Builds a klines DataFrame shaped like the one returned by get_historical_data,
+converts it to MongoDB documents both ways and reports the cost per row:
+    python benchmarks/bench_normalization.py --rows 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import numpy as np
+import pandas as pd
+
+from data.fetch_historical_daily import normalize_record, frame_to_documents
+
+
+def make_frame(n_rows):
+  """Build a typed klines frame, as get_historical_data returns it."""
+  open_time = pd.date_range("2020-01-01", periods=n_rows, freq="min")
+  prices = 42000.0 + np.arange(n_rows) * 0.01
+  return pd.DataFrame({
+    "open_time": open_time,
+    "open": prices,
+    "high": prices + 100.0,
+    "low": prices - 100.0,
+    "close": prices + 50.0,
+    "volume": 12.345 + np.arange(n_rows),
+    "close_time": open_time + pd.Timedelta(seconds=59, milliseconds=999),
+    "quote_asset_volume": prices,
+    "number_of_trades": np.ones(n_rows, dtype=int),
+    "taker_buy_base_asset_volume": prices,
+    "taker_buy_quote_asset_volume": prices,
+    "ignore": "0",
+  })
+
+
+def row_path(records):
+  """Previous ingestion path: one dict and one normalize_record call per row."""
+  return [normalize_record("BTCUSDT", "1m", item.to_dict()) for _, item in records.iterrows()]
+
+
+def column_path(records):
+  """Column-wise conversion."""
+  return frame_to_documents("BTCUSDT", "1m", records)
+
+
+def time_it(func, repeat):
+  """Best-of-`repeat` wall time of `func`, in seconds."""
+  best = float("inf")
+  for _ in range(repeat):
+    t0 = time.perf_counter()
+    func()
+    best = min(best, time.perf_counter() - t0)
+  return best
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--rows", type=int, default=100000)
+  parser.add_argument("--repeat", type=int, default=3)
+  args = parser.parse_args()
+
+  records = make_frame(args.rows)
+  assert row_path(records.head(1000)) == column_path(records.head(1000)), "Outputs differ"
+
+  slow = time_it(lambda: row_path(records), args.repeat)
+  fast = time_it(lambda: column_path(records), args.repeat)
+  print(f"{args.rows} rows")
+  print(f"  iterrows + normalize_record: {slow * 1e6 / args.rows:8.2f} us/row  ({slow:6.2f} s)")
+  print(f"  frame_to_documents         : {fast * 1e6 / args.rows:8.2f} us/row  ({fast:6.2f} s)")
+  print(f"  speed-up                   : {slow / fast:8.1f}x")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+PostgreSQL load benchmark: multi-row INSERT vs. executemany vs. COPY.
+
+Loads synthetic daily candles into a scratch table (dropped afterwards) of the
+PostgreSQL configured in .env (docker compose up postgres) and reports rows/s:
+    python benchmarks/bench_postgres_load.py --rows 10000,100000,1000000
+
+- values     : previous write_to_postgres, one INSERT ... VALUES statement with every row
+- executemany: current write_to_postgres
+- copy       : copy_to_postgres
+- copy upsert: copy_to_postgres through a staging table, over rows already stored
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import sqlalchemy
+
+from data.config import SETTINGS
+from data.connector.connector import connect_to_postgres, copy_to_postgres, get_table, write_to_postgres
+
+TABLE = "bench_candles"
+
+
+def make_rows(n_rows):
+  """Daily candles of 10 symbols, as dicts."""
+  start = datetime(2000, 1, 1, tzinfo=timezone.utc)
+  return [
+    {
+      "symbol": f"SYM{i % 10}USDT",
+      "open_time": start + timedelta(days=i // 10),
+      "open": 1.0 + i,
+      "high": 2.0 + i,
+      "low": 0.5 + i,
+      "close": 1.5 + i,
+      "volume": 10.0 + i,
+    }
+    for i in range(n_rows)
+  ]
+
+
+def reset_table(engine):
+  """(Re)create the scratch table, with the (symbol, open_time) primary key used for upserts."""
+  with engine.begin() as connection:
+    connection.execute(sqlalchemy.text(f"DROP TABLE IF EXISTS {TABLE}"))
+    connection.execute(sqlalchemy.text(
+      f"CREATE TABLE {TABLE} (symbol TEXT, open_time TIMESTAMPTZ, open DOUBLE PRECISION, "
+      f"high DOUBLE PRECISION, low DOUBLE PRECISION, close DOUBLE PRECISION, volume DOUBLE PRECISION, "
+      f"PRIMARY KEY (symbol, open_time))"
+    ))
+  get_table.cache_clear()
+
+
+def values_insert(engine, rows):
+  """Previous write_to_postgres: schema reflected on each call, one giant VALUES statement, explicit commit."""
+  table = sqlalchemy.Table(TABLE, sqlalchemy.MetaData(), autoload_with=engine)
+  with engine.begin() as connection:
+    connection.execute(table.insert().values(rows))
+
+
+def count_rows(engine):
+  """Number of rows in the scratch table."""
+  with engine.connect() as connection:
+    return connection.execute(sqlalchemy.text(f"SELECT COUNT(*) FROM {TABLE}")).scalar()
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--rows", default="10000,100000,1000000")
+  args = parser.parse_args()
+
+  engine = connect_to_postgres(
+    db_name=SETTINGS["POSTGRES_DB"],
+    user=SETTINGS["POSTGRES_USER"],
+    password=SETTINGS["POSTGRES_PASSWORD"],
+    host=SETTINGS["DB_HOST"],
+    port=int(SETTINGS["POSTGRES_PORT"])
+  )
+  methods = [
+    ("values", values_insert),
+    ("executemany", lambda e, rows: write_to_postgres(e, TABLE, rows)),
+    ("copy", lambda e, rows: copy_to_postgres(e, TABLE, rows)),
+  ]
+  try:
+    for n_rows in (int(n) for n in args.rows.split(",")):
+      rows = make_rows(n_rows)
+      print(f"{n_rows} rows")
+      for name, load in methods:
+        reset_table(engine)
+        t0 = time.perf_counter()
+        try:
+          load(engine, rows)
+        except Exception as e:
+          # A single statement is limited to 65535 bind parameters
+          print(f"  {name:12s}: failed ({type(e).__name__})")
+          continue
+        seconds = time.perf_counter() - t0
+        assert count_rows(engine) == n_rows, f"{name}: {count_rows(engine)} rows stored"
+        print(f"  {name:12s}: {n_rows / seconds:10.0f} rows/s  ({seconds:7.2f} s)")
+
+      # The table holds the rows loaded by COPY: every row conflicts and is updated
+      t0 = time.perf_counter()
+      copy_to_postgres(engine, TABLE, rows, upsert_keys=["symbol", "open_time"])
+      seconds = time.perf_counter() - t0
+      print(f"  {'copy upsert':12s}: {n_rows / seconds:10.0f} rows/s  ({seconds:7.2f} s)")
+  finally:
+    with engine.begin() as connection:
+      connection.execute(sqlalchemy.text(f"DROP TABLE IF EXISTS {TABLE}"))
+    engine.dispose()
+
+
+if __name__ == "__main__":
+  main()
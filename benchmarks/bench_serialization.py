@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark: validated response model vs. the orjson fast path.
+
+In-process mode (default) encodes synthetic MongoDB documents the way each
+path of /api/historical does and reports responses/sec:
+    python benchmarks/bench_serialization.py --rows 10000
+
+HTTP mode compares requests/sec of `fast=false` and `fast=true` on a running API:
+    python benchmarks/bench_serialization.py --url http://localhost:8000 --rows 10000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import requests
+from pydantic import TypeAdapter
+
+from api.models import HistoricalDataResponse
+from api.encoders import encode_json
+
+
+def make_documents(n_rows):
+  """Build documents shaped like the ones read with the candle projection."""
+  start = datetime(2020, 1, 1)
+  docs = []
+  for i in range(n_rows):
+    open_time = start + timedelta(minutes=i)
+    docs.append({
+      "symbol": "BTCUSDT",
+      "interval": "1m",
+      "open_time": open_time,
+      "open": 42000.0 + i * 0.01,
+      "high": 42100.0 + i * 0.01,
+      "low": 41900.0 + i * 0.01,
+      "close": 42050.0 + i * 0.01,
+      "volume": 12.345 + i,
+      "close_time": open_time + timedelta(seconds=59, milliseconds=999),
+    })
+  return docs
+
+
+def validated_path(docs, adapter):
+  """ISO conversion loop, response model validation and json.dumps, as FastAPI does it."""
+  rows = []
+  for doc in docs:
+    doc = dict(doc)
+    doc["open_time"] = doc["open_time"].isoformat()
+    doc["close_time"] = doc["close_time"].isoformat()
+    rows.append(doc)
+  content = adapter.dump_python(adapter.validate_python(rows), mode="json")
+  return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def fast_path(docs):
+  """orjson straight from the documents."""
+  return encode_json(docs)
+
+
+def time_it(func, repeat):
+  """Best-of-3 throughput of `func` in calls per second."""
+  best = float("inf")
+  for _ in range(3):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+      func()
+    best = min(best, time.perf_counter() - t0)
+  return repeat / best
+
+
+def run_in_process(n_rows, repeat):
+  docs = make_documents(n_rows)
+  adapter = TypeAdapter(List[HistoricalDataResponse])
+
+  assert json.loads(validated_path(docs, adapter)) == json.loads(fast_path(docs)), "Outputs differ"
+
+  slow = time_it(lambda: validated_path(docs, adapter), repeat)
+  fast = time_it(lambda: fast_path(docs), repeat)
+  print(f"{n_rows} rows per response")
+  print(f"  validated model : {slow:10.1f} responses/s  ({slow * n_rows:12.0f} rows/s)")
+  print(f"  orjson fast path: {fast:10.1f} responses/s  ({fast * n_rows:12.0f} rows/s)")
+  print(f"  speed-up        : {fast / slow:10.1f}x")
+
+
+def run_http(url, symbol, n_rows, repeat):
+  session = requests.Session()
+  for fast in (False, True):
+    params = {"limit": n_rows, "fast": str(fast).lower()}
+    session.get(f"{url}/api/historical/{symbol}", params=params).raise_for_status()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+      session.get(f"{url}/api/historical/{symbol}", params=params).content
+    rps = repeat / (time.perf_counter() - t0)
+    print(f"  fast={str(fast).lower():5}: {rps:8.1f} requests/s")
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--rows", type=int, default=10000)
+  parser.add_argument("--repeat", type=int, default=20)
+  parser.add_argument("--url", default=None, help="API base URL (HTTP mode)")
+  parser.add_argument("--symbol", default="BTCUSDT")
+  args = parser.parse_args()
+
+  if args.url:
+    print(f"HTTP benchmark on {args.url}/api/historical/{args.symbol}, limit={args.rows}")
+    run_http(args.url.rstrip("/"), args.symbol, args.rows, args.repeat)
+  else:
+    run_in_process(args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Storage benchmark: regular candle collections vs. MongoDB time-series collections.
+
+Loads the same synthetic 1m candles into both storage modes of a scratch
+database (dropped afterwards), then reports the disk footprint (data and
+indexes) and the latency of range queries as the API runs them. Needs the
+MongoDB of the Docker stack (or any MongoDB >= 6.3, configured in .env):
+    python benchmarks/bench_storage.py --symbols 3 --days 30 --window-days 1,7,30
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import numpy as np
+from pymongo import MongoClient
+
+from data.config import SETTINGS
+from data.candle_store import STORAGE_MODES, ensure_candle_collection
+
+INTERVAL = "1m"
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def mongo_uri():
+  """URI of the configured MongoDB."""
+  host, port = SETTINGS["MONGO_HOST"], SETTINGS["MONGO_PORT"]
+  if SETTINGS.get("MONGO_USER"):
+    return f"mongodb://{SETTINGS['MONGO_USER']}:{SETTINGS['MONGO_PASSWORD']}@{host}:{port}/"
+  return f"mongodb://{host}:{port}/"
+
+
+def make_candles(symbol, n_rows, seed):
+  """Random-walk 1m candles of one symbol, as the ingestion stores them."""
+  rng = np.random.default_rng(seed)
+  close = (30000.0 + np.cumsum(rng.normal(0, 10, n_rows))).round(2).tolist()
+  volume = rng.gamma(2.0, 5.0, n_rows).round(5).tolist()
+  for i in range(n_rows):
+    open_time = START + timedelta(minutes=i)
+    yield {
+      "symbol": symbol,
+      "interval": INTERVAL,
+      "open_time": open_time,
+      "open": close[i - 1] if i else close[0],
+      "high": close[i] + 5.0,
+      "low": close[i] - 5.0,
+      "close": close[i],
+      "volume": volume[i],
+      "close_time": open_time + timedelta(seconds=59, milliseconds=999),
+    }
+
+
+def load(coll, symbols, n_rows, batch_size=10000):
+  """Insert the candles of every symbol, in batches; returns the load time in seconds."""
+  t0 = time.perf_counter()
+  for seed, symbol in enumerate(symbols):
+    batch = []
+    for doc in make_candles(symbol, n_rows, seed):
+      batch.append(doc)
+      if len(batch) == batch_size:
+        coll.insert_many(batch, ordered=False)
+        batch = []
+    if batch:
+      coll.insert_many(batch, ordered=False)
+  return time.perf_counter() - t0
+
+
+def footprint(coll):
+  """Storage size of the data and of the indexes, in MB."""
+  stats = next(coll.aggregate([{"$collStats": {"storageStats": {}}}]))["storageStats"]
+  return stats["storageSize"] / 2 ** 20, stats["totalIndexSize"] / 2 ** 20
+
+
+def range_latencies(coll, symbols, n_rows, window, repeat):
+  """Latency of range queries over random windows of `window` candles, in ms."""
+  latencies = []
+  for _ in range(repeat):
+    start = START + timedelta(minutes=random.randrange(max(1, n_rows - window)))
+    t0 = time.perf_counter()
+    rows = list(coll.find(
+      {
+        "symbol": random.choice(symbols),
+        "interval": INTERVAL,
+        "open_time": {"$gte": start, "$lt": start + timedelta(minutes=window)},
+      },
+      {"_id": 0, "symbol": 0, "interval": 0},
+    ).sort("open_time", 1))
+    latencies.append((time.perf_counter() - t0) * 1000)
+    assert len(rows) == min(window, n_rows), f"{len(rows)} rows returned"
+  return np.percentile(latencies, 50), np.percentile(latencies, 95)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--symbols", type=int, default=3)
+  parser.add_argument("--days", type=int, default=30, help="Days of 1m candles per symbol")
+  parser.add_argument("--window-days", default="1,7,30", help="Range query sizes, in days")
+  parser.add_argument("--repeat", type=int, default=50)
+  parser.add_argument("--database", default="bench_storage")
+  args = parser.parse_args()
+
+  symbols = [f"SYM{i}USDT" for i in range(args.symbols)]
+  n_rows = args.days * 1440
+  windows = [int(d) * 1440 for d in args.window_days.split(",")]
+
+  client = MongoClient(mongo_uri())
+  client.drop_database(args.database)
+  db = client[args.database]
+  try:
+    print(f"{len(symbols)} symbols x {n_rows} candles ({INTERVAL})")
+    for mode in STORAGE_MODES:
+      coll = ensure_candle_collection(db, INTERVAL, mode)
+      seconds = load(coll, symbols, n_rows)
+      data_mb, index_mb = footprint(coll)
+      print(f"\n{mode} ({coll.name})")
+      print(f"  load         : {seconds:8.1f} s")
+      print(f"  storage      : {data_mb:8.1f} MB data + {index_mb:6.1f} MB indexes")
+      for window in windows:
+        p50, p95 = range_latencies(coll, symbols, n_rows, window, args.repeat)
+        print(f"  range {window // 1440:3d} d  : p50 {p50:8.1f} ms   p95 {p95:8.1f} ms")
+  finally:
+    client.drop_database(args.database)
+    client.close()
+
+
+if __name__ == "__main__":
+  main()
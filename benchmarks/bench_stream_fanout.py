@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Load test of the live candle fan-out with many simulated subscribers.
+
+In-process (default): a local stand-in for Binance pushes kline updates at a
+fixed rate to one CandleBroadcaster, read by thousands of subscriber tasks,
+some of them slow. Reports the publish cost, the delivery latency of the fast
+subscribers and what the slow ones lost:
+    python benchmarks/bench_stream_fanout.py --subscribers 5000 --rate 200 --slow 0.1
+
+Against a running API (python run_api.py), with real WebSocket clients fed by
+the live Binance stream:
+    python benchmarks/bench_stream_fanout.py --api ws://localhost:8000 --subscribers 500 --duration 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import numpy as np
+from websockets.asyncio.client import connect
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+from api.fanout import CandleBroadcaster
+
+
+def kline_message(symbol, open_time, close):
+  """Combined-stream kline update, stamped with the current time."""
+  return json.dumps({
+    "stream": f"{symbol.lower()}@kline_1m",
+    "data": {
+      "e": "kline", "E": int(time.time() * 1000), "s": symbol,
+      "k": {"t": open_time, "T": open_time + 59_999, "i": "1m", "o": "1.0", "h": "2.0", "l": "0.5",
+            "c": str(close), "v": "10.0", "x": False},
+    },
+  })
+
+
+def latency_ms(message):
+  """Delay between the emission of an update and its reception, in ms."""
+  event_time = datetime.fromisoformat(json.loads(message)["event_time"])
+  return (time.time() - event_time.timestamp()) * 1000
+
+
+def summarize(latencies, label):
+  """Print the count and latency percentiles of received updates."""
+  if latencies:
+    print(f"  {label}: {len(latencies)} updates, latency p50 {np.percentile(latencies, 50):.1f} ms, "
+          f"p99 {np.percentile(latencies, 99):.1f} ms, max {max(latencies):.1f} ms")
+  else:
+    print(f"  {label}: no update received")
+
+
+async def in_process(args):
+  symbols = [f"SYM{i}USDT" for i in range(args.symbols)]
+
+  async def upstream(ws):
+    # `rate` updates per second over all the streams; each stream gets a new candle every 100 updates
+    subscribed = asyncio.Event()
+
+    async def read_requests():
+      async for _ in ws:
+        subscribed.set()
+
+    reader = asyncio.create_task(read_requests())
+    try:
+      await subscribed.wait()
+      sent = 0
+      next_send = time.perf_counter()
+      while True:
+        symbol = symbols[sent % len(symbols)]
+        await ws.send(kline_message(symbol, (sent // 100) * 60_000, 100 + sent % 100))
+        sent += 1
+        next_send += 1.0 / args.rate
+        await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+    except ConnectionClosed:
+      pass
+    finally:
+      reader.cancel()
+
+  async with serve(upstream, "127.0.0.1", 0) as server:
+    port = server.sockets[0].getsockname()[1]
+    broadcaster = CandleBroadcaster(f"ws://127.0.0.1:{port}/stream", queue_size=args.queue_size)
+
+    # Time spent fanning out each update, measured around the broadcaster's publish
+    publish_seconds = []
+    publish = broadcaster.publish
+
+    def timed_publish(stream, key, message):
+      t0 = time.perf_counter()
+      publish(stream, key, message)
+      publish_seconds.append(time.perf_counter() - t0)
+
+    broadcaster.publish = timed_publish
+
+    fast_latencies, slow_latencies = [], []
+    n_slow = int(args.subscribers * args.slow)
+
+    async def subscriber(i):
+      slow = i < n_slow
+      queue = broadcaster.subscribe(symbols[i % len(symbols)], "1m", policy=args.policy)
+      latencies = slow_latencies if slow else fast_latencies
+      try:
+        while True:
+          latencies.append(latency_ms(await queue.get()))
+          if slow:
+            await asyncio.sleep(args.slow_delay)
+      finally:
+        broadcaster.unsubscribe(queue)
+
+    tasks = [asyncio.create_task(subscriber(i)) for i in range(args.subscribers)]
+    await asyncio.sleep(args.duration)
+    stats = broadcaster.stats()
+    for task in tasks:
+      task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await broadcaster.close()
+
+  print(f"{args.subscribers} subscribers ({n_slow} slow, {args.slow_delay * 1000:.0f} ms/update) on "
+        f"{args.symbols} streams, {args.rate} updates/s for {args.duration} s, policy {args.policy}")
+  if publish_seconds:
+    print(f"  publish: {len(publish_seconds)} updates, mean {np.mean(publish_seconds) * 1e6:.0f} us, "
+          f"max {max(publish_seconds) * 1e6:.0f} us")
+  summarize(fast_latencies, "fast subscribers")
+  summarize(slow_latencies, "slow subscribers")
+  print(f"  dropped {stats['dropped']}, coalesced {stats['coalesced']}, still queued {stats['queued']}")
+
+
+async def against_api(args):
+  url = f"{args.api.rstrip('/')}/api/stream/{args.symbol}?interval=1m&policy={args.policy}"
+  latencies = []
+  counts = []
+  stop = time.monotonic() + args.duration
+
+  async def client():
+    received = 0
+    async with connect(url) as ws:
+      while True:
+        try:
+          message = await asyncio.wait_for(ws.recv(), max(0.0, stop - time.monotonic()))
+        except asyncio.TimeoutError:
+          break
+        latencies.append(latency_ms(message))
+        received += 1
+    counts.append(received)
+
+  await asyncio.gather(*(client() for _ in range(args.subscribers)))
+  print(f"{args.subscribers} WebSocket clients on {url} for {args.duration} s")
+  print(f"  updates per client: min {min(counts)}, max {max(counts)}")
+  summarize(latencies, "all clients")
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--subscribers", type=int, default=5000)
+  parser.add_argument("--duration", type=float, default=10.0, help="Seconds")
+  parser.add_argument("--policy", default="coalesce", choices=["coalesce", "drop_oldest"])
+  parser.add_argument("--symbols", type=int, default=10, help="In-process: number of upstream streams")
+  parser.add_argument("--rate", type=float, default=200.0, help="In-process: upstream updates per second")
+  parser.add_argument("--slow", type=float, default=0.1, help="In-process: fraction of slow subscribers")
+  parser.add_argument("--slow-delay", type=float, default=0.5, help="In-process: seconds a slow subscriber takes per update")
+  parser.add_argument("--queue-size", type=int, default=64)
+  parser.add_argument("--api", help="Base WebSocket URL of a running API (e.g., ws://localhost:8000)")
+  parser.add_argument("--symbol", default="BTCUSDT", help="Symbol streamed with --api")
+  args = parser.parse_args()
+
+  asyncio.run(against_api(args) if args.api else in_process(args))
+
+
+if __name__ == "__main__":
+  main()
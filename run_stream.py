@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+"""Script to run the Binance websocket stream consumer."""
+import sys
+import os
+
+# Add src directory to Python path
+src_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+if src_dir not in sys.path:
+  sys.path.insert(0, src_dir)
+
+if __name__ == "__main__":
+  from data.stream_consumer import main
+
+  main()
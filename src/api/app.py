@@ -1,13 +1,15 @@
 """FastAPI application for cryptocurrency data API."""
+import asyncio
 import logging
 import sys
 import os
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Any, Callable, Iterator, AsyncIterator, Tuple
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pymongo import MongoClient
 from pymongo.database import Database
 
@@ -17,19 +19,46 @@ if src_dir not in sys.path:
     sys.path.insert(0, src_dir)
 
 from data.config import SETTINGS
+from data.intervals import interval_to_ms
+from data.candle_store import collection_name
+from data.stream_events import combined_stream_url
+from data.connector.registry import registry as client_registry
 from api.queries import (
   get_symbols,
   get_intervals,
+  get_coverage,
   get_historical_data_query,
+  get_downsampled_data,
+  TooManyRowsError,
+  iter_historical_data,
   get_latest_data,
   get_aggregated_stats
 )
+from api.executor import QueryExecutor, ExecutorSaturatedError
+from api.fanout import CandleBroadcaster, POLICIES
+from api.encoders import (
+  negotiate_format,
+  candle_arrow_schema,
+  encode_json,
+  encode_ndjson,
+  ArrowStreamEncoder,
+  NDJSON_MEDIA_TYPE,
+  JSON_MEDIA_TYPE,
+  ARROW_MEDIA_TYPE
+)
+from api.pagination import encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
 from api.models import (
   HistoricalDataResponse,
+  candle_list_adapter,
+  BatchQuery,
+  BatchRequest,
+  BatchResponse,
   StatsResponse,
   SymbolsResponse,
   IntervalsResponse,
-  HealthResponse
+  CoverageResponse,
+  HealthResponse,
+  MetricsResponse
 )
 
 # Configure logging
@@ -39,15 +68,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger("CRYPTO_API")
 
+# Row cap for responses built in memory; streamed responses have no cap
+MAX_JSON_LIMIT = 10000
+# Rows pulled from the cursor and written to the client at a time when streaming
+STREAM_CHUNK_SIZE = 1000
+
 # Global database connection
 mongo_client: Optional[MongoClient] = None
 mongo_db: Optional[Database] = None
+# Bounded thread pool running the blocking PyMongo calls off the event loop
+query_executor: Optional[QueryExecutor] = None
+# Live candle updates from one upstream Binance connection, fanned out to /api/stream clients
+candle_broadcaster: Optional[CandleBroadcaster] = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
   """Lifespan context manager for database connections."""
-  global mongo_client, mongo_db
+  global mongo_client, mongo_db, query_executor, candle_broadcaster
 
   # Startup: Connect to MongoDB
   try:
@@ -56,18 +94,32 @@ async def lifespan(app: FastAPI):
     port = int(SETTINGS["MONGO_PORT"])
     user = SETTINGS.get("MONGO_USER", "")
     password = SETTINGS.get("MONGO_PASSWORD", "")
-
-    if user and password:
-      mongo_uri = f"mongodb://{user}:{password}@{host}:{port}/"
-      mongo_client = MongoClient(mongo_uri)
-    else:
-      mongo_client = MongoClient(host=host, port=port)
+    query_workers = int(SETTINGS["API_QUERY_WORKERS"])
+    query_max_pending = int(SETTINGS["API_QUERY_MAX_PENDING"])
+
+    # One pooled connection per worker thread, so queries never wait on the pool.
+    # Each server worker process gets its own client (see ClientRegistry).
+    mongo_client = client_registry.mongo(
+      host=host,
+      port=port,
+      user=user if user and password else "",
+      password=password if user and password else "",
+      max_pool_size=query_workers
+    )
 
     mongo_db = mongo_client[db_name]
+    query_executor = QueryExecutor(max_workers=query_workers, max_pending=query_max_pending)
 
     # Test connection
-    mongo_db.list_collection_names()
+    await query_executor.run(mongo_db.list_collection_names)
     logger.info(f"Connected to MongoDB at {host}:{port}, database: {db_name}")
+    logger.info(f"Query executor: {query_workers} workers, {query_max_pending} pending max")
+
+    # Connects to Binance on the first /api/stream subscription only
+    candle_broadcaster = CandleBroadcaster(
+      combined_stream_url(SETTINGS["URL_STREAM"]),
+      queue_size=int(SETTINGS["API_STREAM_QUEUE_SIZE"])
+    )
 
   except Exception as e:
     logger.error(f"Failed to connect to MongoDB: {e}")
@@ -75,9 +127,13 @@ async def lifespan(app: FastAPI):
 
   yield
 
-  # Shutdown: Close MongoDB connection
+  # Shutdown: Close the upstream stream, drain the executor, then close MongoDB connection
+  if candle_broadcaster:
+    await candle_broadcaster.close()
+  if query_executor:
+    query_executor.shutdown()
   if mongo_client:
-    mongo_client.close()
+    client_registry.close()
     logger.info("Closed MongoDB connection")
 
 
@@ -96,9 +152,116 @@ app.add_middleware(
   allow_credentials=True,
   allow_methods=["*"],
   allow_headers=["*"],
+  expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 
+async def run_query(func: Callable[..., Any], *args, **kwargs) -> Any:
+  """
+  Run a blocking query function on the query executor.
+
+  Raises:
+      HTTPException: 503 if the database is not connected or the executor is saturated
+  """
+  if mongo_db is None or query_executor is None:
+    raise HTTPException(status_code=503, detail="Database not connected")
+
+  try:
+    return await query_executor.run(func, *args, **kwargs)
+  except ExecutorSaturatedError as e:
+    logger.warning(str(e))
+    raise HTTPException(status_code=503, detail="Server busy, retry later")
+
+
+async def open_stream(
+        iterator: Iterator[Any],
+        encode: Callable[[List[Any]], bytes],
+        finish: Optional[Callable[[], bytes]] = None
+) -> Optional[AsyncIterator[bytes]]:
+  """
+  Start draining a blocking iterator on the query executor.
+
+  The first chunk is fetched before returning, so callers can still answer
+  with an error status when there is nothing to stream. `finish`, if given,
+  produces the trailing bytes sent after the last chunk.
+
+  Returns:
+      Async iterator of encoded chunks, or None if the iterator is empty
+
+  Raises:
+      HTTPException: 503 if the database is not connected or the executor is saturated
+  """
+  if mongo_db is None or query_executor is None:
+    raise HTTPException(status_code=503, detail="Database not connected")
+
+  chunks = query_executor.iterate(iterator, STREAM_CHUNK_SIZE)
+  try:
+    first = await anext(chunks, None)
+  except ExecutorSaturatedError as e:
+    logger.warning(str(e))
+    raise HTTPException(status_code=503, detail="Server busy, retry later")
+
+  if first is None:
+    return None
+
+  async def body() -> AsyncIterator[bytes]:
+    yield encode(first)
+    async for chunk in chunks:
+      yield encode(chunk)
+    if finish is not None:
+      yield finish()
+
+  return body()
+
+
+def candle_collection(interval: str) -> str:
+  """
+  Route a query to the collection storing the candles of an interval.
+
+  Args:
+      interval: Time interval (e.g., '1d', '1h')
+
+  Returns:
+      Collection name
+  """
+  try:
+    interval_to_ms(interval)
+  except ValueError:
+    raise HTTPException(status_code=400, detail=f"Invalid interval: {interval}")
+  return collection_name(interval)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+  """
+  Parse a comma-separated `fields=` parameter into candle fields.
+
+  Args:
+      fields: Requested fields (e.g., 'open_time,close')
+
+  Returns:
+      Selected fields in HistoricalDataResponse order (open_time always
+      included), or None when every field is requested
+  """
+  if not fields:
+    return None
+  requested = {field.strip() for field in fields.split(",") if field.strip()}
+  unknown = requested - set(HistoricalDataResponse.model_fields)
+  if unknown:
+    raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+  requested.add("open_time")
+  return tuple(field for field in HistoricalDataResponse.model_fields if field in requested)
+
+
+def candle_json_response(data: List[dict], fields: Tuple[str, ...], headers: Optional[dict] = None) -> Response:
+  """Validate candles against the response model trimmed to `fields` and encode them."""
+  adapter = candle_list_adapter(fields)
+  return Response(
+    content=adapter.dump_json(adapter.validate_python(data)),
+    media_type=JSON_MEDIA_TYPE,
+    headers=headers
+  )
+
+
 @app.get("/", response_model=HealthResponse)
 async def root():
   """Root endpoint."""
@@ -116,7 +279,7 @@ async def health_check():
       raise HTTPException(status_code=503, detail="Database not connected")
 
     # Test database connection
-    mongo_db.list_collection_names()
+    await run_query(mongo_db.list_collection_names)
 
     return {
       "status": "healthy",
@@ -131,12 +294,11 @@ async def health_check():
 async def get_available_symbols():
   """Get list of available cryptocurrency symbols."""
   try:
-    if mongo_db is None:
-      raise HTTPException(status_code=503, detail="Database not connected")
-
-    symbols = get_symbols(mongo_db)
+    symbols = await run_query(get_symbols, mongo_db, catalog_name=SETTINGS["MONGO_COLLECTION_COVERAGE"])
     return {"symbols": symbols}
 
+  except HTTPException:
+    raise
   except Exception as e:
     logger.error(f"Error fetching symbols: {e}")
     raise HTTPException(status_code=500, detail=f"Error fetching symbols: {str(e)}")
@@ -146,24 +308,56 @@ async def get_available_symbols():
 async def get_available_intervals():
   """Get list of available time intervals."""
   try:
-    if mongo_db is None:
-      raise HTTPException(status_code=503, detail="Database not connected")
-
-    intervals = get_intervals(mongo_db)
+    intervals = await run_query(get_intervals, mongo_db, catalog_name=SETTINGS["MONGO_COLLECTION_COVERAGE"])
     return {"intervals": intervals}
 
+  except HTTPException:
+    raise
   except Exception as e:
     logger.error(f"Error fetching intervals: {e}")
     raise HTTPException(status_code=500, detail=f"Error fetching intervals: {str(e)}")
 
 
+@app.get("/api/coverage", response_model=CoverageResponse)
+async def get_data_coverage(
+        symbol: Optional[str] = Query(None, description="Filter on a symbol (e.g., BTCUSDT)"),
+        interval: Optional[str] = Query(None, description="Filter on an interval (e.g., '1d')")
+):
+  """
+  Get the stored time range and row count of each (symbol, interval) series.
+
+  - **symbol**: Only return this symbol (optional)
+  - **interval**: Only return this interval (optional)
+  """
+  try:
+    coverage = await run_query(
+      get_coverage, mongo_db, symbol=symbol, interval=interval, catalog_name=SETTINGS["MONGO_COLLECTION_COVERAGE"]
+    )
+    return {"coverage": coverage}
+
+  except HTTPException:
+    raise
+  except Exception as e:
+    logger.error(f"Error fetching coverage: {e}")
+    raise HTTPException(status_code=500, detail=f"Error fetching coverage: {str(e)}")
+
+
 @app.get("/api/historical/{symbol}", response_model=List[HistoricalDataResponse])
 async def get_historical_data(
+        request: Request,
+        response: Response,
         symbol: str,
         interval: str = Query("1d", description="Time interval (e.g., '1d', '1h')"),
         start_time: Optional[str] = Query(None, description="Start time (ISO format)"),
         end_time: Optional[str] = Query(None, description="End time (ISO format)"),
-        limit: int = Query(1000, ge=1, le=10000, description="Maximum number of records")
+        limit: Optional[int] = Query(None, ge=1, description="Maximum number of records"),
+        cursor: Optional[str] = Query(None, description="Continuation token from the X-Next-Cursor header"),
+        resample: Optional[str] = Query(None, description="Aggregate candles into a coarser interval (e.g., '1w', '4h')"),
+        max_points: Optional[int] = Query(
+          None, ge=3, le=MAX_JSON_LIMIT, description="Downsample to at most this many points (LTTB)"
+        ),
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return (e.g., 'open_time,close')"),
+        fast: bool = Query(False, description="Encode straight from MongoDB documents, skipping per-row validation")
 ):
   """
   Get historical data for a specific symbol.
@@ -172,11 +366,32 @@ async def get_historical_data(
   - **interval**: Time interval (default: 1d)
   - **start_time**: Start time in ISO format (optional)
   - **end_time**: End time in ISO format (optional)
-  - **limit**: Maximum number of records to return (default: 1000, max: 10000)
+  - **limit**: Maximum number of records to return (default: 1000, max: 10000).
+    With `Accept: application/x-ndjson` or `Accept: application/vnd.apache.arrow.stream`
+    rows are streamed as they are read and there is no default or maximum.
+  - **cursor**: Continuation token. When more rows match than `limit`, the response
+    carries an `X-Next-Cursor` header; pass it back (with the same parameters) to get the next page.
+  - **resample**: Target interval; OHLCV candles are aggregated server-side (first open, max high,
+    min low, last close, summed volume)
+  - **max_points**: Point budget; the series is reduced with the shape-preserving LTTB algorithm
+    on the close price (`limit` is then ignored). Answers 400 when more than 100000 candles
+    match: narrow the time range or combine with `resample`
+  - **fields**: Comma-separated subset of fields to return (open_time is always returned);
+    `open_time,close` is read from an index without fetching the documents
+  - **fast**: Skip the per-row response model and encode the documents with orjson (same schema)
   """
   try:
-    if mongo_db is None:
-      raise HTTPException(status_code=503, detail="Database not connected")
+    selected = parse_fields(fields)
+    media_type = negotiate_format(request.headers.get("accept"))
+    streaming = media_type in (NDJSON_MEDIA_TYPE, ARROW_MEDIA_TYPE)
+    if not streaming:
+      if limit is None:
+        limit = 1000
+      elif limit > MAX_JSON_LIMIT:
+        raise HTTPException(
+          status_code=400,
+          detail=f"limit must be <= {MAX_JSON_LIMIT}. Use Accept: {NDJSON_MEDIA_TYPE} to stream more rows."
+        )
 
     # Parse datetime strings if provided
     start_dt = None
@@ -194,14 +409,102 @@ async def get_historical_data(
       except ValueError:
         raise HTTPException(status_code=400, detail="Invalid end_time format. Use ISO format.")
 
-    # Query data
-    data = get_historical_data_query(
+    after_dt = None
+    if cursor:
+      try:
+        cursor_symbol, cursor_interval, after_dt = decode_cursor(cursor)
+      except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+      if (cursor_symbol, cursor_interval) != (symbol, interval):
+        raise HTTPException(status_code=400, detail="Cursor does not match symbol and interval.")
+
+    if resample:
+      try:
+        coarser = interval_to_ms(resample) > interval_to_ms(interval)
+      except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid resample interval: {resample}")
+      if not coarser:
+        raise HTTPException(status_code=400, detail="resample must be coarser than interval.")
+
+    if resample or max_points:
+      if cursor:
+        raise HTTPException(status_code=400, detail="cursor cannot be combined with resample or max_points.")
+
+      try:
+        data = await run_query(
+          get_downsampled_data,
+          db=mongo_db,
+          symbol=symbol,
+          interval=interval,
+          collection_name=candle_collection(interval),
+          start_time=start_dt,
+          end_time=end_dt,
+          limit=limit or MAX_JSON_LIMIT,
+          target_interval=resample,
+          max_points=max_points,
+          iso_dates=not (fast or streaming),
+          fields=selected
+        )
+      except TooManyRowsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+      if not data:
+        raise HTTPException(
+          status_code=404,
+          detail=f"No data found for symbol {symbol} with interval {interval}"
+        )
+
+      if media_type == ARROW_MEDIA_TYPE:
+        encoder = ArrowStreamEncoder(candle_arrow_schema(selected))
+        return StreamingResponse(iter([encoder(data), encoder.close()]), media_type=media_type)
+      if media_type == NDJSON_MEDIA_TYPE:
+        return Response(content=encode_ndjson(data), media_type=media_type)
+      if fast:
+        return Response(content=encode_json(data), media_type=JSON_MEDIA_TYPE)
+      if selected:
+        return candle_json_response(data, selected)
+      return data
+
+    if streaming:
+      # Documents keep their datetimes: Arrow stores them natively, orjson writes ISO strings
+      arrow = media_type == ARROW_MEDIA_TYPE
+      encoder = ArrowStreamEncoder(candle_arrow_schema(selected)) if arrow else None
+      body = await open_stream(
+        iter_historical_data(
+          db=mongo_db,
+          symbol=symbol,
+          interval=interval,
+          collection_name=candle_collection(interval),
+          start_time=start_dt,
+          end_time=end_dt,
+          limit=limit,
+          batch_size=STREAM_CHUNK_SIZE,
+          iso_dates=False,
+          after=after_dt,
+          fields=selected
+        ),
+        encoder if arrow else encode_ndjson,
+        encoder.close if arrow else None
+      )
+      if body is None:
+        raise HTTPException(
+          status_code=404,
+          detail=f"No data found for symbol {symbol} with interval {interval}"
+        )
+      return StreamingResponse(body, media_type=media_type)
+
+    # Query data, with one extra row telling whether there is a next page
+    data = await run_query(
+      get_historical_data_query,
       db=mongo_db,
       symbol=symbol,
       interval=interval,
+      collection_name=candle_collection(interval),
       start_time=start_dt,
       end_time=end_dt,
-      limit=limit
+      limit=limit + 1,
+      iso_dates=not fast,
+      after=after_dt,
+      fields=selected
     )
 
     if not data:
@@ -210,6 +513,19 @@ async def get_historical_data(
         detail=f"No data found for symbol {symbol} with interval {interval}"
       )
 
+    headers = {}
+    if len(data) > limit:
+      data = data[:limit]
+      last_open_time = data[-1]["open_time"]
+      if isinstance(last_open_time, str):
+        last_open_time = datetime.fromisoformat(last_open_time)
+      headers[NEXT_CURSOR_HEADER] = encode_cursor(symbol, interval, last_open_time)
+
+    if fast:
+      return Response(content=encode_json(data), media_type=JSON_MEDIA_TYPE, headers=headers)
+    if selected:
+      return candle_json_response(data, selected, headers)
+    response.headers.update(headers)
     return data
 
   except HTTPException:
@@ -219,11 +535,96 @@ async def get_historical_data(
     raise HTTPException(status_code=500, detail=f"Error fetching data: {str(e)}")
 
 
+async def run_batch_query(index: int, query: BatchQuery, fast: bool, slots: asyncio.Semaphore) -> dict:
+  """Run one sub-query of a batch and report its outcome instead of raising."""
+  result = {
+    "index": index,
+    # The position makes the key unique when a (symbol, interval) pair is queried over several ranges
+    "key": f"{index}:{query.symbol}:{query.interval}",
+    "symbol": query.symbol,
+    "interval": query.interval,
+    "status": "ok",
+    "data": [],
+    "error": None
+  }
+
+  try:
+    start_dt = datetime.fromisoformat(query.start_time.replace('Z', '+00:00')) if query.start_time else None
+    end_dt = datetime.fromisoformat(query.end_time.replace('Z', '+00:00')) if query.end_time else None
+  except ValueError:
+    result.update(status="invalid", error="Invalid start_time or end_time format. Use ISO format.")
+    return result
+
+  try:
+    collection = collection_name(query.interval)
+  except ValueError:
+    result.update(status="invalid", error=f"Invalid interval: {query.interval}")
+    return result
+
+  try:
+    async with slots:
+      data = await run_query(
+        get_historical_data_query,
+        db=mongo_db,
+        symbol=query.symbol,
+        interval=query.interval,
+        collection_name=collection,
+        start_time=start_dt,
+        end_time=end_dt,
+        limit=query.limit,
+        iso_dates=not fast
+      )
+  except HTTPException as e:
+    result.update(status="error", error=str(e.detail))
+    return result
+  except Exception as e:
+    logger.error(f"Error fetching batch item {result['key']}: {e}")
+    result.update(status="error", error=f"Error fetching data: {str(e)}")
+    return result
+
+  if not data:
+    result.update(status="not_found", error=f"No data found for symbol {query.symbol} with interval {query.interval}")
+  result["data"] = data
+  return result
+
+
+@app.post("/api/historical/batch", response_model=BatchResponse)
+async def get_historical_batch(
+        batch: BatchRequest,
+        fast: bool = Query(False, description="Encode straight from MongoDB documents, skipping per-row validation")
+):
+  """
+  Get historical data for many (symbol, interval, time range) queries in one call.
+
+  The sub-queries run concurrently on the query executor (at most one per
+  worker at a time for a given batch). A failing sub-query does not fail the
+  batch: its result carries a `status` and an `error` message instead.
+  Results are returned in request order; `index` is the position of the
+  sub-query and `key` ('index:SYMBOL:interval') is unique within the batch.
+
+  - **queries**: List of sub-queries (symbol, interval, start_time, end_time, limit)
+  - **fast**: Skip the per-row response model and encode the documents with orjson (same schema)
+  """
+  if query_executor is None:
+    raise HTTPException(status_code=503, detail="Database not connected")
+
+  slots = asyncio.Semaphore(query_executor.max_workers)
+  results = await asyncio.gather(*(
+    run_batch_query(index, query, fast, slots) for index, query in enumerate(batch.queries)
+  ))
+
+  if fast:
+    return Response(content=encode_json({"results": results}), media_type=JSON_MEDIA_TYPE)
+  return {"results": results}
+
+
 @app.get("/api/latest/{symbol}", response_model=List[HistoricalDataResponse])
 async def get_latest(
         symbol: str,
         interval: str = Query("1d", description="Time interval (e.g., '1d', '1h')"),
-        count: int = Query(30, ge=1, le=365, description="Number of recent records")
+        count: int = Query(30, ge=1, le=365, description="Number of recent records"),
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return (e.g., 'open_time,close')"),
+        fast: bool = Query(False, description="Encode straight from MongoDB documents, skipping per-row validation")
 ):
   """
   Get the most recent data for a specific symbol.
@@ -231,16 +632,20 @@ async def get_latest(
   - **symbol**: Cryptocurrency symbol (e.g., BTCUSDT)
   - **interval**: Time interval (default: 1d)
   - **count**: Number of recent records to return (default: 30, max: 365)
+  - **fields**: Comma-separated subset of fields to return (open_time is always returned)
+  - **fast**: Skip the per-row response model and encode the documents with orjson (same schema)
   """
   try:
-    if mongo_db is None:
-      raise HTTPException(status_code=503, detail="Database not connected")
-
-    data = get_latest_data(
+    selected = parse_fields(fields)
+    data = await run_query(
+      get_latest_data,
       db=mongo_db,
       symbol=symbol,
       interval=interval,
-      count=count
+      collection_name=candle_collection(interval),
+      count=count,
+      iso_dates=not fast,
+      fields=selected
     )
 
     if not data:
@@ -249,6 +654,10 @@ async def get_latest(
         detail=f"No data found for symbol {symbol} with interval {interval}"
       )
 
+    if fast:
+      return Response(content=encode_json(data), media_type=JSON_MEDIA_TYPE)
+    if selected:
+      return candle_json_response(data, selected)
     return data
 
   except HTTPException:
@@ -258,6 +667,57 @@ async def get_latest(
     raise HTTPException(status_code=500, detail=f"Error fetching data: {str(e)}")
 
 
+@app.websocket("/api/stream/{symbol}")
+async def stream_candles(
+        websocket: WebSocket,
+        symbol: str,
+        interval: str = "1m",
+        policy: str = "coalesce"
+):
+  """
+  Push the updates of the current candle of a symbol, as Binance publishes them.
+
+  Each message is a JSON candle (symbol, interval, open_time, OHLCV, close_time,
+  is_closed, event_time). A client that does not keep up loses updates instead
+  of slowing down the others, according to its policy:
+
+  - **coalesce** (default): queued updates of the same candle are merged into the latest one
+  - **drop_oldest**: every update is queued, the oldest are dropped when the queue is full
+  """
+  try:
+    interval_to_ms(interval)
+  except ValueError:
+    await websocket.close(code=1008, reason=f"Invalid interval: {interval}")
+    return
+  if policy not in POLICIES:
+    await websocket.close(code=1008, reason=f"Invalid policy: {policy}")
+    return
+  if candle_broadcaster is None:
+    await websocket.close(code=1011, reason="Stream not available")
+    return
+
+  await websocket.accept()
+  queue = candle_broadcaster.subscribe(symbol.upper(), interval, policy=policy)
+
+  async def send_updates():
+    while True:
+      await websocket.send_text(await queue.get())
+
+  async def wait_disconnect():
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+      pass  # Messages from the client are ignored
+
+  tasks = [asyncio.create_task(send_updates()), asyncio.create_task(wait_disconnect())]
+  try:
+    # Whichever ends first: the client left, or sending to it failed
+    await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+  finally:
+    for task in tasks:
+      task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    candle_broadcaster.unsubscribe(queue)
+
+
 @app.get("/api/stats/{symbol}", response_model=StatsResponse)
 async def get_statistics(
         symbol: str,
@@ -274,9 +734,6 @@ async def get_statistics(
   - **end_time**: End time in ISO format (optional)
   """
   try:
-    if mongo_db is None:
-      raise HTTPException(status_code=503, detail="Database not connected")
-
     # Parse datetime strings if provided
     start_dt = None
     end_dt = None
@@ -294,12 +751,16 @@ async def get_statistics(
         raise HTTPException(status_code=400, detail="Invalid end_time format. Use ISO format.")
 
     # Get statistics
-    stats = get_aggregated_stats(
+    stats = await run_query(
+      get_aggregated_stats,
       db=mongo_db,
       symbol=symbol,
       interval=interval,
+      collection_name=candle_collection(interval),
       start_time=start_dt,
-      end_time=end_dt
+      end_time=end_dt,
+      catalog_name=SETTINGS["MONGO_COLLECTION_COVERAGE"],
+      rollups_name=SETTINGS["MONGO_COLLECTION_ROLLUPS"]
     )
 
     if stats.get("count", 0) == 0:
@@ -317,6 +778,22 @@ async def get_statistics(
     raise HTTPException(status_code=500, detail=f"Error fetching statistics: {str(e)}")
 
 
+@app.get("/metrics", response_model=MetricsResponse)
+async def get_metrics():
+  """
+  Get the query executor concurrency limits and current utilization, the live
+  stream fan-out counters and the database connection pool utilization.
+  """
+  if query_executor is None:
+    raise HTTPException(status_code=503, detail="Database not connected")
+
+  return {
+    "query_executor": query_executor.stats(),
+    "candle_stream": candle_broadcaster.stats() if candle_broadcaster else None,
+    "connection_pools": client_registry.stats()
+  }
+
+
 if __name__ == "__main__":
   import uvicorn
 
@@ -2,14 +2,21 @@
 Simple Python client for the Cryptocurrency Data API.
 Usage example in notebooks or scripts.
 """
+import json
 import requests
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, TYPE_CHECKING
 from datetime import datetime, timedelta
 
+if TYPE_CHECKING:
+    import pandas
+
 
 class CryptoAPIClient:
     """Client for querying cryptocurrency data from the API."""
 
+    # Largest page the API returns as a JSON list
+    MAX_PAGE_SIZE = 10000
+
     def __init__(self, base_url: str = "http://localhost:8000"):
         """
         Initialize the API client.
@@ -53,49 +60,214 @@ class CryptoAPIClient:
         response.raise_for_status()
         return response.json()["intervals"]
 
+    def get_coverage(
+        self,
+        symbol: Optional[str] = None,
+        interval: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the stored time range and row count of each (symbol, interval) series.
+
+        Args:
+            symbol: Only return this symbol (optional)
+            interval: Only return this interval (optional)
+
+        Returns:
+            List of coverage entries
+        """
+        params = {}
+        if symbol:
+            params["symbol"] = symbol
+        if interval:
+            params["interval"] = interval
+
+        response = self.session.get(f"{self.base_url}/api/coverage", params=params)
+        response.raise_for_status()
+        return response.json()["coverage"]
+
     def get_historical_data(
         self,
         symbol: str,
         interval: str = "1d",
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
-        limit: int = 1000
+        limit: Optional[int] = 1000,
+        fields: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Get historical data for a symbol.
 
+        Pages of up to 10,000 records are requested one after the other,
+        following the X-Next-Cursor continuation tokens, until `limit`
+        records have been collected or the range is exhausted.
+
         Args:
             symbol: Cryptocurrency symbol (e.g., 'BTCUSDT')
             interval: Time interval (default: '1d')
             start_time: Start datetime (optional)
             end_time: End datetime (optional)
-            limit: Maximum number of records (default: 1000)
+            limit: Maximum number of records (default: 1000, None for all)
+            fields: Fields to return, e.g. ['close'] (default: all; open_time is always returned)
 
         Returns:
             List of historical data records
         """
-        params = {
-            "interval": interval,
-            "limit": limit
-        }
+        params = {"interval": interval}
+
+        if start_time:
+            params["start_time"] = start_time.isoformat()
+        if end_time:
+            params["end_time"] = end_time.isoformat()
+        if fields:
+            params["fields"] = ",".join(fields)
+
+        records: List[Dict[str, Any]] = []
+        while True:
+            params["limit"] = self.MAX_PAGE_SIZE if limit is None else min(limit - len(records), self.MAX_PAGE_SIZE)
+            response = self.session.get(
+                f"{self.base_url}/api/historical/{symbol}",
+                params=params
+            )
+            response.raise_for_status()
+            records.extend(response.json())
+
+            next_cursor = response.headers.get("X-Next-Cursor")
+            if not next_cursor or (limit is not None and len(records) >= limit):
+                return records
+            params["cursor"] = next_cursor
+
+    def iter_historical_data(
+        self,
+        symbol: str,
+        interval: str = "1d",
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream historical data for a symbol as NDJSON, one record at a time.
+
+        Records are decoded as they arrive, so memory use stays constant and
+        there is no 10,000 row cap.
+
+        Args:
+            symbol: Cryptocurrency symbol (e.g., 'BTCUSDT')
+            interval: Time interval (default: '1d')
+            start_time: Start datetime (optional)
+            end_time: End datetime (optional)
+            limit: Maximum number of records (default: no limit)
+            fields: Fields to return, e.g. ['close'] (default: all; open_time is always returned)
+
+        Yields:
+            Historical data records
+        """
+        params = {"interval": interval}
 
         if start_time:
             params["start_time"] = start_time.isoformat()
         if end_time:
             params["end_time"] = end_time.isoformat()
+        if limit:
+            params["limit"] = limit
+        if fields:
+            params["fields"] = ",".join(fields)
+
+        with self.session.get(
+            f"{self.base_url}/api/historical/{symbol}",
+            params=params,
+            headers={"Accept": "application/x-ndjson"},
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+    def get_historical_dataframe(
+        self,
+        symbol: str,
+        interval: str = "1d",
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> "pandas.DataFrame":
+        """
+        Get historical data for a symbol as a pandas DataFrame.
+
+        The API sends the candles as an Apache Arrow IPC stream, which is
+        decoded column by column without building a Python object per row.
+        Requires pyarrow and pandas.
+
+        Args:
+            symbol: Cryptocurrency symbol (e.g., 'BTCUSDT')
+            interval: Time interval (default: '1d')
+            start_time: Start datetime (optional)
+            end_time: End datetime (optional)
+            limit: Maximum number of records (default: no limit)
+            fields: Fields to return, e.g. ['close'] (default: all; open_time is always returned)
+
+        Returns:
+            DataFrame with one row per candle and UTC timestamp columns
+        """
+        import pyarrow as pa
+
+        params = {"interval": interval}
+
+        if start_time:
+            params["start_time"] = start_time.isoformat()
+        if end_time:
+            params["end_time"] = end_time.isoformat()
+        if limit:
+            params["limit"] = limit
+        if fields:
+            params["fields"] = ",".join(fields)
 
         response = self.session.get(
             f"{self.base_url}/api/historical/{symbol}",
-            params=params
+            params=params,
+            headers={"Accept": "application/vnd.apache.arrow.stream"}
         )
         response.raise_for_status()
-        return response.json()
+        with pa.ipc.open_stream(response.content) as reader:
+            return reader.read_pandas()
+
+    def get_historical_batch(
+        self,
+        queries: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Get historical data for many symbols/intervals/time ranges in a single request.
+
+        Args:
+            queries: Sub-queries, each a dict with 'symbol' and optionally
+                'interval', 'start_time', 'end_time' (datetime) and 'limit'
+
+        Returns:
+            One result per query, in the same order, each with 'status', 'data' and 'error'
+        """
+        payload = []
+        for query in queries:
+            item = dict(query)
+            for field in ("start_time", "end_time"):
+                if isinstance(item.get(field), datetime):
+                    item[field] = item[field].isoformat()
+            payload.append(item)
+
+        response = self.session.post(
+            f"{self.base_url}/api/historical/batch",
+            json={"queries": payload}
+        )
+        response.raise_for_status()
+        return response.json()["results"]
 
     def get_latest_data(
         self,
         symbol: str,
         interval: str = "1d",
-        count: int = 30
+        count: int = 30,
+        fields: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Get the most recent data for a symbol.
@@ -104,6 +276,7 @@ class CryptoAPIClient:
             symbol: Cryptocurrency symbol (e.g., 'BTCUSDT')
             interval: Time interval (default: '1d')
             count: Number of recent records (default: 30)
+            fields: Fields to return, e.g. ['close'] (default: all; open_time is always returned)
 
         Returns:
             List of recent historical data records
@@ -112,6 +285,8 @@ class CryptoAPIClient:
             "interval": interval,
             "count": count
         }
+        if fields:
+            params["fields"] = ",".join(fields)
 
         response = self.session.get(
             f"{self.base_url}/api/latest/{symbol}",
@@ -0,0 +1,51 @@
+"""Shape-preserving downsampling of candle series."""
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+  """
+  Select the points to keep with Largest-Triangle-Three-Buckets.
+
+  The first and last points are always kept. The points in between are split
+  into `n_out - 2` buckets and, in each bucket, the point forming the largest
+  triangle with the previously kept point and the average of the next bucket
+  is kept. Peaks and troughs survive, unlike with plain decimation.
+
+  Args:
+      x: Strictly increasing x values (e.g. open_time in ms)
+      y: Values to preserve the shape of (e.g. close)
+      n_out: Number of points to keep
+
+  Returns:
+      Sorted indices of the kept points
+  """
+  n = len(x)
+  if n_out >= n or n <= 2:
+    return np.arange(n)
+  if n_out < 3:
+    return np.array([0, n - 1])[:max(n_out, 1)]
+
+  x = np.asarray(x, dtype=np.float64)
+  y = np.asarray(y, dtype=np.float64)
+  # n_out - 2 buckets over the interior points [1, n - 1)
+  edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+  indices = np.empty(n_out, dtype=np.int64)
+  indices[0] = 0
+  indices[-1] = n - 1
+  a = 0
+  for i in range(n_out - 2):
+    start, end = edges[i], edges[i + 1]
+    next_start = edges[i + 1]
+    next_end = edges[i + 2] if i + 2 < len(edges) else n
+    avg_x = x[next_start:next_end].mean()
+    avg_y = y[next_start:next_end].mean()
+
+    area = np.abs(
+      (x[a] - avg_x) * (y[start:end] - y[a])
+      - (x[a] - x[start:end]) * (avg_y - y[a])
+    )
+    a = start + int(np.argmax(area))
+    indices[i + 1] = a
+
+  return indices
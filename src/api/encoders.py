@@ -0,0 +1,159 @@
+"""Response formats and content negotiation for candle queries."""
+import io
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import orjson
+import pyarrow as pa
+
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Columnar layout of a candle, matching HistoricalDataResponse
+CANDLE_ARROW_SCHEMA = pa.schema([
+  ("symbol", pa.string()),
+  ("interval", pa.string()),
+  ("open_time", pa.timestamp("ms", tz="UTC")),
+  ("open", pa.float64()),
+  ("high", pa.float64()),
+  ("low", pa.float64()),
+  ("close", pa.float64()),
+  ("volume", pa.float64()),
+  ("close_time", pa.timestamp("ms", tz="UTC")),
+])
+
+
+def candle_arrow_schema(fields: Optional[Sequence[str]] = None) -> pa.Schema:
+  """
+  Get the Arrow schema of candles trimmed to some fields.
+
+  Args:
+      fields: Fields to keep (all of them if None)
+
+  Returns:
+      Arrow schema with the selected columns, in candle order
+  """
+  if not fields:
+    return CANDLE_ARROW_SCHEMA
+  return pa.schema([field for field in CANDLE_ARROW_SCHEMA if field.name in fields])
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+  """
+  Pick the response format from an Accept header.
+
+  Media ranges are ranked by their q-value, then by their order in the header;
+  wildcards (`*/*`, `application/*`) and ranges with q=0 never select NDJSON or Arrow.
+
+  Args:
+      accept: Value of the Accept request header
+
+  Returns:
+      Media type of the response format (JSON unless another one is preferred)
+  """
+  if not accept:
+    return JSON_MEDIA_TYPE
+
+  best, best_q = JSON_MEDIA_TYPE, 0.0
+  for part in accept.split(","):
+    media_type, *params = [item.strip().lower() for item in part.split(";")]
+    q = 1.0
+    for param in params:
+      name, _, value = param.partition("=")
+      if name.strip() == "q":
+        try:
+          q = float(value)
+        except ValueError:
+          q = 0.0
+    if media_type in (JSON_MEDIA_TYPE, "application/*", "*/*"):
+      media_type = JSON_MEDIA_TYPE
+    elif media_type not in (NDJSON_MEDIA_TYPE, ARROW_MEDIA_TYPE):
+      continue
+    if q > best_q:
+      best, best_q = media_type, q
+  return best
+
+
+def encode_json(rows: Any) -> bytes:
+  """
+  Encode MongoDB documents (or a payload containing them) as JSON without Pydantic validation.
+
+  Datetimes are written by orjson in the same ISO format as `datetime.isoformat()`,
+  so the output matches the HistoricalDataResponse schema as long as the
+  documents were read with the candle projection.
+
+  Args:
+      rows: Records to encode
+
+  Returns:
+      UTF-8 encoded JSON
+  """
+  return orjson.dumps(rows)
+
+
+def encode_ndjson(rows: Iterable[Dict[str, Any]]) -> bytes:
+  """
+  Encode records as newline-delimited JSON, one record per line.
+
+  Args:
+      rows: Records to encode
+
+  Returns:
+      UTF-8 encoded NDJSON lines
+  """
+  return b"".join(orjson.dumps(row) + b"\n" for row in rows)
+
+
+class ArrowStreamEncoder:
+  """
+  Encode chunks of candle documents as an Arrow IPC stream.
+
+  The first call emits the schema, every call emits one record batch, and
+  `close()` emits the end-of-stream marker. The bytes written so far are
+  handed back after each call, so the stream can be sent as it is produced.
+  """
+
+  def __init__(self, schema: pa.Schema = CANDLE_ARROW_SCHEMA):
+    """
+    Initialize the encoder.
+
+    Args:
+        schema: Arrow schema of the record batches
+    """
+    self.schema = schema
+    self._sink = io.BytesIO()
+    self._writer = pa.ipc.new_stream(self._sink, schema)
+
+  def __call__(self, rows: List[Dict[str, Any]]) -> bytes:
+    """
+    Encode one chunk of documents as a record batch.
+
+    Args:
+        rows: MongoDB documents with datetime open_time/close_time
+
+    Returns:
+        IPC bytes produced by this chunk
+    """
+    columns = [
+      pa.array([row.get(field.name) for row in rows], type=field.type)
+      for field in self.schema
+    ]
+    self._writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=self.schema))
+    return self._drain()
+
+  def close(self) -> bytes:
+    """
+    Finish the stream.
+
+    Returns:
+        IPC end-of-stream bytes
+    """
+    self._writer.close()
+    return self._drain()
+
+  def _drain(self) -> bytes:
+    """Take the bytes written to the sink since the last call."""
+    data = self._sink.getvalue()
+    self._sink.seek(0)
+    self._sink.truncate()
+    return data
@@ -0,0 +1,137 @@
+"""Bounded executor running the blocking PyMongo queries off the event loop."""
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List
+
+logger = logging.getLogger("CRYPTO_API")
+
+
+class ExecutorSaturatedError(RuntimeError):
+  """Raised when the executor backlog is full and a query is rejected."""
+
+
+def _next_chunk(iterator: Iterator[Any], size: int) -> List[Any]:
+  """Pull up to `size` items from a blocking iterator."""
+  chunk = []
+  for item in iterator:
+    chunk.append(item)
+    if len(chunk) >= size:
+      break
+  return chunk
+
+
+class QueryExecutor:
+  """
+  Run synchronous query functions in a fixed-size thread pool.
+
+  At most `max_workers` queries hit MongoDB at the same time and at most
+  `max_pending` more wait for a free worker. Anything beyond that is rejected
+  immediately with ExecutorSaturatedError instead of queuing without bound.
+
+  All the bookkeeping happens on the event loop thread, so no lock is needed.
+  """
+
+  def __init__(self, max_workers: int = 16, max_pending: int = 256):
+    """
+    Initialize the executor.
+
+    Args:
+        max_workers: Number of worker threads (concurrent MongoDB queries)
+        max_pending: Number of queries allowed to wait for a worker
+    """
+    if max_workers < 1:
+      raise ValueError("max_workers must be >= 1")
+    if max_pending < 0:
+      raise ValueError("max_pending must be >= 0")
+
+    self.max_workers = max_workers
+    self.max_pending = max_pending
+    self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mongo-query")
+    self._in_flight = 0
+    self._peak_in_flight = 0
+    self._completed = 0
+    self._failed = 0
+    self._rejected = 0
+
+  async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run `func(*args, **kwargs)` in the worker pool and await its result.
+
+    Raises:
+        ExecutorSaturatedError: If the worker pool and the backlog are both full
+    """
+    self._admit()
+    return await self._execute(func, *args, **kwargs)
+
+  async def iterate(self, iterator: Iterator[Any], chunk_size: int = 1000) -> AsyncIterator[List[Any]]:
+    """
+    Drain a blocking iterator (e.g. a MongoDB cursor) chunk by chunk.
+
+    Each chunk is pulled on the worker pool, so only one chunk is held in memory
+    at a time. Admission is checked for the first chunk only: once a stream has
+    started it is never cut off because the executor got busy.
+
+    Raises:
+        ExecutorSaturatedError: If the first chunk cannot be admitted
+    """
+    self._admit()
+    try:
+      while True:
+        chunk = await self._execute(_next_chunk, iterator, chunk_size)
+        if not chunk:
+          break
+        yield chunk
+    finally:
+      # Release the server-side cursor without blocking the event loop
+      close = getattr(iterator, "close", None)
+      if close is not None:
+        self._pool.submit(close)
+
+  def _admit(self) -> None:
+    """Reject the call if the worker pool and the backlog are both full."""
+    if self._in_flight >= self.max_workers + self.max_pending:
+      self._rejected += 1
+      raise ExecutorSaturatedError(
+        f"Query executor saturated ({self.max_workers} running, {self.max_pending} pending)"
+      )
+
+  async def _execute(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run an already admitted call on the worker pool."""
+    self._in_flight += 1
+    self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+    loop = asyncio.get_running_loop()
+    try:
+      result = await loop.run_in_executor(self._pool, functools.partial(func, *args, **kwargs))
+      self._completed += 1
+      return result
+    except Exception:
+      self._failed += 1
+      raise
+    finally:
+      self._in_flight -= 1
+
+  def stats(self) -> Dict[str, int]:
+    """
+    Get the configured limits and the current utilization.
+
+    Returns:
+        Dictionary with limits and counters
+    """
+    running = min(self._in_flight, self.max_workers)
+    return {
+      "max_workers": self.max_workers,
+      "max_pending": self.max_pending,
+      "running": running,
+      "pending": self._in_flight - running,
+      "peak_in_flight": self._peak_in_flight,
+      "completed": self._completed,
+      "failed": self._failed,
+      "rejected": self._rejected,
+    }
+
+  def shutdown(self) -> None:
+    """Stop the worker threads once the queued queries are done."""
+    self._pool.shutdown(wait=True)
+    logger.info("Query executor shut down")
@@ -0,0 +1,249 @@
+"""Fan-out of live candle updates from one upstream Binance feed to many WebSocket clients."""
+import asyncio
+import json
+import logging
+import random
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set
+
+import orjson
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed, InvalidHandshake
+
+from data.stream_events import parse_event
+
+logger = logging.getLogger("CRYPTO_API")
+
+# What a client queue does when it is full:
+# - coalesce: an update of a candle already queued replaces it in place, otherwise the oldest update is dropped
+# - drop_oldest: the oldest update is dropped
+POLICIES = ("coalesce", "drop_oldest")
+
+# Binance accepts 5 incoming messages per second on a connection
+SUBSCRIBE_INTERVAL = 0.25
+
+
+class ClientQueue:
+  """
+  Bounded queue of the updates waiting to be sent to one client.
+
+  Publishing never blocks: a slow client loses updates (counted in `dropped`
+  and `coalesced`) instead of slowing down the feed or the other clients.
+  All methods run on the event loop thread.
+  """
+
+  def __init__(self, stream: str, maxsize: int = 64, policy: str = "coalesce"):
+    """
+    Initialize the queue.
+
+    Args:
+        stream: Upstream stream the client listens to (e.g. 'btcusdt@kline_1m')
+        maxsize: Maximum number of queued updates
+        policy: Full-queue policy, one of POLICIES
+    """
+    if policy not in POLICIES:
+      raise ValueError(f"Invalid policy '{policy}', expected one of {', '.join(POLICIES)}")
+    self.stream = stream
+    self.maxsize = maxsize
+    self.policy = policy
+    self._items: "OrderedDict[Hashable, str]" = OrderedDict()
+    self._seq = 0
+    self._ready = asyncio.Event()
+    self.dropped = 0
+    self.coalesced = 0
+
+  def __len__(self) -> int:
+    return len(self._items)
+
+  def put(self, key: Hashable, message: str) -> None:
+    """
+    Queue an update without waiting.
+
+    Args:
+        key: Identity of the updated candle (its open time)
+        message: Serialized update
+    """
+    if self.policy == "coalesce" and key in self._items:
+      self._items[key] = message
+      self.coalesced += 1
+    else:
+      if len(self._items) >= self.maxsize:
+        self._items.popitem(last=False)
+        self.dropped += 1
+      if self.policy == "drop_oldest":
+        self._seq += 1
+        key = self._seq
+      self._items[key] = message
+    self._ready.set()
+
+  async def get(self) -> str:
+    """Wait for the oldest queued update and remove it from the queue."""
+    while not self._items:
+      self._ready.clear()
+      await self._ready.wait()
+    return self._items.popitem(last=False)[1]
+
+
+def candle_message(doc: Dict[str, Any]) -> str:
+  """Serialize a parsed kline event for the clients."""
+  return orjson.dumps({k: v for k, v in doc.items() if k != "type"}).decode()
+
+
+class CandleBroadcaster:
+  """
+  Single upstream connection to the Binance kline streams, fanned out to client queues.
+
+  The upstream connection is opened on the first subscription. It follows
+  the set of streams with at least one client: SUBSCRIBE/UNSUBSCRIBE
+  requests are grouped and rate limited, and every stream is subscribed
+  again after a reconnection. Each update is serialized once, whatever the
+  number of clients.
+  """
+
+  def __init__(self, url: str, queue_size: int = 64, max_backoff: float = 30.0):
+    """
+    Initialize the broadcaster.
+
+    Args:
+        url: Combined-stream URL of Binance (see data.stream_events.combined_stream_url)
+        queue_size: Default size of the client queues
+        max_backoff: Maximum delay between two upstream connection attempts, in seconds
+    """
+    self.url = url
+    self.queue_size = queue_size
+    self.max_backoff = max_backoff
+    self._clients: Dict[str, Set[ClientQueue]] = {}
+    self._subscribed: Set[str] = set()
+    self._changed = asyncio.Event()
+    self._task: Optional[asyncio.Task] = None
+    self.connected = False
+    self.reconnects = 0
+    self.published = 0
+    self._dropped = 0
+    self._coalesced = 0
+
+  def subscribe(self, symbol: str, interval: str, policy: str = "coalesce",
+                maxsize: Optional[int] = None) -> ClientQueue:
+    """
+    Register a client for the candle updates of a series.
+
+    Args:
+        symbol: Trading pair symbol (e.g. 'BTCUSDT')
+        interval: Candle interval (e.g. '1m')
+        policy: Full-queue policy of the client, one of POLICIES
+        maxsize: Size of the client queue (default: queue_size)
+
+    Returns:
+        The client queue, to pass to unsubscribe once the client is gone
+    """
+    stream = f"{symbol.lower()}@kline_{interval}"
+    queue = ClientQueue(stream, maxsize or self.queue_size, policy)
+    self._clients.setdefault(stream, set()).add(queue)
+    self._changed.set()
+    if self._task is None or self._task.done():
+      self._task = asyncio.create_task(self._run())
+    return queue
+
+  def unsubscribe(self, queue: ClientQueue) -> None:
+    """Unregister a client."""
+    clients = self._clients.get(queue.stream)
+    if clients is None or queue not in clients:
+      return
+    clients.discard(queue)
+    self._dropped += queue.dropped
+    self._coalesced += queue.coalesced
+    if not clients:
+      del self._clients[queue.stream]
+      self._changed.set()
+
+  def publish(self, stream: str, key: Hashable, message: str) -> None:
+    """Queue an update for every client of a stream."""
+    clients = self._clients.get(stream)
+    if not clients:
+      return
+    self.published += 1
+    for queue in clients:
+      queue.put(key, message)
+
+  def stats(self) -> Dict[str, Any]:
+    """Get the fan-out counters."""
+    live = [queue for clients in self._clients.values() for queue in clients]
+    return {
+      "upstream_connected": self.connected,
+      "reconnects": self.reconnects,
+      "streams": len(self._clients),
+      "subscribers": len(live),
+      "published": self.published,
+      "queued": sum(len(queue) for queue in live),
+      "dropped": self._dropped + sum(queue.dropped for queue in live),
+      "coalesced": self._coalesced + sum(queue.coalesced for queue in live),
+    }
+
+  async def close(self) -> None:
+    """Close the upstream connection."""
+    if self._task is not None:
+      self._task.cancel()
+      await asyncio.gather(self._task, return_exceptions=True)
+      self._task = None
+
+  async def _sync_subscriptions(self, ws) -> None:
+    request_id = 0
+    while True:
+      await self._changed.wait()
+      self._changed.clear()
+      wanted = set(self._clients)
+      for method, streams in (("SUBSCRIBE", wanted - self._subscribed), ("UNSUBSCRIBE", self._subscribed - wanted)):
+        if streams:
+          request_id += 1
+          await ws.send(json.dumps({"method": method, "params": sorted(streams), "id": request_id}))
+      self._subscribed = wanted
+      await asyncio.sleep(SUBSCRIBE_INTERVAL)
+
+  async def _receive(self, ws) -> None:
+    async for raw in ws:
+      try:
+        message = json.loads(raw)
+        data = message.get("data")
+        if data is None:
+          continue  # Subscription acknowledgements
+        doc = parse_event(data)
+        if doc is not None and doc["type"] == "kline":
+          self.publish(message["stream"], doc["open_time"], candle_message(doc))
+      except (ValueError, KeyError, TypeError, AttributeError) as e:
+        # One malformed message must not end the feed of every client
+        logger.warning(f"Skipping malformed candle stream message ({e!r}): {str(raw)[:200]}")
+
+  async def _run(self) -> None:
+    delay = 1.0
+    while True:
+      try:
+        async with connect(self.url, max_size=2 ** 22) as ws:
+          self.connected = True
+          self._subscribed = set()
+          self._changed.set()
+          delay = 1.0
+          logger.info(f"Candle stream connected to {self.url}")
+          tasks = [asyncio.create_task(self._sync_subscriptions(ws)), asyncio.create_task(self._receive(ws))]
+          try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+              task.result()
+          finally:
+            for task in tasks:
+              task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        reason = "closed by the server"
+      except (ConnectionClosed, InvalidHandshake, OSError, asyncio.TimeoutError) as e:
+        reason = repr(e)
+      except Exception as e:
+        # Subscribers only restart the task on their next subscribe(), so any failure reconnects
+        logger.exception("Candle stream failed")
+        reason = repr(e)
+      finally:
+        self.connected = False
+
+      self.reconnects += 1
+      wait = min(delay, self.max_backoff) * random.uniform(0.5, 1.0)
+      logger.warning(f"Candle stream disconnected ({reason}), reconnecting in {wait:.1f}s")
+      await asyncio.sleep(wait)
+      delay *= 2
@@ -1,6 +1,10 @@
 """Pydantic models for API request/response validation."""
-from typing import Optional, List
-from pydantic import BaseModel
+from functools import lru_cache
+from typing import Optional, List, Tuple
+from pydantic import BaseModel, Field, TypeAdapter, create_model
+
+# Maximum number of sub-queries accepted in one batch request
+MAX_BATCH_QUERIES = 500
 
 
 class HistoricalDataResponse(BaseModel):
@@ -16,6 +20,61 @@ class HistoricalDataResponse(BaseModel):
   close_time: Optional[str] = None
 
 
+@lru_cache(maxsize=128)
+def candle_list_adapter(fields: Tuple[str, ...]) -> TypeAdapter:
+  """
+  Get the validator of a list of candles trimmed to some fields.
+
+  The model keeps the types of HistoricalDataResponse for the selected fields
+  only; one is built and cached per field set.
+
+  Args:
+      fields: Selected fields, in HistoricalDataResponse order
+
+  Returns:
+      TypeAdapter validating and serializing a list of trimmed candles
+  """
+  model = create_model(
+    "HistoricalDataFieldsResponse",
+    **{
+      name: (info.annotation, info.default if not info.is_required() else ...)
+      for name, info in HistoricalDataResponse.model_fields.items()
+      if name in fields
+    }
+  )
+  return TypeAdapter(List[model])
+
+
+class BatchQuery(BaseModel):
+  """One (symbol, interval, time range) sub-query of a batch request."""
+  symbol: str
+  interval: str = "1d"
+  start_time: Optional[str] = None
+  end_time: Optional[str] = None
+  limit: int = Field(1000, ge=1, le=10000)
+
+
+class BatchRequest(BaseModel):
+  """Request model for the batch historical data endpoint."""
+  queries: List[BatchQuery] = Field(..., min_length=1, max_length=MAX_BATCH_QUERIES)
+
+
+class BatchResult(BaseModel):
+  """Result of one sub-query; `status` is 'ok', 'not_found', 'invalid' or 'error'."""
+  index: int
+  key: str
+  symbol: str
+  interval: str
+  status: str
+  data: List[HistoricalDataResponse] = []
+  error: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+  """Response model for the batch historical data endpoint, in request order."""
+  results: List[BatchResult]
+
+
 class StatsResponse(BaseModel):
   """Response model for aggregated statistics."""
   symbol: str
@@ -39,7 +98,78 @@ class IntervalsResponse(BaseModel):
   intervals: List[str]
 
 
+class CoverageEntry(BaseModel):
+  """Stored time range and row count of one (symbol, interval) series."""
+  symbol: str
+  interval: str
+  first_open_time: str
+  last_open_time: str
+  count: int
+
+
+class CoverageResponse(BaseModel):
+  """Response model for the coverage catalog."""
+  coverage: List[CoverageEntry]
+
+
 class HealthResponse(BaseModel):
   """Response model for health check."""
   status: str
   message: str
+
+
+class ExecutorStatsResponse(BaseModel):
+  """Response model for the query executor limits and utilization."""
+  max_workers: int
+  max_pending: int
+  running: int
+  pending: int
+  peak_in_flight: int
+  completed: int
+  failed: int
+  rejected: int
+
+
+class StreamStatsResponse(BaseModel):
+  """Response model for the live candle stream fan-out counters."""
+  upstream_connected: bool
+  reconnects: int
+  streams: int
+  subscribers: int
+  published: int
+  queued: int
+  dropped: int
+  coalesced: int
+
+
+class MongoPoolStatsResponse(BaseModel):
+  """Response model for the connection pool utilization of a MongoDB client."""
+  address: str
+  max_pool_size: int
+  open: int
+  in_use: int
+  peak_in_use: int
+  checkouts: int
+  checkout_failures: int
+
+
+class PostgresPoolStatsResponse(BaseModel):
+  """Response model for the connection pool utilization of a PostgreSQL engine."""
+  address: str
+  pool_size: int
+  checked_out: int
+  checked_in: int
+  overflow: int
+
+
+class ConnectionPoolsResponse(BaseModel):
+  """Response model for the database connection pools of the process."""
+  mongo: List[MongoPoolStatsResponse]
+  postgres: List[PostgresPoolStatsResponse]
+
+
+class MetricsResponse(BaseModel):
+  """Response model for runtime metrics."""
+  query_executor: ExecutorStatsResponse
+  candle_stream: Optional[StreamStatsResponse] = None
+  connection_pools: Optional[ConnectionPoolsResponse] = None
@@ -0,0 +1,51 @@
+"""Opaque continuation tokens for keyset pagination over candles."""
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Tuple
+
+# Response header carrying the token of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(symbol: str, interval: str, open_time: datetime) -> str:
+  """
+  Build the continuation token pointing after a candle.
+
+  The token is the (symbol, interval, open_time) key of the last row of a page,
+  so the next page is one seek on the unique index instead of a skip.
+
+  Args:
+      symbol: Cryptocurrency symbol (e.g., 'BTCUSDT')
+      interval: Time interval (e.g., '1d', '1h')
+      open_time: Open time of the last row returned
+
+  Returns:
+      URL-safe token
+  """
+  if open_time.tzinfo is None:
+    open_time = open_time.replace(tzinfo=timezone.utc)
+  payload = {"s": symbol, "i": interval, "t": open_time.isoformat()}
+  raw = json.dumps(payload, separators=(",", ":")).encode()
+  return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[str, str, datetime]:
+  """
+  Decode a continuation token.
+
+  Args:
+      token: Token returned in the X-Next-Cursor header
+
+  Returns:
+      Tuple (symbol, interval, open_time) of the last row already returned
+
+  Raises:
+      ValueError: If the token is malformed
+  """
+  try:
+    raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    payload = json.loads(raw)
+    return payload["s"], payload["i"], datetime.fromisoformat(payload["t"])
+  except (ValueError, KeyError, TypeError) as e:
+    raise ValueError(f"Invalid cursor: {e}") from e
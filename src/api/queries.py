@@ -1,45 +1,237 @@
 """Query functions for MongoDB cryptocurrency data."""
 import logging
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Sequence
+import numpy as np
 from pymongo.database import Database
 from pymongo.collection import Collection
 
+from data.rollups import get_range_stats
+from data.intervals import interval_to_date_trunc
+from api.downsampling import lttb_indices
+
 logger = logging.getLogger("CRYPTO_API")
 
+# Candles loaded in memory at most to downsample one series with LTTB
+MAX_DOWNSAMPLE_ROWS = 100000
+
+
+class TooManyRowsError(ValueError):
+  """Raised when a query would load more candles than allowed to downsample them."""
+
+
+# Projection returning exactly the fields of HistoricalDataResponse
+CANDLE_PROJECTION = {
+  "_id": 0,
+  "symbol": 1,
+  "interval": 1,
+  "open_time": 1,
+  "open": 1,
+  "high": 1,
+  "low": 1,
+  "close": 1,
+  "volume": 1,
+  "close_time": 1
+}
+
+
+def candle_projection(fields: Optional[Sequence[str]] = None) -> Dict[str, int]:
+  """
+  Build the projection returning a subset of the candle fields.
+
+  open_time is always kept, as rows are ordered and paginated on it. When every
+  field requested is in the (symbol, interval, open_time, close) index of a
+  standard collection, MongoDB answers the query from the index alone without
+  fetching the documents. Time-series collections have no such index.
+
+  Args:
+      fields: Candle fields to return (all of them if None)
+
+  Returns:
+      MongoDB projection
+  """
+  if not fields:
+    return CANDLE_PROJECTION
+  projection = {"_id": 0, "open_time": 1}
+  projection.update((field, 1) for field in fields)
+  return projection
 
-def get_symbols(db: Database, collection_name: str = "historical_daily_data") -> List[str]:
+
+def get_symbols(
+        db: Database,
+        collection_name: str = "historical_daily_data",
+        catalog_name: str = "historical_coverage"
+) -> List[str]:
   """
   Get list of available symbols in the database.
 
+  Reads the coverage catalog (one entry per symbol and interval). Falls back
+  to scanning the data collection when the catalog has not been built yet.
+
   Args:
       db: MongoDB database instance
       collection_name: Name of the collection to query
+      catalog_name: Name of the coverage catalog collection
 
   Returns:
       List of unique symbols
   """
-  coll: Collection = db[collection_name]
-  symbols = coll.distinct("symbol")
+  symbols = db[catalog_name].distinct("symbol")
+  if not symbols:
+    coll: Collection = db[collection_name]
+    symbols = coll.distinct("symbol")
   return sorted(symbols)
 
 
-def get_intervals(db: Database, collection_name: str = "historical_daily_data") -> List[str]:
+def get_intervals(
+        db: Database,
+        collection_name: str = "historical_daily_data",
+        catalog_name: str = "historical_coverage"
+) -> List[str]:
   """
   Get list of available intervals in the database.
 
+  Reads the coverage catalog (one entry per symbol and interval). Falls back
+  to scanning the data collection when the catalog has not been built yet.
+
   Args:
       db: MongoDB database instance
       collection_name: Name of the collection to query
+      catalog_name: Name of the coverage catalog collection
 
   Returns:
       List of unique intervals
   """
-  coll: Collection = db[collection_name]
-  intervals = coll.distinct("interval")
+  intervals = db[catalog_name].distinct("interval")
+  if not intervals:
+    coll: Collection = db[collection_name]
+    intervals = coll.distinct("interval")
   return sorted(intervals)
 
 
+def get_coverage(
+        db: Database,
+        symbol: Optional[str] = None,
+        interval: Optional[str] = None,
+        catalog_name: str = "historical_coverage"
+) -> List[Dict[str, Any]]:
+  """
+  Get the stored time range and row count of each (symbol, interval) series.
+
+  Args:
+      db: MongoDB database instance
+      symbol: Only return entries for this symbol (optional)
+      interval: Only return entries for this interval (optional)
+      catalog_name: Name of the coverage catalog collection
+
+  Returns:
+      List of coverage entries sorted by symbol and interval
+  """
+  query_filter = {}
+  if symbol:
+    query_filter["symbol"] = symbol
+  if interval:
+    query_filter["interval"] = interval
+
+  cursor = db[catalog_name].find(
+    query_filter,
+    {"_id": 0, "symbol": 1, "interval": 1, "first_open_time": 1, "last_open_time": 1, "count": 1}
+  ).sort([("symbol", 1), ("interval", 1)])
+
+  results = []
+  for doc in cursor:
+    if isinstance(doc.get("first_open_time"), datetime):
+      doc["first_open_time"] = doc["first_open_time"].isoformat()
+    if isinstance(doc.get("last_open_time"), datetime):
+      doc["last_open_time"] = doc["last_open_time"].isoformat()
+    results.append(doc)
+
+  return results
+
+
+def iter_historical_data(
+        db: Database,
+        symbol: str,
+        interval: str = "1d",
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 1000,
+        iso_dates: bool = True,
+        after: Optional[datetime] = None,
+        fields: Optional[Sequence[str]] = None,
+        collection_name: str = "historical_daily_data"
+) -> Iterator[Dict[str, Any]]:
+  """
+  Iterate over historical cryptocurrency data straight from the MongoDB cursor.
+
+  Records are yielded as they come off the cursor, so memory use depends on
+  `batch_size` and not on the number of matching documents.
+
+  Args:
+      db: MongoDB database instance
+      symbol: Cryptocurrency symbol (e.g., 'BTCUSDT')
+      interval: Time interval (e.g., '1d', '1h')
+      start_time: Start datetime (UTC)
+      end_time: End datetime (UTC)
+      limit: Maximum number of records to return (None for no limit)
+      batch_size: Number of documents fetched per cursor round-trip
+      iso_dates: Convert open_time/close_time to ISO strings (False keeps datetimes)
+      after: Only return records strictly after this open_time (keyset pagination)
+      fields: Candle fields to return (all of them if None; open_time is always returned)
+      collection_name: Name of the collection to query
+
+  Yields:
+      Historical data records
+  """
+  coll: Collection = db[collection_name]
+
+  # Build query filter
+  query_filter = {
+    "symbol": symbol,
+    "interval": interval
+  }
+
+  # Add time range filters
+  if start_time or end_time or after:
+    time_filter = {}
+    if start_time:
+      # Ensure timezone aware
+      if start_time.tzinfo is None:
+        start_time = start_time.replace(tzinfo=timezone.utc)
+      time_filter["$gte"] = start_time
+    if end_time:
+      # Ensure timezone aware
+      if end_time.tzinfo is None:
+        end_time = end_time.replace(tzinfo=timezone.utc)
+      time_filter["$lte"] = end_time
+    if after:
+      # Seek past the last row of the previous page on the (symbol, interval, open_time) index
+      if after.tzinfo is None:
+        after = after.replace(tzinfo=timezone.utc)
+      time_filter["$gt"] = after
+    query_filter["open_time"] = time_filter
+
+  # Query and sort by time, returning only the documented fields
+  cursor = coll.find(query_filter, candle_projection(fields)).sort("open_time", 1).batch_size(batch_size)
+  if limit:
+    cursor = cursor.limit(limit)
+
+  try:
+    for doc in cursor:
+      if not iso_dates:
+        yield doc
+        continue
+      # Convert datetime to ISO string for JSON serialization
+      if "open_time" in doc and isinstance(doc["open_time"], datetime):
+        doc["open_time"] = doc["open_time"].isoformat()
+      if "close_time" in doc and isinstance(doc["close_time"], datetime):
+        doc["close_time"] = doc["close_time"].isoformat()
+      yield doc
+  finally:
+    cursor.close()
+
+
 def get_historical_data_query(
         db: Database,
         symbol: str,
@@ -47,6 +239,9 @@ def get_historical_data_query(
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
         limit: int = 1000,
+        iso_dates: bool = True,
+        after: Optional[datetime] = None,
+        fields: Optional[Sequence[str]] = None,
         collection_name: str = "historical_daily_data"
 ) -> List[Dict[str, Any]]:
   """
@@ -59,49 +254,150 @@ def get_historical_data_query(
       start_time: Start datetime (UTC)
       end_time: End datetime (UTC)
       limit: Maximum number of records to return
+      iso_dates: Convert open_time/close_time to ISO strings (False keeps datetimes)
+      after: Only return records strictly after this open_time (keyset pagination)
+      fields: Candle fields to return (all of them if None; open_time is always returned)
       collection_name: Name of the collection to query
 
   Returns:
       List of historical data records
   """
+  return list(iter_historical_data(
+    db=db,
+    symbol=symbol,
+    interval=interval,
+    start_time=start_time,
+    end_time=end_time,
+    limit=limit,
+    batch_size=min(limit, 1000),
+    iso_dates=iso_dates,
+    after=after,
+    fields=fields,
+    collection_name=collection_name
+  ))
+
+
+def get_downsampled_data(
+        db: Database,
+        symbol: str,
+        interval: str = "1d",
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        limit: int = 1000,
+        target_interval: Optional[str] = None,
+        max_points: Optional[int] = None,
+        iso_dates: bool = True,
+        fields: Optional[Sequence[str]] = None,
+        collection_name: str = "historical_daily_data",
+        max_rows: int = MAX_DOWNSAMPLE_ROWS
+) -> List[Dict[str, Any]]:
+  """
+  Query historical data resampled to a coarser interval and/or reduced to a point budget.
+
+  Resampling runs in MongoDB: candles are grouped with $dateTrunc into
+  `target_interval` buckets (first open, max high, min low, last close,
+  summed volume). The point budget is then met with LTTB on the close
+  price, which keeps the visual shape of the series (peaks and troughs).
+  LTTB needs the whole series in memory, so at most `max_rows` candles (or
+  resampled buckets) are read for it.
+
+  Args:
+      db: MongoDB database instance
+      symbol: Cryptocurrency symbol (e.g., 'BTCUSDT')
+      interval: Stored time interval (e.g., '1d', '1h')
+      start_time: Start datetime (UTC)
+      end_time: End datetime (UTC)
+      limit: Maximum number of records to return (ignored when max_points is set)
+      target_interval: Interval to aggregate candles into (e.g., '1w', '4h')
+      max_points: Maximum number of records to return, chosen with LTTB
+      iso_dates: Convert open_time/close_time to ISO strings (False keeps datetimes)
+      fields: Candle fields to return (all of them if None; open_time is always returned)
+      collection_name: Name of the collection to query
+      max_rows: Maximum number of candles (or buckets) read when max_points is set
+
+  Returns:
+      List of historical data records
+
+  Raises:
+      TooManyRowsError: max_points is set and more than `max_rows` rows match
+  """
   coll: Collection = db[collection_name]
+  # One extra row tells whether the cap is exceeded
+  read_limit = max_rows + 1 if max_points else limit
 
-  # Build query filter
   query_filter = {
     "symbol": symbol,
     "interval": interval
   }
-
-  # Add time range filters
   if start_time or end_time:
     time_filter = {}
     if start_time:
-      # Ensure timezone aware
       if start_time.tzinfo is None:
         start_time = start_time.replace(tzinfo=timezone.utc)
       time_filter["$gte"] = start_time
     if end_time:
-      # Ensure timezone aware
       if end_time.tzinfo is None:
         end_time = end_time.replace(tzinfo=timezone.utc)
       time_filter["$lte"] = end_time
     query_filter["open_time"] = time_filter
 
-  # Query and sort by time
-  cursor = coll.find(query_filter).sort("open_time", 1).limit(limit)
-
-  # Convert to list and remove MongoDB _id field
-  results = []
-  for doc in cursor:
-    # Remove _id for cleaner JSON output
-    if "_id" in doc:
-      del doc["_id"]
-    # Convert datetime to ISO string for JSON serialization
-    if "open_time" in doc and isinstance(doc["open_time"], datetime):
-      doc["open_time"] = doc["open_time"].isoformat()
-    if "close_time" in doc and isinstance(doc["close_time"], datetime):
-      doc["close_time"] = doc["close_time"].isoformat()
-    results.append(doc)
+  if target_interval:
+    pipeline = [
+      {"$match": query_filter},
+      {"$sort": {"open_time": 1}},
+      {
+        "$group": {
+          "_id": {"$dateTrunc": {"date": "$open_time", **interval_to_date_trunc(target_interval)}},
+          "open": {"$first": "$open"},
+          "high": {"$max": "$high"},
+          "low": {"$min": "$low"},
+          "close": {"$last": "$close"},
+          "volume": {"$sum": "$volume"},
+          "close_time": {"$last": "$close_time"}
+        }
+      },
+      {"$sort": {"_id": 1}},
+      {
+        "$project": {
+          "_id": 0,
+          "symbol": {"$literal": symbol},
+          "interval": {"$literal": target_interval},
+          "open_time": "$_id",
+          "open": 1,
+          "high": 1,
+          "low": 1,
+          "close": 1,
+          "volume": 1,
+          "close_time": 1
+        }
+      }
+    ]
+    pipeline.append({"$limit": read_limit})
+    results = list(coll.aggregate(pipeline, allowDiskUse=True))
+  else:
+    results = list(coll.find(query_filter, CANDLE_PROJECTION).sort("open_time", 1).limit(read_limit))
+
+  if max_points and len(results) > max_rows:
+    raise TooManyRowsError(
+      f"More than {max_rows} candles to downsample; narrow the time range or add resample="
+    )
+
+  if max_points and len(results) > max_points:
+    x = np.array([doc["open_time"] for doc in results], dtype="datetime64[ms]").astype(np.int64)
+    y = np.fromiter((doc["close"] for doc in results), dtype=np.float64, count=len(results))
+    results = [results[i] for i in lttb_indices(x, y, max_points)]
+
+  if fields:
+    # Aggregation and LTTB need the full candles; trim once the rows are picked
+    projection = candle_projection(fields)
+    results = [{key: value for key, value in doc.items() if key in projection} for doc in results]
+
+  if iso_dates:
+    for doc in results:
+      if isinstance(doc.get("open_time"), datetime):
+        doc["open_time"] = doc["open_time"].isoformat()
+      if isinstance(doc.get("close_time"), datetime):
+        doc["close_time"] = doc["close_time"].isoformat()
 
   return results
 
@@ -111,6 +407,8 @@ def get_latest_data(
         symbol: str,
         interval: str = "1d",
         count: int = 30,
+        iso_dates: bool = True,
+        fields: Optional[Sequence[str]] = None,
         collection_name: str = "historical_daily_data"
 ) -> List[Dict[str, Any]]:
   """
@@ -121,6 +419,8 @@ def get_latest_data(
       symbol: Cryptocurrency symbol (e.g., 'BTCUSDT')
       interval: Time interval (e.g., '1d', '1h')
       count: Number of recent records to return
+      iso_dates: Convert open_time/close_time to ISO strings (False keeps datetimes)
+      fields: Candle fields to return (all of them if None; open_time is always returned)
       collection_name: Name of the collection to query
 
   Returns:
@@ -134,13 +434,14 @@ def get_latest_data(
   }
 
   # Query and sort by time descending to get latest first
-  cursor = coll.find(query_filter).sort("open_time", -1).limit(count)
+  cursor = coll.find(query_filter, candle_projection(fields)).sort("open_time", -1).limit(count)
 
   # Convert to list and reverse to get chronological order
   results = []
   for doc in cursor:
-    if "_id" in doc:
-      del doc["_id"]
+    if not iso_dates:
+      results.append(doc)
+      continue
     if "open_time" in doc and isinstance(doc["open_time"], datetime):
       doc["open_time"] = doc["open_time"].isoformat()
     if "close_time" in doc and isinstance(doc["close_time"], datetime):
@@ -157,11 +458,18 @@ def get_aggregated_stats(
         interval: str = "1d",
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
-        collection_name: str = "historical_daily_data"
+        collection_name: str = "historical_daily_data",
+        catalog_name: str = "historical_coverage",
+        rollups_name: str = "historical_rollups"
 ) -> Dict[str, Any]:
   """
   Get aggregated statistics for a symbol over a time range.
 
+  Whole months (and days, for intraday intervals) are read from the rollup
+  collection maintained by the ingestion; only the partial edges are
+  aggregated from the candles. The full $match + $group scan is used when
+  the rollups of the series are missing or stale.
+
   Args:
       db: MongoDB database instance
       symbol: Cryptocurrency symbol (e.g., 'BTCUSDT')
@@ -169,12 +477,33 @@ def get_aggregated_stats(
       start_time: Start datetime (UTC)
       end_time: End datetime (UTC)
       collection_name: Name of the collection to query
+      catalog_name: Name of the coverage catalog collection
+      rollups_name: Name of the rollup collection
 
   Returns:
       Dictionary with aggregated statistics
   """
   coll: Collection = db[collection_name]
 
+  partial = get_range_stats(coll, db[rollups_name], db[catalog_name], symbol, interval, start_time, end_time)
+  if partial is not None:
+    if partial["count"] == 0:
+      return {
+        "symbol": symbol,
+        "interval": interval,
+        "count": 0
+      }
+    stats = {
+      "count": partial["count"],
+      "avg_close": partial["sum_close"] / partial["count"],
+      "min_low": partial["min_low"],
+      "max_high": partial["max_high"],
+      "total_volume": partial["total_volume"],
+      "first_open_time": partial["first_open_time"],
+      "last_open_time": partial["last_open_time"]
+    }
+    return _finalize_stats(stats, symbol, interval)
+
   # Build match filter
   match_filter = {
     "symbol": symbol,
@@ -219,7 +548,11 @@ def get_aggregated_stats(
       "count": 0
     }
 
-  stats = result[0]
+  return _finalize_stats(result[0], symbol, interval)
+
+
+def _finalize_stats(stats: Dict[str, Any], symbol: str, interval: str) -> Dict[str, Any]:
+  """Format aggregated statistics for the API response."""
   # Convert datetime to ISO string
   if "first_open_time" in stats and isinstance(stats["first_open_time"], datetime):
     stats["first_open_time"] = stats["first_open_time"].isoformat()
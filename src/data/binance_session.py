@@ -0,0 +1,150 @@
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Transient server errors retried by the connection pool; 429/418 are left to the
+# shared rate limiter, which pauses every thread instead of only the caller
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class LatencyStats:
+  """
+  Latency and outcome of the HTTP calls made through a session.
+
+  Percentiles are computed over the last `window` calls.
+  """
+
+  def __init__(self, window: int = 1024):
+    """
+    Initialize the statistics.
+
+    Args:
+        window (int): Number of recent calls kept for percentiles.
+    """
+    self._lock = threading.Lock()
+    self._recent = deque(maxlen=window)
+    self.count = 0
+    self.errors = 0
+    self.total_seconds = 0.0
+    self.max_seconds = 0.0
+
+  def record(self, seconds: float, status: int) -> None:
+    """
+    Record one call.
+
+    Args:
+        seconds (float): Time until the response headers were received.
+        status (int): HTTP status code of the response.
+    """
+    with self._lock:
+      self.count += 1
+      self.errors += status >= 400
+      self.total_seconds += seconds
+      self.max_seconds = max(self.max_seconds, seconds)
+      self._recent.append(seconds)
+
+  def snapshot(self) -> Dict[str, Any]:
+    """
+    Get the current statistics.
+
+    Returns:
+        dict: count, errors, mean_ms, p50_ms, p95_ms and max_ms.
+    """
+    with self._lock:
+      recent = sorted(self._recent)
+      count, errors, total, peak = self.count, self.errors, self.total_seconds, self.max_seconds
+
+    def percentile(q: float) -> float:
+      return recent[min(len(recent) - 1, int(q * len(recent)))] * 1000 if recent else 0.0
+
+    return {
+      "count": count,
+      "errors": errors,
+      "mean_ms": total / count * 1000 if count else 0.0,
+      "p50_ms": percentile(0.50),
+      "p95_ms": percentile(0.95),
+      "max_ms": peak * 1000,
+    }
+
+
+def create_binance_session(
+        pool_size: int = 16,
+        retries: int = 5,
+        backoff_factor: float = 0.5,
+        backoff_jitter: float = 0.5,
+        timeout: float = 10.0,
+        stats: Optional[LatencyStats] = None
+) -> requests.Session:
+  """
+  Create a keep-alive session for the Binance REST API.
+
+  Connections are pooled per host and reused across calls, responses are
+  gzip-compressed, and connection errors and 5xx responses are retried with
+  exponential backoff plus random jitter. Every response is recorded in `stats`.
+
+  Args:
+      pool_size (int): Maximum number of kept-alive connections per host.
+      retries (int): Maximum number of retries of one call.
+      backoff_factor (float): Base of the exponential backoff, in seconds.
+      backoff_jitter (float): Maximum random delay added to each backoff, in seconds.
+      timeout (float): Default connect/read timeout of a call, in seconds.
+      stats (LatencyStats, optional): Where to record the latency of each call.
+
+  Returns:
+      requests.Session: Configured session.
+  """
+  retry = Retry(
+    total=retries,
+    backoff_factor=backoff_factor,
+    backoff_jitter=backoff_jitter,
+    status_forcelist=RETRY_STATUSES,
+    allowed_methods=frozenset({"GET"}),
+    raise_on_status=False,
+    # Otherwise urllib3 also retries 429 responses carrying Retry-After, behind the limiter's back
+    respect_retry_after_header=False,
+  )
+  adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+
+  session = requests.Session()
+  session.mount("https://", adapter)
+  session.mount("http://", adapter)
+  session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+
+  # requests has no session-wide timeout: apply the default to calls that do not set one
+  request = session.request
+
+  def request_with_timeout(method, url, **kwargs):
+    kwargs.setdefault("timeout", timeout)
+    return request(method, url, **kwargs)
+
+  session.request = request_with_timeout
+
+  if stats is not None:
+    session.hooks["response"].append(
+      lambda response, *args, **kwargs: stats.record(response.elapsed.total_seconds(), response.status_code)
+    )
+  return session
+
+
+# Session shared by every Binance REST call of the process, and its latency statistics
+binance_latency = LatencyStats()
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_binance_session() -> requests.Session:
+  """
+  Get the process-wide Binance session, creating it on first use.
+
+  Returns:
+      requests.Session: Shared keep-alive session.
+  """
+  global _session
+  with _session_lock:
+    if _session is None:
+      _session = create_binance_session(stats=binance_latency)
+    return _session
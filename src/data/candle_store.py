@@ -0,0 +1,176 @@
+import logging
+from typing import Dict, Optional, Tuple
+from pymongo.collection import Collection
+from pymongo.database import Database
+from pymongo.errors import CollectionInvalid
+
+from .config import SETTINGS
+from .intervals import interval_to_ms, DAY_MS, HOUR_MS
+
+logger = logging.getLogger("CRYPTO_BOT")
+
+# History kept for each interval when it is first ingested, in days
+DEFAULT_LOOKBACK_DAYS = {
+  "1m": 30,
+  "5m": 90,
+  "15m": 180,
+  "1h": 365,
+  "4h": 730,
+  "1d": 730,
+}
+
+# Candle storage modes: one regular document per candle, or a MongoDB time-series collection
+STORAGE_MODES = ("standard", "timeseries")
+# Time-series collections cannot be renamed, so they live next to the regular ones
+TIMESERIES_SUFFIX = "_ts"
+
+# (database, collection) -> whether it is a time-series collection
+_timeseries_cache: Dict[Tuple[str, str], bool] = {}
+
+
+def parse_interval_catalog(spec: str) -> Dict[str, int]:
+  """
+  Parse the list of intervals to ingest.
+
+  Args:
+      spec (str): Comma-separated intervals, each optionally followed by
+          ':<days>' of history (e.g., '1m:7,1h,1d').
+
+  Returns:
+      dict: Interval -> number of days of history to backfill.
+  """
+  catalog: Dict[str, int] = {}
+  for item in spec.split(","):
+    item = item.strip()
+    if not item:
+      continue
+    interval, _, days = item.partition(":")
+    interval_to_ms(interval)  # Validates the interval
+    catalog[interval] = int(days) if days else DEFAULT_LOOKBACK_DAYS.get(interval, 730)
+  return catalog
+
+
+def storage_mode(mode: Optional[str] = None) -> str:
+  """
+  Get and validate the candle storage mode.
+
+  Args:
+      mode (str, optional): 'standard' or 'timeseries'. Defaults to MONGO_STORAGE_MODE.
+
+  Returns:
+      str: The storage mode.
+
+  Raises:
+      ValueError: If the mode is unknown.
+  """
+  mode = mode or SETTINGS["MONGO_STORAGE_MODE"]
+  if mode not in STORAGE_MODES:
+    raise ValueError(f"Invalid storage mode '{mode}', expected one of {', '.join(STORAGE_MODES)}")
+  return mode
+
+
+def collection_name(interval: str, mode: Optional[str] = None) -> str:
+  """
+  Get the name of the collection storing the candles of an interval.
+
+  Daily candles keep the historical collection; every other interval has its
+  own collection, so intraday series do not bloat the daily indexes and the
+  recent part of each index stays in cache. In time-series mode the name
+  gets the '_ts' suffix.
+
+  Args:
+      interval (str): Candlestick interval (e.g., '1m', '1d').
+      mode (str, optional): Storage mode. Defaults to MONGO_STORAGE_MODE.
+
+  Returns:
+      str: Collection name.
+  """
+  interval_to_ms(interval)  # Validates the interval
+  if interval == "1d":
+    name = SETTINGS["MONGO_COLLECTION_HISTORICAL"]
+  else:
+    name = f"{SETTINGS['MONGO_COLLECTION_PREFIX']}_{interval}"
+  return name + TIMESERIES_SUFFIX if storage_mode(mode) == "timeseries" else name
+
+
+def timeseries_options(interval: str) -> Dict[str, str]:
+  """
+  Time-series options of a candle collection.
+
+  Candles are bucketed per symbol (metaField) on their open time (timeField),
+  with a bucket granularity matching the interval.
+
+  Args:
+      interval (str): Candlestick interval (e.g., '1m', '1d').
+
+  Returns:
+      dict: Value of the `timeseries` option of create_collection.
+  """
+  return {
+    "timeField": "open_time",
+    "metaField": "symbol",
+    "granularity": "minutes" if interval_to_ms(interval) < HOUR_MS else "hours",
+  }
+
+
+def ensure_candle_collection(db: Database, interval: str, mode: Optional[str] = None) -> Collection:
+  """
+  Create the collection of an interval and its indexes if needed.
+
+  Intraday collections are created with zstd block compression: they hold
+  many small, very similar documents, which compress far better than with
+  the default snappy. Time-series collections store candles in compressed
+  column buckets instead, and only get a (symbol, open_time) index: they do
+  not support unique indexes.
+
+  Args:
+      db (Database): MongoDB database.
+      interval (str): Candlestick interval (e.g., '1m', '1d').
+      mode (str, optional): Storage mode. Defaults to MONGO_STORAGE_MODE.
+
+  Returns:
+      Collection: The candle collection of the interval.
+  """
+  mode = storage_mode(mode)
+  name = collection_name(interval, mode)
+  if name not in db.list_collection_names(filter={"name": name}):
+    options = {}
+    if mode == "timeseries":
+      options["timeseries"] = timeseries_options(interval)
+    elif interval_to_ms(interval) < DAY_MS:
+      options["storageEngine"] = {"wiredTiger": {"configString": "block_compressor=zstd"}}
+    try:
+      db.create_collection(name, **options)
+      logger.info(f"Created {mode} collection {name} for {interval} candles")
+    except CollectionInvalid:
+      pass  # Created concurrently by another ingestion process
+
+  coll = db[name]
+  if mode == "timeseries":
+    _timeseries_cache[(db.name, name)] = True
+    coll.create_index([("symbol", 1), ("open_time", 1)])
+    return coll
+
+  # We make a unique index on (symbol, interval, open_time), so upserts work correctly and avoid duplicates
+  coll.create_index([("symbol", 1), ("interval", 1), ("open_time", 1)], unique=True)
+  # Covering index: close-only series (fields=open_time,close in the API) are read without fetching documents
+  coll.create_index([("symbol", 1), ("interval", 1), ("open_time", 1), ("close", 1)])
+  return coll
+
+
+def is_timeseries(coll: Collection) -> bool:
+  """
+  Tell whether a collection is a time-series collection.
+
+  The collection options are read once per collection and cached.
+
+  Args:
+      coll (Collection): Candle collection.
+
+  Returns:
+      bool: True for a time-series collection.
+  """
+  key = (coll.database.name, coll.name)
+  if key not in _timeseries_cache:
+    _timeseries_cache[key] = "timeseries" in coll.options()
+  return _timeseries_cache[key]
@@ -19,8 +19,32 @@ class Settings(TypedDict):
   MONGO_PASSWORD: str
   MONGO_COLLECTION_HISTORICAL: str
   MONGO_COLLECTION_STREAMING: str
+  MONGO_COLLECTION_PREFIX: str
+  MONGO_STORAGE_MODE: str
+  MONGO_COLLECTION_COVERAGE: str
+  MONGO_COLLECTION_ROLLUPS: str
+  MONGO_MAX_POOL_SIZE: str
+  MONGO_MIN_POOL_SIZE: str
+  MONGO_COMPRESSORS: str
+  MONGO_CONNECT_TIMEOUT_MS: str
+  MONGO_SOCKET_TIMEOUT_MS: str
+  MONGO_SERVER_SELECTION_TIMEOUT_MS: str
+  POSTGRES_POOL_SIZE: str
+  POSTGRES_MAX_OVERFLOW: str
+  POSTGRES_POOL_TIMEOUT: str
+  POSTGRES_CONNECT_TIMEOUT: str
   URL_HISTORIQUE: str
   URL_STREAM: str
+  API_QUERY_WORKERS: str
+  API_QUERY_MAX_PENDING: str
+  API_STREAM_QUEUE_SIZE: str
+  INGEST_WORKERS: str
+  INGEST_INTERVALS: str
+  INGEST_SHARDS: str
+  INGEST_QUEUE_PAGES: str
+  STREAM_CHANNELS: str
+  STREAM_BATCH_SIZE: str
+  STREAM_FLUSH_SECONDS: str
 
 
 SETTINGS: Settings = {
@@ -36,6 +60,30 @@ SETTINGS: Settings = {
   "MONGO_PASSWORD": os.environ.get("MONGO_PASSWORD", "default_mongo_password"),
   "MONGO_COLLECTION_HISTORICAL": os.environ.get("MONGO_COLLECTION_HISTORICAL", "historical_daily_data"),
   "MONGO_COLLECTION_STREAMING": os.environ.get("MONGO_COLLECTION_STREAMING", "streaming_trades"),
+  "MONGO_COLLECTION_PREFIX": os.environ.get("MONGO_COLLECTION_PREFIX", "historical_data"),
+  "MONGO_STORAGE_MODE": os.environ.get("MONGO_STORAGE_MODE", "standard"),
+  "MONGO_COLLECTION_COVERAGE": os.environ.get("MONGO_COLLECTION_COVERAGE", "historical_coverage"),
+  "MONGO_COLLECTION_ROLLUPS": os.environ.get("MONGO_COLLECTION_ROLLUPS", "historical_rollups"),
+  "MONGO_MAX_POOL_SIZE": os.environ.get("MONGO_MAX_POOL_SIZE", "100"),
+  "MONGO_MIN_POOL_SIZE": os.environ.get("MONGO_MIN_POOL_SIZE", "0"),
+  "MONGO_COMPRESSORS": os.environ.get("MONGO_COMPRESSORS", ""),
+  "MONGO_CONNECT_TIMEOUT_MS": os.environ.get("MONGO_CONNECT_TIMEOUT_MS", "10000"),
+  "MONGO_SOCKET_TIMEOUT_MS": os.environ.get("MONGO_SOCKET_TIMEOUT_MS", "60000"),
+  "MONGO_SERVER_SELECTION_TIMEOUT_MS": os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "10000"),
+  "POSTGRES_POOL_SIZE": os.environ.get("POSTGRES_POOL_SIZE", "5"),
+  "POSTGRES_MAX_OVERFLOW": os.environ.get("POSTGRES_MAX_OVERFLOW", "10"),
+  "POSTGRES_POOL_TIMEOUT": os.environ.get("POSTGRES_POOL_TIMEOUT", "30"),
+  "POSTGRES_CONNECT_TIMEOUT": os.environ.get("POSTGRES_CONNECT_TIMEOUT", "10"),
   "URL_HISTORIQUE": os.environ.get("URL_HISTORIQUE", "https://api.binance.com/api/v3/klines"),
   "URL_STREAM": os.environ.get("URL_STREAM", "wss://stream.binance.com:9443/ws"),
+  "API_QUERY_WORKERS": os.environ.get("API_QUERY_WORKERS", "16"),
+  "API_QUERY_MAX_PENDING": os.environ.get("API_QUERY_MAX_PENDING", "256"),
+  "API_STREAM_QUEUE_SIZE": os.environ.get("API_STREAM_QUEUE_SIZE", "64"),
+  "INGEST_WORKERS": os.environ.get("INGEST_WORKERS", "4"),
+  "INGEST_INTERVALS": os.environ.get("INGEST_INTERVALS", "1d"),
+  "INGEST_SHARDS": os.environ.get("INGEST_SHARDS", "4"),
+  "INGEST_QUEUE_PAGES": os.environ.get("INGEST_QUEUE_PAGES", "4"),
+  "STREAM_CHANNELS": os.environ.get("STREAM_CHANNELS", "trade,kline_1m"),
+  "STREAM_BATCH_SIZE": os.environ.get("STREAM_BATCH_SIZE", "500"),
+  "STREAM_FLUSH_SECONDS": os.environ.get("STREAM_FLUSH_SECONDS", "1.0"),
 }
@@ -1,18 +1,27 @@
 from pymongo import MongoClient
 from pymongo.database import Database
+import functools
+import itertools
 import logging
+import operator
 import sqlalchemy
-from typing import TypedDict
+from psycopg import sql
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, TypedDict, Union
 from sqlalchemy.engine import Engine
 import pandas as pd
 import datetime
 
+from .registry import registry
+
 logger = logging.getLogger("CRYPTO_BOT")
 
 
 def connect_to_postgres(db_name: str, user: str, password: str, host: str = "localhost", port: int = 5432) -> Engine:
   """
-  Connect to a PostgreSQL database and return the SQLAlchemy engine.
+  Get the process-wide SQLAlchemy engine of a PostgreSQL database.
+
+  The engine and its connection pool are shared by every caller of the process
+  (see registry.ClientRegistry); do not dispose of it after use.
 
   Args:
       db_name (str): Name of the database.
@@ -25,9 +34,7 @@ def connect_to_postgres(db_name: str, user: str, password: str, host: str = "loc
       Engine: SQLAlchemy engine connected to the PostgreSQL database.
   """
   try:
-    engine = sqlalchemy.create_engine(
-      f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{db_name}"
-    )
+    engine = registry.postgres(db_name=db_name, user=user, password=password, host=host, port=port)
     logger.info(f"Connected to PostgreSQL database: {db_name} at {host}:{port} as user {user}")
     return engine
   except Exception as e:
@@ -36,9 +43,12 @@ def connect_to_postgres(db_name: str, user: str, password: str, host: str = "loc
 
 
 def connect_to_mongo(db_name: str, host: str, port: int = 27017, auth: bool = True, user: str = "",
-                     password: str = "") -> MongoClient:
+                     password: str = "", max_pool_size: Optional[int] = None) -> MongoClient:
   """
-  Connect to a MongoDB database and return the client.
+  Get the process-wide client of a MongoDB server.
+
+  The client and its connection pool are shared by every caller of the process
+  (see registry.ClientRegistry); do not close it after use.
 
   Args:
       db_name (str): Name of the database.
@@ -47,14 +57,14 @@ def connect_to_mongo(db_name: str, host: str, port: int = 27017, auth: bool = Tr
       auth (bool, optional): Whether authentication is required. Defaults to True.
       user (str): Database user.
       password (str): Database password.
+      max_pool_size (int, optional): Maximum connections per server. Defaults to MONGO_MAX_POOL_SIZE.
 
   Returns:
       MongoClient: Mongo client.
   """
   try:
-    uri = "mongodb://{}:{}@{}:{}/".format(user, password, host,
-                                          port) if auth else "mongodb://{}:{}/".format(host, port)
-    client = MongoClient(uri)
+    client = registry.mongo(host=host, port=port, user=user if auth else "", password=password if auth else "",
+                            max_pool_size=max_pool_size)
     logger.info(f"Connected to MongoDB database: {db_name}")
     return client
   except Exception as e:
@@ -64,7 +74,7 @@ def connect_to_mongo(db_name: str, host: str, port: int = 27017, auth: bool = Tr
 
 def write_to_mongo(db_name: str, collection_name: str, data: list[dict]) -> None:
   """
-  Write data to a MongoDB collection.
+  Write data to a MongoDB collection of the configured server (MONGO_HOST, MONGO_PORT).
 
   Args:
       db_name (str): Name of the database.
@@ -72,23 +82,39 @@ def write_to_mongo(db_name: str, collection_name: str, data: list[dict]) -> None
       data (list[dict]): List of data to insert.
   """
   try:
-    client = MongoClient("mongodb://localhost:27017/")
-    db: Database = client[db_name]
+    db: Database = registry.mongo()[db_name]
     collection = db[collection_name]
     if data:
       collection.insert_many(data)
       logger.info(f"Inserted {len(data)} records into {db_name}.{collection_name}")
     else:
       logger.warning("No data provided to insert.")
-    client.close()
   except Exception as e:
     logger.error(f"Error writing to MongoDB: {e}")
 
 
+@functools.lru_cache(maxsize=None)
+def get_table(engine: Engine, table_name: str) -> sqlalchemy.Table:
+  """
+  Get the reflected metadata of a table, reflecting it on first use only.
+
+  Args:
+      engine (Engine): SQLAlchemy engine connected to the database.
+      table_name (str): Name of the table.
+
+  Returns:
+      sqlalchemy.Table: The table, with its columns and primary key.
+  """
+  return sqlalchemy.Table(table_name, sqlalchemy.MetaData(), autoload_with=engine)
+
+
 def write_to_postgres(engine: Engine, table_name: str, data: list[TypedDict]) -> None:
   """
   Write data to a PostgreSQL table.
 
+  Rows are sent as one executemany in a transaction committed at the end.
+  For large loads, prefer copy_to_postgres.
+
   Args:
       engine (Engine): SQLAlchemy engine connected to the PostgreSQL database.
       table_name (str): Name of the table.
@@ -99,20 +125,123 @@ def write_to_postgres(engine: Engine, table_name: str, data: list[TypedDict]) ->
     return
 
   try:
-    with engine.connect() as connection:
-      metadata = sqlalchemy.MetaData()
-      table = sqlalchemy.Table(table_name, metadata, autoload_with=engine)
-      insert_stmt = table.insert().values(data)
-      connection.execute(insert_stmt)
-      logger.info(f"Inserted {len(data)} records into {table_name}")
+    table = get_table(engine, table_name)
+    with engine.begin() as connection:
+      connection.execute(table.insert(), data)
+    logger.info(f"Inserted {len(data)} records into {table_name}")
   except Exception as e:
     logger.error(f"Error writing to PostgreSQL: {e}")
 
 
+def _upsert_statement(table_name: str, staging_name: str, columns: Sequence[str],
+                      keys: Sequence[str]) -> sql.Composed:
+  """Build the INSERT ... ON CONFLICT moving the staging table rows to the target table."""
+  column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+  updates = [c for c in columns if c not in keys]
+  if updates:
+    action = sql.SQL("DO UPDATE SET {}").format(sql.SQL(", ").join(
+      sql.SQL("{} = EXCLUDED.{}").format(sql.Identifier(c), sql.Identifier(c)) for c in updates
+    ))
+  else:
+    action = sql.SQL("DO NOTHING")
+  return sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {} ON CONFLICT ({}) {}").format(
+    sql.Identifier(table_name),
+    column_list,
+    column_list,
+    sql.Identifier(staging_name),
+    sql.SQL(", ").join(map(sql.Identifier, keys)),
+    action
+  )
+
+
+def copy_to_postgres(
+        engine: Engine,
+        table_name: str,
+        rows: Iterable[Union[Mapping[str, Any], Sequence[Any]]],
+        columns: Optional[Sequence[str]] = None,
+        upsert_keys: Optional[Sequence[str]] = None,
+        chunk_size: int = 10000
+) -> int:
+  """
+  Bulk-load rows into a PostgreSQL table with the COPY protocol.
+
+  Rows are consumed lazily and streamed to the server `chunk_size` at a time,
+  in one transaction committed at the end (rolled back on error). With
+  `upsert_keys`, rows are copied to a temporary staging table first, then
+  inserted with ON CONFLICT (upsert_keys) DO UPDATE; the keys must match a
+  unique constraint and be unique within the load.
+
+  Args:
+      engine (Engine): SQLAlchemy engine using the psycopg (3) driver.
+      table_name (str): Name of the table.
+      rows (Iterable): Dicts, or tuples in the order of `columns`.
+      columns (Sequence[str], optional): Columns to load. Defaults to the table
+          columns present in the first row (all table columns for tuples).
+      upsert_keys (Sequence[str], optional): Conflict target of an upsert.
+      chunk_size (int, optional): Rows converted and sent at a time. Defaults to 10000.
+
+  Returns:
+      int: Number of rows copied.
+  """
+  rows = iter(rows)
+  first = next(rows, None)
+  if first is None:
+    logger.warning("No data provided to insert.")
+    return 0
+  rows = itertools.chain([first], rows)
+
+  table = get_table(engine, table_name)
+  if columns is None:
+    columns = [c.name for c in table.columns if not isinstance(first, Mapping) or c.name in first]
+  columns = list(columns)
+  if isinstance(first, Mapping):
+    getter = operator.itemgetter(*columns)
+    to_tuple = (lambda row: (getter(row),)) if len(columns) == 1 else getter
+    rows = map(to_tuple, rows)
+
+  target = table_name
+  raw = engine.raw_connection()
+  try:
+    conn = raw.driver_connection
+    with conn.cursor() as cursor:
+      if upsert_keys:
+        target = f"{table_name}_staging"
+        cursor.execute(sql.SQL("CREATE TEMP TABLE {} (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP").format(
+          sql.Identifier(target), sql.Identifier(table_name)
+        ))
+
+      copied = 0
+      statement = sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.Identifier(target), sql.SQL(", ").join(map(sql.Identifier, columns))
+      )
+      with cursor.copy(statement) as copy:
+        while True:
+          chunk = list(itertools.islice(rows, chunk_size))
+          if not chunk:
+            break
+          for row in chunk:
+            copy.write_row(row)
+          copied += len(chunk)
+
+      if upsert_keys:
+        cursor.execute(_upsert_statement(table_name, target, columns, upsert_keys))
+    raw.commit()
+  except Exception:
+    raw.rollback()
+    raise
+  finally:
+    raw.close()
+
+  logger.info(f"Copied {copied} records into {table_name}" + (" (upsert)" if upsert_keys else ""))
+  return copied
+
+
 def read_from_postgres(engine: Engine, query: str) -> list[dict]:
   """
   Read data from a PostgreSQL database.
 
+  The whole result is held in memory; for large extracts, use iter_postgres_batches.
+
   Args:
       engine (Engine): SQLAlchemy engine connected to the PostgreSQL database.
       query (str): SQL query to execute.
@@ -123,7 +252,7 @@ def read_from_postgres(engine: Engine, query: str) -> list[dict]:
   try:
     with engine.connect() as connection:
       result = connection.execute(sqlalchemy.text(query))
-      records = [dict(row) for row in result]
+      records = [dict(row) for row in result.mappings()]
       logger.info(f"Retrieved {len(records)} records from PostgreSQL")
       return records
   except Exception as e:
@@ -131,38 +260,169 @@ def read_from_postgres(engine: Engine, query: str) -> list[dict]:
     return []
 
 
-def read_from_mongo(db: Database, collection_name: str, query=None) -> pd.DataFrame:
+BATCH_FORMATS = ("tuples", "columns", "frame")
+
+
+def iter_postgres_batches(
+        engine: Engine,
+        query: str,
+        params: Optional[Mapping[str, Any]] = None,
+        batch_size: int = 10000,
+        output: str = "tuples"
+) -> Iterator[Union[List[tuple], Dict[str, list], pd.DataFrame]]:
   """
-  Read data from a MongoDB collection.
+  Stream the result of a query in batches, through a server-side cursor.
+
+  With the psycopg driver, the rows are fetched from a named cursor
+  `batch_size` at a time, so only one batch is held in memory whatever the
+  size of the result.
 
   Args:
-      db (str): Name of the database.
+      engine (Engine): SQLAlchemy engine connected to the PostgreSQL database.
+      query (str): SQL query to execute, with :name placeholders.
+      params (Mapping, optional): Values of the placeholders.
+      batch_size (int, optional): Rows per batch. Defaults to 10000.
+      output (str, optional): 'tuples' for lists of row tuples, 'columns' for
+          dicts of column name -> values, 'frame' for DataFrames. Defaults to 'tuples'.
+
+  Yields:
+      list[tuple] | dict[str, list] | pd.DataFrame: Batches of at most `batch_size` rows.
+  """
+  if output not in BATCH_FORMATS:
+    raise ValueError(f"Invalid output '{output}', expected one of {', '.join(BATCH_FORMATS)}")
+
+  with engine.connect() as connection:
+    result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(
+      sqlalchemy.text(query), dict(params or {})
+    )
+    columns = list(result.keys())
+    for partition in result.partitions(batch_size):
+      rows = [tuple(row) for row in partition]
+      if output == "tuples":
+        yield rows
+      elif output == "columns":
+        yield {name: list(values) for name, values in zip(columns, zip(*rows))}
+      else:
+        yield pd.DataFrame.from_records(rows, columns=columns)
+
+
+def _append_documents(columns: Dict[str, list], documents: Iterable[dict], n_rows: int) -> int:
+  """
+  Append documents to per-field value lists.
+
+  A field missing from some documents gets None for them, whether it first
+  appears before or after them.
+
+  Args:
+      columns (dict): Field -> list of values, updated in place.
+      documents (Iterable[dict]): Documents to append.
+      n_rows (int): Number of rows already in `columns`.
+
+  Returns:
+      int: Number of rows in `columns` after the append.
+  """
+  for doc in documents:
+    for key, value in doc.items():
+      column = columns.get(key)
+      if column is None:
+        column = columns[key] = [None] * n_rows
+      column.append(value)
+    n_rows += 1
+    if len(doc) != len(columns):
+      for column in columns.values():
+        if len(column) < n_rows:
+          column.append(None)
+  return n_rows
+
+
+def _columns_to_frame(columns: Dict[str, list]) -> pd.DataFrame:
+  """Build a DataFrame from per-field value lists, with its dates in UTC."""
+  return convert_date(pd.DataFrame(columns), inplace=True)
+
+
+def iter_mongo_chunks(
+        db: Database,
+        collection_name: str,
+        query: Optional[dict] = None,
+        projection: Optional[dict] = None,
+        sort: Optional[List[Tuple[str, int]]] = None,
+        chunk_size: int = 10000
+) -> Iterator[pd.DataFrame]:
+  """
+  Read a MongoDB collection as a sequence of DataFrames.
+
+  A single cursor is read to the end, fetching `chunk_size` documents per
+  round trip; each chunk is built column by column from its documents.
+
+  Args:
+      db (Database): MongoDB database.
       collection_name (str): Name of the collection.
       query (dict, optional): Query to filter documents. Defaults to None.
+      projection (dict, optional): Fields to return. Defaults to all fields.
+      sort (list, optional): Sort specification, e.g. [("open_time", 1)], best served by an index.
+      chunk_size (int, optional): Number of documents per chunk. Defaults to 10000.
 
-  Returns:
-      pd.DataFrame: DataFrame containing the retrieved documents.
+  Yields:
+      pd.DataFrame: Chunks of at most `chunk_size` rows.
   """
-  if query is None:
-    query = {}
+  cursor = db[collection_name].find(query or {}, projection, sort=sort).batch_size(chunk_size)
   try:
-    count = db[collection_name].count_documents(query)
-    logger.debug(f"(MONGO) {collection_name} COUNT {count} DOCUMENTS")
+    while True:
+      columns: Dict[str, list] = {}
+      if not _append_documents(columns, itertools.islice(cursor, chunk_size), 0):
+        return
+      yield _columns_to_frame(columns)
+  finally:
+    cursor.close()
+
+
+def read_mongo_frame(
+        db: Database,
+        collection_name: str,
+        query: Optional[dict] = None,
+        projection: Optional[dict] = None,
+        sort: Optional[List[Tuple[str, int]]] = None,
+        batch_size: int = 10000
+) -> pd.DataFrame:
+  """
+  Read a MongoDB collection into a single DataFrame.
 
-    df = pd.DataFrame()
+  The values are accumulated per field while the cursor is read, and the
+  DataFrame is built once at the end: memory grows linearly with the
+  number of documents, without intermediate frames.
 
-    # We read in steps to avoid memory issues
-    step = 10000
-    for i in range(0, int(count / step) + 1):
-      logger.debug(f"(MONGO) STEP BETWEEN {step * i} and {step * (i + 1)} ")
+  Args:
+      db (Database): MongoDB database.
+      collection_name (str): Name of the collection.
+      query (dict, optional): Query to filter documents. Defaults to None.
+      projection (dict, optional): Fields to return. Defaults to all fields.
+      sort (list, optional): Sort specification, e.g. [("open_time", 1)], best served by an index.
+      batch_size (int, optional): Number of documents fetched per round trip. Defaults to 10000.
 
-      finds = db[collection_name].find(query).skip(i * step).limit(step)
-      tmp = pd.DataFrame.from_dict(finds)
-      tmp = convert_date(tmp).copy()
+  Returns:
+      pd.DataFrame: The documents, with their dates in UTC.
+  """
+  columns: Dict[str, list] = {}
+  with db[collection_name].find(query or {}, projection, sort=sort).batch_size(batch_size) as cursor:
+    _append_documents(columns, cursor, 0)
+  return _columns_to_frame(columns)
 
-      df = pd.concat([df, tmp], ignore_index=True)
 
-    logger.info(f"Retrieved {df.shape[0]} documents from {db}.{collection_name}")
+def read_from_mongo(db: Database, collection_name: str, query=None) -> pd.DataFrame:
+  """
+  Read data from a MongoDB collection.
+
+  Args:
+      db (Database): MongoDB database.
+      collection_name (str): Name of the collection.
+      query (dict, optional): Query to filter documents. Defaults to None.
+
+  Returns:
+      pd.DataFrame: DataFrame containing the retrieved documents.
+  """
+  try:
+    df = read_mongo_frame(db, collection_name, query)
+    logger.info(f"Retrieved {df.shape[0]} documents from {db.name}.{collection_name}")
     return df
   except Exception as e:
     logger.error(f"Error reading from MongoDB: {e}")
@@ -176,9 +436,7 @@ def convert_date(df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
   :param inplace: True signifie que le DataFrame en paramètre sera directement modifié
   :return: Dataframe modifié
   """
-  df_transform = df.copy()
-  if inplace:
-    df_transform = df
+  df_transform = df if inplace else df.copy()
 
   columns = df_transform.select_dtypes(include=["object"]).columns.tolist()
   for column in columns:
@@ -0,0 +1,247 @@
+import atexit
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import sqlalchemy
+from pymongo import MongoClient
+from pymongo.monitoring import ConnectionPoolListener
+from sqlalchemy.engine import Engine
+
+from ..config import SETTINGS
+
+logger = logging.getLogger("CRYPTO_BOT")
+
+
+class PoolMetrics(ConnectionPoolListener):
+  """
+  Connection pool utilization of a MongoClient, from the CMAP pool events.
+
+  Counters are summed over every server the client is connected to.
+  """
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self.open = 0
+    self.in_use = 0
+    self.peak_in_use = 0
+    self.checkouts = 0
+    self.checkout_failures = 0
+
+  def _add(self, open_delta: int = 0, in_use_delta: int = 0) -> None:
+    with self._lock:
+      self.open += open_delta
+      self.in_use += in_use_delta
+      self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+  def pool_created(self, event):
+    pass
+
+  def pool_ready(self, event):
+    pass
+
+  def pool_cleared(self, event):
+    pass
+
+  def pool_closed(self, event):
+    pass
+
+  def connection_created(self, event):
+    self._add(open_delta=1)
+
+  def connection_ready(self, event):
+    pass
+
+  def connection_closed(self, event):
+    self._add(open_delta=-1)
+
+  def connection_check_out_started(self, event):
+    pass
+
+  def connection_check_out_failed(self, event):
+    with self._lock:
+      self.checkout_failures += 1
+
+  def connection_checked_out(self, event):
+    with self._lock:
+      self.checkouts += 1
+    self._add(in_use_delta=1)
+
+  def connection_checked_in(self, event):
+    self._add(in_use_delta=-1)
+
+  def snapshot(self) -> Dict[str, int]:
+    """Get the current counters."""
+    with self._lock:
+      return {
+        "open": self.open,
+        "in_use": self.in_use,
+        "peak_in_use": self.peak_in_use,
+        "checkouts": self.checkouts,
+        "checkout_failures": self.checkout_failures,
+      }
+
+
+class ClientRegistry:
+  """
+  Process-wide MongoDB clients and SQLAlchemy engines.
+
+  One client (or engine) is created per set of connection settings and
+  shared by every caller, so each process keeps a single connection pool
+  per server. Pool sizes, wire compression and timeouts come from SETTINGS
+  unless overridden.
+
+  Clients are not fork-safe: a forked child (e.g. a pre-fork server worker)
+  drops the parent's clients and creates its own on first use, without
+  touching the parent's sockets.
+  """
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._pid = os.getpid()
+    self._mongo: Dict[Tuple, Tuple[MongoClient, PoolMetrics]] = {}
+    self._engines: Dict[Tuple, Engine] = {}
+
+  def _check_pid(self) -> None:
+    """Forget the clients inherited from the parent process after a fork."""
+    if self._pid == os.getpid():
+      return
+    self._pid = os.getpid()
+    self._mongo = {}
+    for engine in self._engines.values():
+      # Per SQLAlchemy: drop the inherited pool without closing the parent's connections
+      engine.dispose(close=False)
+    self._engines = {}
+    self._lock = threading.Lock()
+
+  def mongo(
+          self,
+          host: Optional[str] = None,
+          port: Optional[int] = None,
+          user: Optional[str] = None,
+          password: Optional[str] = None,
+          max_pool_size: Optional[int] = None
+  ) -> MongoClient:
+    """
+    Get the shared MongoClient of a server, creating it on first use.
+
+    Args:
+        host (str, optional): MongoDB server address. Defaults to MONGO_HOST.
+        port (int, optional): MongoDB server port. Defaults to MONGO_PORT.
+        user (str, optional): Database user; empty for no authentication. Defaults to MONGO_USER.
+        password (str, optional): Database password. Defaults to MONGO_PASSWORD.
+        max_pool_size (int, optional): Maximum connections per server. Defaults to MONGO_MAX_POOL_SIZE.
+
+    Returns:
+        MongoClient: Shared client.
+    """
+    host = host or SETTINGS["MONGO_HOST"]
+    port = int(port or SETTINGS["MONGO_PORT"])
+    user = SETTINGS.get("MONGO_USER", "") if user is None else user
+    password = SETTINGS.get("MONGO_PASSWORD", "") if password is None else password
+    max_pool_size = int(max_pool_size or SETTINGS["MONGO_MAX_POOL_SIZE"])
+    key = (host, port, user, password, max_pool_size)
+
+    self._check_pid()
+    with self._lock:
+      if key not in self._mongo:
+        options: Dict[str, Any] = {
+          "maxPoolSize": max_pool_size,
+          "minPoolSize": int(SETTINGS["MONGO_MIN_POOL_SIZE"]),
+          "connectTimeoutMS": int(SETTINGS["MONGO_CONNECT_TIMEOUT_MS"]),
+          "socketTimeoutMS": int(SETTINGS["MONGO_SOCKET_TIMEOUT_MS"]),
+          "serverSelectionTimeoutMS": int(SETTINGS["MONGO_SERVER_SELECTION_TIMEOUT_MS"]),
+        }
+        if SETTINGS["MONGO_COMPRESSORS"]:
+          options["compressors"] = SETTINGS["MONGO_COMPRESSORS"]
+        metrics = PoolMetrics()
+        uri = f"mongodb://{user}:{password}@{host}:{port}/" if user else f"mongodb://{host}:{port}/"
+        self._mongo[key] = (MongoClient(uri, event_listeners=[metrics], **options), metrics)
+        logger.info(f"Created MongoDB client for {host}:{port} (pool {max_pool_size})")
+      return self._mongo[key][0]
+
+  def postgres(
+          self,
+          db_name: Optional[str] = None,
+          user: Optional[str] = None,
+          password: Optional[str] = None,
+          host: Optional[str] = None,
+          port: Optional[int] = None
+  ) -> Engine:
+    """
+    Get the shared SQLAlchemy engine of a database, creating it on first use.
+
+    Args:
+        db_name (str, optional): Name of the database. Defaults to POSTGRES_DB.
+        user (str, optional): Database user. Defaults to POSTGRES_USER.
+        password (str, optional): Database password. Defaults to POSTGRES_PASSWORD.
+        host (str, optional): Database host. Defaults to DB_HOST.
+        port (int, optional): Database port. Defaults to POSTGRES_PORT.
+
+    Returns:
+        Engine: Shared engine, using the psycopg driver.
+    """
+    db_name = db_name or SETTINGS["POSTGRES_DB"]
+    user = user or SETTINGS["POSTGRES_USER"]
+    password = password or SETTINGS["POSTGRES_PASSWORD"]
+    host = host or SETTINGS["DB_HOST"]
+    port = int(port or SETTINGS["POSTGRES_PORT"])
+    key = (db_name, user, password, host, port)
+
+    self._check_pid()
+    with self._lock:
+      if key not in self._engines:
+        self._engines[key] = sqlalchemy.create_engine(
+          f"postgresql+psycopg://{user}:{password}@{host}:{port}/{db_name}",
+          pool_size=int(SETTINGS["POSTGRES_POOL_SIZE"]),
+          max_overflow=int(SETTINGS["POSTGRES_MAX_OVERFLOW"]),
+          pool_timeout=float(SETTINGS["POSTGRES_POOL_TIMEOUT"]),
+          pool_pre_ping=True,
+          connect_args={"connect_timeout": int(SETTINGS["POSTGRES_CONNECT_TIMEOUT"])},
+        )
+        logger.info(f"Created PostgreSQL engine for {db_name} at {host}:{port}")
+      return self._engines[key]
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    Get the utilization of every pool of the process.
+
+    Returns:
+        dict: 'mongo' and 'postgres' lists of per-pool counters.
+    """
+    self._check_pid()
+    with self._lock:
+      mongo = [
+        {"address": f"{key[0]}:{key[1]}", "max_pool_size": key[4], **metrics.snapshot()}
+        for key, (_, metrics) in self._mongo.items()
+      ]
+      postgres = [
+        {
+          "address": f"{key[3]}:{key[4]}/{key[0]}",
+          "pool_size": engine.pool.size(),
+          "checked_out": engine.pool.checkedout(),
+          "checked_in": engine.pool.checkedin(),
+          "overflow": engine.pool.overflow(),
+        }
+        for key, engine in self._engines.items()
+      ]
+    return {"mongo": mongo, "postgres": postgres}
+
+  def close(self) -> None:
+    """Close every client and engine of the process."""
+    with self._lock:
+      if self._pid == os.getpid():
+        for client, _ in self._mongo.values():
+          client.close()
+        for engine in self._engines.values():
+          engine.dispose()
+      self._mongo = {}
+      self._engines = {}
+
+
+# Registry shared by the whole process
+registry = ClientRegistry()
+if hasattr(os, "register_at_fork"):
+  os.register_at_fork(after_in_child=registry._check_pid)
+atexit.register(registry.close)
@@ -0,0 +1,180 @@
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from pymongo import ReturnDocument
+from pymongo.collection import Collection
+
+logger = logging.getLogger("CRYPTO_BOT")
+
+# Unfinished ingestion runs, keyed by (symbol, interval). Time windows of a run are
+# written in any order, so until the run completes its stored candles may have holes.
+INGEST_PROGRESS_COLLECTION = "ingest_progress"
+
+# Catalog field holding the last candle fetched by the REST ingestion. It is
+# behind last_open_time when live candles are streamed in, and null for a
+# series only written by the stream consumer (its history was never fetched).
+INGESTED_UNTIL = "ingested_until"
+
+
+def ensure_coverage_index(catalog: Collection) -> None:
+  """Create the unique (symbol, interval) index of the coverage catalog."""
+  catalog.create_index([("symbol", 1), ("interval", 1)], unique=True)
+
+
+def refresh_coverage(
+        coll: Collection,
+        catalog: Collection,
+        symbol: str,
+        interval: str,
+        inserted: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+  """
+  Recompute the coverage catalog entry of one (symbol, interval) series.
+
+  The first/last candles are read through the (symbol, interval, open_time)
+  index. Counting the rows grows with the length of the history, so the
+  candles inserted since the last refresh are added to the stored count, and
+  the series is only counted again on a full rebuild (`inserted` is None) or
+  when its entry has no count yet.
+
+  Args:
+      coll (Collection): Collection holding the candles.
+      catalog (Collection): Coverage catalog collection.
+      symbol (str): Trading pair symbol (e.g., 'BTCUSDT').
+      interval (str): Candlestick interval (e.g., '1d').
+      inserted (int, optional): Candles inserted since the entry was last refreshed, or None to count them all.
+
+  Returns:
+      dict | None: The catalog entry, or None if the series is empty.
+  """
+  key = {"symbol": symbol, "interval": interval}
+  first = coll.find_one(key, {"_id": 0, "open_time": 1}, sort=[("open_time", 1)])
+  if first is None:
+    catalog.delete_one(key)
+    return None
+
+  last = coll.find_one(key, {"_id": 0, "open_time": 1}, sort=[("open_time", -1)])
+  entry = {
+    "symbol": symbol,
+    "interval": interval,
+    "collection": coll.name,
+    "first_open_time": first["open_time"],
+    "last_open_time": last["open_time"],
+    "updated_at": datetime.now(timezone.utc),
+  }
+  stored = None
+  if inserted is not None:
+    stored = catalog.find_one_and_update(
+      {**key, "count": {"$exists": True}},
+      {"$set": entry, "$inc": {"count": inserted}},
+      projection={"_id": 0, "count": 1},
+      return_document=ReturnDocument.AFTER
+    )
+  if stored is None:
+    entry["count"] = coll.count_documents(key)
+    catalog.update_one(key, {"$set": entry}, upsert=True)
+  else:
+    entry["count"] = stored["count"]
+  logger.info(f"Coverage {symbol} {interval}: {entry['count']} rows "
+              f"from {entry['first_open_time']} to {entry['last_open_time']}")
+  return entry
+
+
+def begin_ingest(progress: Collection, symbol: str, interval: str, start: datetime) -> None:
+  """
+  Record that candles from `start` on are being written, before the first write of a run.
+
+  The earliest start of the unfinished runs is kept, so an interrupted run is
+  resumed from where its holes may begin.
+
+  Args:
+      progress (Collection): Ingestion progress collection.
+      symbol (str): Trading pair symbol (e.g., 'BTCUSDT').
+      interval (str): Candlestick interval (e.g., '1d').
+      start (datetime): First open time fetched by the run.
+  """
+  progress.update_one(
+    {"symbol": symbol, "interval": interval},
+    {"$min": {"resume_from": start}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+    upsert=True
+  )
+
+
+def pending_ingest(progress: Collection, symbol: str, interval: str) -> Optional[datetime]:
+  """
+  Get the resume point of an unfinished ingestion run.
+
+  Returns:
+      datetime | None: Open time (UTC) from which candles may be missing, or None if the last run completed.
+  """
+  entry = progress.find_one({"symbol": symbol, "interval": interval}, {"_id": 0, "resume_from": 1})
+  if entry is None:
+    return None
+  resume_from = entry["resume_from"]
+  return resume_from.replace(tzinfo=timezone.utc) if resume_from.tzinfo is None else resume_from
+
+
+def end_ingest(progress: Collection, symbol: str, interval: str) -> None:
+  """Record that every candle fetched by the runs of a series has been written."""
+  progress.delete_one({"symbol": symbol, "interval": interval})
+
+
+def mark_ingested(catalog: Collection, symbol: str, interval: str, open_time: Optional[datetime]) -> None:
+  """
+  Record the last candle fetched by the REST ingestion in the catalog entry of a series.
+
+  Args:
+      catalog (Collection): Coverage catalog collection.
+      symbol (str): Trading pair symbol (e.g., 'BTCUSDT').
+      interval (str): Candlestick interval (e.g., '1d').
+      open_time (datetime | None): Open time of the last candle fetched, or None if no history was fetched.
+  """
+  catalog.update_one({"symbol": symbol, "interval": interval}, {"$set": {INGESTED_UNTIL: open_time}})
+
+
+def last_stored_open_time(
+        coll: Collection,
+        catalog: Collection,
+        symbol: str,
+        interval: str,
+        progress: Optional[Collection] = None
+) -> Optional[datetime]:
+  """
+  Get the open time from which the ingestion of a series resumes.
+
+  This is the resume point of an unfinished run if there is one (candles
+  after it may have holes), else the last candle fetched by the ingestion
+  (streamed candles may follow a hole), else the last candle of the coverage
+  catalog for entries written before the ingestion recorded it, else the
+  last candle of the (symbol, interval, open_time) index when the series has
+  no catalog entry yet.
+
+  Args:
+      coll (Collection): Collection holding the candles.
+      catalog (Collection): Coverage catalog collection.
+      symbol (str): Trading pair symbol (e.g., 'BTCUSDT').
+      interval (str): Candlestick interval (e.g., '1d').
+      progress (Collection, optional): Ingestion progress collection.
+
+  Returns:
+      datetime | None: Open time (UTC), or None if the history of the series was never fetched.
+  """
+  if progress is not None:
+    resume_from = pending_ingest(progress, symbol, interval)
+    if resume_from is not None:
+      return resume_from
+
+  key = {"symbol": symbol, "interval": interval}
+  entry = catalog.find_one(key, {"_id": 0, "last_open_time": 1, INGESTED_UNTIL: 1})
+  if entry is not None and INGESTED_UNTIL in entry:
+    last = entry[INGESTED_UNTIL]
+    if last is None:
+      return None
+  elif entry is None or entry.get("last_open_time") is None:
+    entry = coll.find_one(key, {"_id": 0, "open_time": 1}, sort=[("open_time", -1)])
+    if entry is None:
+      return None
+    last = entry["open_time"]
+  else:
+    last = entry["last_open_time"]
+  return last.replace(tzinfo=timezone.utc) if last.tzinfo is None else last
@@ -1,17 +1,29 @@
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any, Union
+from typing import List, Dict, Any, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+import requests
 from pymongo import UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
 from .connector.connector import connect_to_mongo
 from .config import SETTINGS
-from .historical_data import get_historical_data
+from .historical_data import iter_kline_pages, klines_to_frame
+from .coverage import (
+  INGEST_PROGRESS_COLLECTION, ensure_coverage_index, refresh_coverage, last_stored_open_time,
+  begin_ingest, pending_ingest, end_ingest, mark_ingested
+)
+from .rollups import ensure_rollup_index, invalidate_rollups, refresh_rollups
+from .rate_limiter import binance_limiter
+from .binance_session import get_binance_session, binance_latency
+from .candle_store import parse_interval_catalog, ensure_candle_collection, is_timeseries
 
 logger = logging.getLogger("CRYPTO_BOT")
-logging.basicConfig(level=logging.INFO)
 
 SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
-INTERVAL = "1d"
-MONGO_COLLECTION = "historical_daily_data"
 
 
 def to_utc_dt(ts: Union[int, float, str, datetime]) -> datetime:
@@ -73,8 +85,345 @@ def normalize_record(symbol: str, interval: str, item: Any) -> Dict[str, Any]:
   raise ValueError("Unsupported record format from get_historical_data")
 
 
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+def frame_to_documents(symbol: str, interval: str, records: pd.DataFrame) -> List[Dict[str, Any]]:
+  """
+  Convert the DataFrame returned by get_historical_data to MongoDB documents, column-wise.
+
+  Same schema as normalize_record, but timestamps and prices are converted
+  once per column; rows with a missing/invalid open time or price are dropped.
+
+  Args:
+      symbol (str): Trading pair symbol (e.g., 'BTCUSDT').
+      interval (str): Candlestick interval (e.g., '1d').
+      records (pd.DataFrame): Klines with open_time, OHLCV and close_time columns.
+
+  Returns:
+      list[dict]: Documents ready to be written, in the frame's order.
+  """
+  open_time = pd.DatetimeIndex(pd.to_datetime(records["open_time"], utc=True, errors="coerce"))
+  prices = records[PRICE_COLUMNS].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+  valid = open_time.notna() & np.isfinite(prices).all(axis=1)
+
+  skipped = len(records) - int(valid.sum())
+  if skipped:
+    logger.warning(f"Skip {skipped} malformed records for {symbol}")
+
+  open_times = open_time[valid].to_pydatetime()
+  close_time = pd.DatetimeIndex(pd.to_datetime(records["close_time"], utc=True, errors="coerce"))[valid]
+  close_times = np.where(close_time.notna(), close_time.to_pydatetime(), None)
+  opens, highs, lows, closes, volumes = (prices[valid, i].tolist() for i in range(len(PRICE_COLUMNS)))
+
+  return [
+    {
+      "symbol": symbol,
+      "interval": interval,
+      "open_time": t,
+      "open": o,
+      "high": h,
+      "low": lo,
+      "close": c,
+      "volume": v,
+      "close_time": ct,
+    }
+    for t, o, h, lo, c, v, ct in zip(open_times, opens, highs, lows, closes, volumes, close_times)
+  ]
+
+
+def _epoch_ms(dt: datetime) -> int:
+  """Milliseconds since the epoch of a datetime (naive values are UTC, as stored by MongoDB)."""
+  if dt.tzinfo is None:
+    dt = dt.replace(tzinfo=timezone.utc)
+  return int(dt.timestamp() * 1000)
+
+
+def _signature(doc: Dict[str, Any]) -> Tuple:
+  """Stored content of a candle, compared to tell changed candles from identical ones."""
+  close_time = doc.get("close_time")
+  return (
+    doc["open"], doc["high"], doc["low"], doc["close"], doc["volume"],
+    _epoch_ms(close_time) if close_time is not None else None
+  )
+
+
+def split_changes(
+        coll: Collection,
+        docs: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], int]:
+  """
+  Split candles of one series into new, changed and identical ones.
+
+  The stored candles of the time range covered by `docs` are read once,
+  through the (symbol, interval, open_time) index, into a dict of
+  open time -> content signature.
+
+  Args:
+      coll (Collection): Collection holding the candles.
+      docs (list[dict]): Candles of one (symbol, interval) series.
+
+  Returns:
+      tuple: (new candles, changed candles, number of identical candles).
+  """
+  open_times = [d["open_time"] for d in docs]
+  stored = {
+    _epoch_ms(row["open_time"]): _signature(row)
+    for row in coll.find(
+      {
+        "symbol": docs[0]["symbol"],
+        "interval": docs[0]["interval"],
+        "open_time": {"$gte": min(open_times), "$lte": max(open_times)}
+      },
+      {"_id": 0, "open_time": 1, "open": 1, "high": 1, "low": 1, "close": 1, "volume": 1, "close_time": 1}
+    )
+  }
+
+  new: List[Dict[str, Any]] = []
+  changed: List[Dict[str, Any]] = []
+  identical = 0
+  for doc in docs:
+    signature = stored.get(_epoch_ms(doc["open_time"]))
+    if signature is None:
+      new.append(doc)
+    elif signature != _signature(doc):
+      changed.append(doc)
+    else:
+      identical += 1
+  return new, changed, identical
+
+
+def _upsert_ops(docs: List[Dict[str, Any]]) -> List[UpdateOne]:
+  return [
+    UpdateOne(
+      {"symbol": d["symbol"], "interval": d["interval"], "open_time": d["open_time"]},
+      {"$set": d},
+      upsert=True,
+    )
+    for d in docs
+  ]
+
+
+def insert_new_candles(coll: Collection, docs: List[Dict[str, Any]]) -> int:
+  """
+  Insert candles that were not stored, unordered.
+
+  Candles stored by another writer since they were classified are upserted instead.
+
+  Args:
+      coll (Collection): Collection holding the candles.
+      docs (list[dict]): New candles.
+
+  Returns:
+      int: Number of candles inserted, without those already stored by another writer.
+  """
+  try:
+    # insert_many adds an _id to each document; the callers' dicts are left untouched
+    coll.insert_many([dict(d) for d in docs], ordered=False)
+  except BulkWriteError as e:
+    errors = e.details.get("writeErrors", [])
+    if any(error.get("code") != 11000 for error in errors):
+      raise
+    coll.bulk_write(_upsert_ops([docs[error["index"]] for error in errors]), ordered=False)
+    return len(docs) - len(errors)
+  return len(docs)
+
+
+def replace_changed_candles(coll: Collection, docs: List[Dict[str, Any]]) -> None:
+  """
+  Write candles whose stored content changed.
+
+  Regular collections are upserted. Time-series collections have no unique
+  index to upsert on, so the stored candles are deleted and inserted again.
+
+  Args:
+      coll (Collection): Collection holding the candles.
+      docs (list[dict]): Changed candles of one (symbol, interval) series.
+  """
+  if not is_timeseries(coll):
+    coll.bulk_write(_upsert_ops(docs), ordered=False)
+    return
+  coll.delete_many({
+    "symbol": docs[0]["symbol"],
+    "interval": docs[0]["interval"],
+    "open_time": {"$in": [d["open_time"] for d in docs]}
+  })
+  coll.insert_many([dict(d) for d in docs], ordered=False)
+
+
+def refresh_series(
+        coll: Collection,
+        catalog: Collection,
+        rollups: Collection,
+        sym: str,
+        interval: str,
+        incremental: bool,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        inserted: Optional[int] = None
+) -> None:
+  """
+  Refresh the catalog entry and rollups of a series once candles have been written.
+
+  The rollups must have been invalidated (see rollups.invalidate_rollups)
+  before the first write. When they were stale, earlier writes were never
+  refreshed, so the catalog count is recomputed rather than incremented.
+
+  Args:
+      coll (Collection): Collection holding the candles.
+      catalog (Collection): Coverage catalog collection.
+      rollups (Collection): Rollup collection.
+      sym (str): Trading pair symbol (e.g., 'BTCUSDT').
+      interval (str): Candlestick interval (e.g., '1d').
+      incremental (bool): The rollups were up to date before the writes, so only the blocks of [start, end] are rebuilt.
+      start (datetime, optional): First open_time written.
+      end (datetime, optional): Last open_time written.
+      inserted (int, optional): Candles inserted by the writes, or None to count the whole series.
+  """
+  refresh_coverage(coll, catalog, sym, interval, inserted if incremental else None)
+  if incremental and start is not None and end is not None:
+    refresh_rollups(coll, rollups, catalog, sym, interval, start=start, end=end)
+  else:
+    refresh_rollups(coll, rollups, catalog, sym, interval)
+
+
+def ingest_symbol(
+        coll: Collection,
+        catalog: Collection,
+        rollups: Collection,
+        progress: Collection,
+        sym: str,
+        interval: str,
+        start: datetime,
+        end: datetime,
+        session: requests.Session
+) -> Dict[str, Any]:
+  """
+  Fetch the history of one series and upsert it page by page, then refresh its catalog entry and rollups.
+
+  Only the tail missing since the last stored candle is fetched. That candle
+  is fetched again, as it was possibly still open when it was stored.
+  Fetched candles are compared with the stored ones: new candles are
+  inserted, changed candles are updated and identical candles are not sent.
+
+  Time windows are written in the order their pages arrive, so a run is
+  recorded in `progress` before its first write and cleared once every page
+  is written: an interrupted run is resumed from its start, not from the
+  newest candle it managed to store.
+
+  Args:
+      coll (Collection): Collection holding the candles.
+      catalog (Collection): Coverage catalog collection.
+      rollups (Collection): Rollup collection.
+      progress (Collection): Ingestion progress collection (see coverage.begin_ingest).
+      sym (str): Trading pair symbol (e.g., 'BTCUSDT').
+      interval (str): Candlestick interval (e.g., '1d').
+      start (datetime): First open time to fetch when the series is empty.
+      end (datetime): Last open time to fetch.
+      session (requests.Session): Keep-alive session shared by the ingestion threads.
+
+  Returns:
+      dict: Run report with the count and write time of new, changed and identical candles.
+  """
+  report = {
+    "symbol": sym,
+    "interval": interval,
+    "new": 0,
+    "changed": 0,
+    "identical": 0,
+    "diff_seconds": 0.0,
+    "insert_seconds": 0.0,
+    "update_seconds": 0.0,
+  }
+  last_open_time = last_stored_open_time(coll, catalog, sym, interval, progress)
+  if last_open_time is not None and last_open_time > start:
+    start = last_open_time
+  # Candles stored by an interrupted run are not in the catalog yet
+  resumed = pending_ingest(progress, sym, interval) is not None
+
+  logger.info(f"Fetching {interval} history for {sym} from {start.date()} to {end.date()}")
+  pages = iter_kline_pages(
+    symbol=sym,
+    interval=interval,
+    start_time=start,
+    end_time=end,
+    limiter=binance_limiter,
+    session=session,
+    shards=int(SETTINGS["INGEST_SHARDS"]),
+    max_pending=int(SETTINGS["INGEST_QUEUE_PAGES"])
+  )
+
+  # Each page is normalized, diffed and written before the next one is taken,
+  # while the following pages are fetched in the background
+  fetched = 0
+  fetched_to = None
+  incremental = None
+  inserted = 0
+  written_from = written_to = None
+  for page in pages:
+    fetched += len(page)
+    docs = frame_to_documents(sym, interval, klines_to_frame(page))
+    if not docs:
+      continue
+    fetched_to = docs[-1]["open_time"] if fetched_to is None else max(fetched_to, docs[-1]["open_time"])
+
+    t0 = time.perf_counter()
+    new, changed, identical = split_changes(coll, docs)
+    report["new"] += len(new)
+    report["changed"] += len(changed)
+    report["identical"] += identical
+    report["diff_seconds"] += time.perf_counter() - t0
+
+    written = new + changed
+    if not written:
+      continue
+    if incremental is None:
+      # Rollups are marked stale until they have been refreshed for the new candles
+      incremental = invalidate_rollups(catalog, sym, interval)
+      begin_ingest(progress, sym, interval, start)
+
+    if new:
+      t0 = time.perf_counter()
+      inserted += insert_new_candles(coll, new)
+      report["insert_seconds"] += time.perf_counter() - t0
+    if changed:
+      t0 = time.perf_counter()
+      replace_changed_candles(coll, changed)
+      report["update_seconds"] += time.perf_counter() - t0
+
+    open_times = [d["open_time"] for d in written]
+    written_from = min(open_times) if written_from is None else min(written_from, min(open_times))
+    written_to = max(open_times) if written_to is None else max(written_to, max(open_times))
+
+  if not fetched:
+    logger.warning(f"No data returned for {sym} {interval}")
+    return report
+
+  if incremental is None and resumed:
+    # Nothing left to write, but the catalog and rollups miss the interrupted run's candles
+    incremental = invalidate_rollups(catalog, sym, interval)
+  if incremental is not None:
+    refresh_series(coll, catalog, rollups, sym, interval, incremental, written_from, written_to, inserted)
+    end_ingest(progress, sym, interval)
+  if fetched_to is not None:
+    mark_ingested(catalog, sym, interval, fetched_to)
+
+  logger.info(
+    f"{sym} {interval}: new {report['new']} ({report['insert_seconds']:.3f}s), "
+    f"changed {report['changed']} ({report['update_seconds']:.3f}s), "
+    f"identical {report['identical']} (diff {report['diff_seconds']:.3f}s)"
+  )
+  return report
+
+
 def upsert_daily_history() -> None:
-  """Fetch last 2 years of daily data and upsert into MongoDB."""
+  """
+  Fetch the candles missing from MongoDB and upsert them, for every symbol and configured interval.
+
+  Intervals come from INGEST_INTERVALS (default: '1d' only), each stored in
+  its own collection (see candle_store.collection_name), regular or
+  time-series depending on MONGO_STORAGE_MODE.
+  """
   db_name = SETTINGS["MONGO_DB"]
   host = SETTINGS["MONGO_HOST"]
   port = int(SETTINGS["MONGO_PORT"])
@@ -84,44 +433,56 @@ def upsert_daily_history() -> None:
 
   client = connect_to_mongo(db_name=db_name, host=host, port=port, auth=auth, user=user, password=password)
   db = client[db_name]
-  coll = db[MONGO_COLLECTION]
-  # We make a unique index on (symbol, interval, open_time), so upserts work correctly and avoid duplicates
-  coll.create_index([("symbol", 1), ("interval", 1), ("open_time", 1)], unique=True)
-
-  end = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-  start = end - timedelta(days=730)
+  intervals = parse_interval_catalog(SETTINGS["INGEST_INTERVALS"])
+  # One collection per interval, with its indexes
+  collections = {interval: ensure_candle_collection(db, interval) for interval in intervals}
+  # Catalog of what is stored per (symbol, interval), read by /api/symbols, /api/intervals and /api/coverage
+  catalog = db[SETTINGS["MONGO_COLLECTION_COVERAGE"]]
+  ensure_coverage_index(catalog)
+  # Monthly/daily partial aggregates answering /api/stats without full scans
+  rollups = db[SETTINGS["MONGO_COLLECTION_ROLLUPS"]]
+  ensure_rollup_index(rollups)
+  # Unfinished runs, resumed from their start instead of past their holes
+  progress = db[INGEST_PROGRESS_COLLECTION]
 
-  for sym in SYMBOLS:
-    logger.info(f"Fetching {INTERVAL} history for {sym} from {start.date()} to {end.date()}")
-    records = get_historical_data(symbol=sym, interval=INTERVAL, start_time=start, end_time=end)
-
-    if records.empty:
-      logger.warning(f"No data returned for {sym}")
-      continue
+  # Up to the candle open now, which is still open and will be fetched again next run
+  end = datetime.now(timezone.utc)
 
-    docs: List[Dict[str, Any]] = []
-    # On parcourt les enregistrements du dataframe et on les normalise
-    for _, item in records.iterrows():
+  # Series are fetched concurrently; the shared limiter keeps the total request weight within budget
+  series = [(sym, interval) for interval in intervals for sym in SYMBOLS]
+  workers = max(1, min(int(SETTINGS["INGEST_WORKERS"]), len(series)))
+  session = get_binance_session()
+  with ThreadPoolExecutor(max_workers=workers) as pool:
+    futures = {
+      pool.submit(
+        ingest_symbol,
+        collections[interval],
+        catalog,
+        rollups,
+        progress,
+        sym,
+        interval,
+        end - timedelta(days=intervals[interval]),
+        end,
+        session
+      ): f"{sym} {interval}"
+      for sym, interval in series
+    }
+    reports = []
+    for future in as_completed(futures):
       try:
-        docs.append(normalize_record(sym, INTERVAL, item.to_dict()))
+        reports.append(future.result())
       except Exception as e:
-        logger.warning(f"Skip malformed record for {sym}: {e}")
-
-    if not docs:
-      logger.warning(f"No valid documents for {sym}")
-      continue
+        logger.error(f"Ingestion failed for {futures[future]}: {e}")
 
-    ops = [
-      UpdateOne(
-        {"symbol": d["symbol"], "interval": d["interval"], "open_time": d["open_time"]},
-        {"$set": d},
-        upsert=True,
-      )
-      for d in docs
-    ]
-    result = coll.bulk_write(ops, ordered=False)
-    upserts = getattr(result, "upserted_count", 0)
-    mods = getattr(result, "modified_count", 0)
-    logger.info(f"{sym}: upserted {upserts}, modified {mods}, total {len(docs)}")
-
-  client.close()
+  logger.info(
+    f"Ingestion run: new {sum(r['new'] for r in reports)} "
+    f"({sum(r['insert_seconds'] for r in reports):.3f}s), "
+    f"changed {sum(r['changed'] for r in reports)} ({sum(r['update_seconds'] for r in reports):.3f}s), "
+    f"identical {sum(r['identical'] for r in reports)} ({sum(r['diff_seconds'] for r in reports):.3f}s)"
+  )
+  latency = binance_latency.snapshot()
+  logger.info(
+    f"Binance calls: {latency['count']} ({latency['errors']} errors), "
+    f"p50 {latency['p50_ms']:.0f} ms, p95 {latency['p95_ms']:.0f} ms, max {latency['max_ms']:.0f} ms"
+  )
@@ -1,57 +1,248 @@
+import queue
+import threading
 import requests
 import pandas as pd
-import time
 import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
 
 from .config import SETTINGS
+from .intervals import interval_to_ms
+from .rate_limiter import WeightRateLimiter, binance_limiter, klines_weight
+from .binance_session import get_binance_session
 
+# Consecutive 429/418 responses tolerated before giving up
+MAX_THROTTLED_RETRIES = 5
 
-def get_historical_data(symbol: str, interval: str, start_time: datetime, end_time: datetime) -> pd.DataFrame:
+
+KLINE_COLUMNS = [
+  'open_time', 'open', 'high', 'low', 'close', 'volume',
+  'close_time', 'quote_asset_volume', 'number_of_trades',
+  'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
+]
+
+# End-of-window marker of the page queue
+_DONE = object()
+
+
+def _iter_klines(
+        http: requests.Session,
+        limiter: WeightRateLimiter,
+        symbol: str,
+        interval: str,
+        start_timestamp: int,
+        end_timestamp: int
+) -> Iterator[List[list]]:
+  """
+  Yield the raw klines of [start_timestamp, end_timestamp] (ms, inclusive), one page at a time.
+
+  Each page waits for its request weight on the rate limiter.
+  """
+  url = SETTINGS["URL_HISTORIQUE"]
+  limit = 1000
+  throttled = 0
+  while start_timestamp <= end_timestamp:
+    params = {
+      'symbol': symbol,
+      'interval': interval,
+      'startTime': start_timestamp,
+      'endTime': end_timestamp,
+      'limit': limit
+    }
+    limiter.acquire(klines_weight(limit))
+    response = http.get(url, params=params)
+    limiter.observe(response.headers)
+    if response.status_code in (418, 429):
+      throttled += 1
+      if throttled > MAX_THROTTLED_RETRIES:
+        response.raise_for_status()
+      retry_after = response.headers.get("Retry-After")
+      limiter.backoff(float(retry_after) if retry_after else None)
+      continue
+    throttled = 0
+    response.raise_for_status()
+    data = response.json()
+
+    if not data:
+      break
+
+    yield data
+    start_timestamp = data[-1][0] + 1  # Move to the next timestamp
+    if len(data) < limit:
+      break  # Short page: the range is exhausted, no need for another request
+
+
+def split_windows(start_timestamp: int, end_timestamp: int, interval: str, shards: int) -> List[Tuple[int, int]]:
+  """
+  Split [start_timestamp, end_timestamp] (ms, inclusive) into contiguous windows of whole pages.
+
+  Each window spans a multiple of 1000 candles, so no page is shared between
+  two windows and each window can be fetched independently.
+
+  Args:
+      start_timestamp (int): Range start, in ms.
+      end_timestamp (int): Range end, in ms (inclusive).
+      interval (str): Candlestick interval (e.g., '1m').
+      shards (int): Maximum number of windows.
+
+  Returns:
+      list[tuple[int, int]]: (start, end) of each window, in ms, in order.
+  """
+  page_ms = interval_to_ms(interval) * 1000
+  pages = max(1, -(-(end_timestamp - start_timestamp + 1) // page_ms))
+  window_ms = -(-pages // max(1, min(shards, pages))) * page_ms
+
+  windows = []
+  lo = start_timestamp
+  while lo <= end_timestamp:
+    hi = min(lo + window_ms - 1, end_timestamp)
+    windows.append((lo, hi))
+    lo = hi + 1
+  return windows
+
+
+def get_historical_data(
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime,
+        limiter: Optional[WeightRateLimiter] = None,
+        session: Optional[requests.Session] = None,
+        shards: int = 1
+) -> pd.DataFrame:
   """
   Fetch historical candlestick data from Binance API.
 
+  Each page waits for its request weight on the shared rate limiter instead
+  of sleeping a fixed time, so concurrent callers share the budget and a
+  single caller runs as fast as the budget allows.
+
+  With `shards` > 1, the range is split into independent time windows that are
+  fetched concurrently, then merged in order and deduplicated on open time, so a
+  deep backfill is not bound to one page round-trip at a time.
+
   Args:
       symbol (str): Trading pair symbol (e.g., 'BTCUSDT').
       interval (str): Candlestick interval (e.g., '5m', '1h').
       start_time (datetime): Start time in 'YYYY-MM-DD HH:MM:SS' format.
       end_time (datetime): End time in 'YYYY-MM-DD HH:MM:SS' format.
+      limiter (WeightRateLimiter, optional): Rate limiter (default: the process-wide one).
+      session (requests.Session, optional): HTTP session (default: the process-wide keep-alive one).
+      shards (int): Maximum number of time windows fetched concurrently.
 
   Returns:
       pd.DataFrame: DataFrame containing historical candlestick data.
   """
-  url = SETTINGS["URL_HISTORIQUE"]
+  limiter = limiter or binance_limiter
+  http = session or get_binance_session()
   # start_timestamp = int(datetime.strptime(start_time, '%Y-%m-%d %H:%M:%S').timestamp() * 1000)
   # end_timestamp = int(datetime.strptime(end_time, '%Y-%m-%d %H:%M:%S').timestamp() * 1000)
   start_timestamp = int(start_time.timestamp() * 1000)
   end_timestamp = int(end_time.timestamp() * 1000)
 
-  all_data = []
-  limit = 1000
-  while start_timestamp < end_timestamp:
-    params = {
-      'symbol': symbol,
-      'interval': interval,
-      'startTime': start_timestamp,
-      'endTime': end_timestamp,
-      'limit': limit
-    }
-    response = requests.get(url, params=params)
-    data = response.json()
+  windows = split_windows(start_timestamp, end_timestamp, interval, shards) if shards > 1 else []
+  if len(windows) > 1:
+    with ThreadPoolExecutor(max_workers=len(windows)) as pool:
+      chunks = pool.map(
+        lambda window: [row for page in _iter_klines(http, limiter, symbol, interval, *window) for row in page],
+        windows
+      )
+      merged = {row[0]: row for chunk in chunks for row in chunk}
+    all_data = [merged[open_time] for open_time in sorted(merged)]
+  else:
+    all_data = [
+      row for page in _iter_klines(http, limiter, symbol, interval, start_timestamp, end_timestamp) for row in page
+    ]
 
-    if not data:
-      break
+  return klines_to_frame(all_data)
 
-    all_data.extend(data)
-    start_timestamp = data[-1][0] + 1  # Move to the next timestamp
 
-    time.sleep(0.5)  # To respect API rate limits
+def iter_kline_pages(
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime,
+        limiter: Optional[WeightRateLimiter] = None,
+        session: Optional[requests.Session] = None,
+        shards: int = 1,
+        max_pending: int = 4
+) -> Iterator[List[list]]:
+  """
+  Yield pages of raw klines while the next ones are being fetched.
+
+  Pages are fetched by background threads (one per time window, see
+  `get_historical_data`) into a queue of at most `max_pending` pages: when
+  the consumer is slower than the API, the fetchers block, so memory is
+  bounded by the page size and not by the length of the history. Pages of
+  different windows may arrive interleaved; each page is in time order.
 
-  # Convert to DataFrame
-  df = pd.DataFrame(all_data, columns=[
-    'open_time', 'open', 'high', 'low', 'close', 'volume',
-    'close_time', 'quote_asset_volume', 'number_of_trades',
-    'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
-  ])
+  Args:
+      symbol (str): Trading pair symbol (e.g., 'BTCUSDT').
+      interval (str): Candlestick interval (e.g., '5m', '1h').
+      start_time (datetime): Start time.
+      end_time (datetime): End time (inclusive).
+      limiter (WeightRateLimiter, optional): Rate limiter (default: the process-wide one).
+      session (requests.Session, optional): HTTP session (default: the process-wide keep-alive one).
+      shards (int): Maximum number of time windows fetched concurrently.
+      max_pending (int): Maximum number of fetched pages waiting for the consumer.
+
+  Yields:
+      list[list]: Raw Binance klines of one page (up to 1000 rows).
+  """
+  limiter = limiter or binance_limiter
+  http = session or get_binance_session()
+  start_timestamp = int(start_time.timestamp() * 1000)
+  end_timestamp = int(end_time.timestamp() * 1000)
+  if start_timestamp > end_timestamp:
+    return
+
+  windows = split_windows(start_timestamp, end_timestamp, interval, max(1, shards))
+  pages: queue.Queue = queue.Queue(maxsize=max(1, max_pending))
+  stop = threading.Event()
+
+  def fetch(window: Tuple[int, int]) -> None:
+    try:
+      for page in _iter_klines(http, limiter, symbol, interval, *window):
+        if stop.is_set():
+          break
+        pages.put(page)
+    except Exception as e:
+      pages.put(e)
+    finally:
+      pages.put(_DONE)
+
+  remaining = len(windows)
+  with ThreadPoolExecutor(max_workers=len(windows)) as pool:
+    for window in windows:
+      pool.submit(fetch, window)
+    try:
+      while remaining:
+        item = pages.get()
+        if item is _DONE:
+          remaining -= 1
+        elif isinstance(item, Exception):
+          raise item
+        else:
+          yield item
+    finally:
+      # Stop the fetchers and unblock the ones waiting on a full queue
+      stop.set()
+      while remaining:
+        if pages.get() is _DONE:
+          remaining -= 1
+
+
+def klines_to_frame(rows: List[list]) -> pd.DataFrame:
+  """
+  Convert raw Binance klines to a typed DataFrame.
+
+  Args:
+      rows (list[list]): Raw klines, as returned by GET /api/v3/klines.
+
+  Returns:
+      pd.DataFrame: DataFrame containing historical candlestick data.
+  """
+  df = pd.DataFrame(rows, columns=KLINE_COLUMNS)
 
   # Convert timestamps to datetime
   df['open_time'] = pd.to_datetime(df['open_time'], unit='ms')
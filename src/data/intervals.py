@@ -0,0 +1,65 @@
+import re
+
+# Binance kline interval units, in milliseconds ('1M' is approximated as 30 days)
+_UNIT_MS = {
+  "s": 1000,
+  "m": 60 * 1000,
+  "h": 60 * 60 * 1000,
+  "d": 24 * 60 * 60 * 1000,
+  "w": 7 * 24 * 60 * 60 * 1000,
+  "M": 30 * 24 * 60 * 60 * 1000,
+}
+
+HOUR_MS = _UNIT_MS["h"]
+DAY_MS = _UNIT_MS["d"]
+
+_INTERVAL_RE = re.compile(r"^(\d+)([smhdwM])$")
+
+
+def interval_to_ms(interval: str) -> int:
+  """
+  Convert a Binance interval string to its duration in milliseconds.
+
+  Args:
+      interval (str): Candlestick interval (e.g., '1m', '4h', '1d').
+
+  Returns:
+      int: Duration of one candle in milliseconds.
+  """
+  match = _INTERVAL_RE.match(interval)
+  if not match:
+    raise ValueError(f"Unsupported interval: {interval}")
+  return int(match.group(1)) * _UNIT_MS[match.group(2)]
+
+
+# MongoDB $dateTrunc units of the Binance interval units
+_DATE_TRUNC_UNITS = {
+  "s": "second",
+  "m": "minute",
+  "h": "hour",
+  "d": "day",
+  "w": "week",
+  "M": "month",
+}
+
+
+def interval_to_date_trunc(interval: str) -> dict:
+  """
+  Build the $dateTrunc arguments grouping candles into buckets of an interval.
+
+  Args:
+      interval (str): Target interval (e.g., '4h', '1w').
+
+  Returns:
+      dict: unit, binSize, timezone and startOfWeek arguments of $dateTrunc.
+  """
+  match = _INTERVAL_RE.match(interval)
+  if not match:
+    raise ValueError(f"Unsupported interval: {interval}")
+  return {
+    "unit": _DATE_TRUNC_UNITS[match.group(2)],
+    "binSize": int(match.group(1)),
+    "timezone": "UTC",
+    # Binance weekly candles open on Monday
+    "startOfWeek": "monday",
+  }
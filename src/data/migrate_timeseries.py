@@ -0,0 +1,190 @@
+import argparse
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from pymongo.collection import Collection
+
+from .config import SETTINGS
+from .connector.connector import connect_to_mongo
+from .candle_store import collection_name, ensure_candle_collection, parse_interval_catalog
+from .fetch_historical_daily import split_changes, insert_new_candles, replace_changed_candles
+
+logger = logging.getLogger("CRYPTO_BOT")
+
+# Progress of each migration, keyed by target collection, so an interrupted copy resumes where it stopped
+MIGRATIONS_COLLECTION = "storage_migrations"
+
+
+def copy_batches(
+        source: Collection,
+        target: Collection,
+        progress: Collection,
+        batch_size: int = 5000,
+        pause: float = 0.0
+) -> int:
+  """
+  Copy every candle of a regular collection to a time-series collection, in _id order.
+
+  Candles keep their _id. The last copied _id is saved after each batch; on
+  restart, candles copied after it (a batch interrupted midway) are deleted
+  from the target before copying resumes, as the target has no unique index
+  to reject them a second time. A copy interrupted before its first batch
+  was saved restarts on an emptied target.
+
+  Args:
+      source (Collection): Regular candle collection.
+      target (Collection): Time-series candle collection.
+      progress (Collection): Migration progress collection.
+      batch_size (int): Candles read and inserted per batch.
+      pause (float): Seconds to wait between batches, leaving I/O to the live workload.
+
+  Returns:
+      int: Number of candles copied by this call.
+  """
+  state = progress.find_one({"_id": target.name}) or {}
+  if state.get("completed_at") is not None:
+    return 0
+  last_id = state.get("last_id")
+  if last_id is not None:
+    target.delete_many({"_id": {"$gt": last_id}})
+  else:
+    if state:
+      # Started, but the first batch may have been inserted before it was saved
+      target.delete_many({})
+    progress.update_one(
+      {"_id": target.name},
+      {"$set": {"source": source.name, "started_at": datetime.now(timezone.utc), "copied": 0}},
+      upsert=True
+    )
+
+  copied = 0
+  while True:
+    query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+    batch = list(source.find(query).sort("_id", 1).limit(batch_size))
+    if not batch:
+      break
+    target.insert_many(batch, ordered=False)
+    last_id = batch[-1]["_id"]
+    copied += len(batch)
+    progress.update_one({"_id": target.name}, {"$set": {"last_id": last_id}, "$inc": {"copied": len(batch)}})
+    logger.info(f"{source.name} -> {target.name}: {copied} candles copied")
+    if pause:
+      time.sleep(pause)
+
+  progress.update_one({"_id": target.name}, {"$set": {"completed_at": datetime.now(timezone.utc)}})
+  return copied
+
+
+def sync_tail(source: Collection, target: Collection, symbol: str, interval: str) -> Dict[str, int]:
+  """
+  Copy to the target the candles of a series written to the source since it was copied.
+
+  Ingestion only appends candles and rewrites the last stored one, so the
+  candles from the target's last open time onwards are compared, and only
+  new or changed ones are written.
+
+  Args:
+      source (Collection): Regular candle collection.
+      target (Collection): Time-series candle collection.
+      symbol (str): Trading pair symbol (e.g., 'BTCUSDT').
+      interval (str): Candlestick interval (e.g., '1d').
+
+  Returns:
+      dict: Number of new and changed candles written.
+  """
+  key = {"symbol": symbol, "interval": interval}
+  last = target.find_one(key, {"_id": 0, "open_time": 1}, sort=[("open_time", -1)])
+  query: Dict[str, Any] = dict(key)
+  if last is not None:
+    query["open_time"] = {"$gte": last["open_time"]}
+  docs: List[Dict[str, Any]] = list(source.find(query, {"_id": 0}).sort("open_time", 1))
+  if not docs:
+    return {"new": 0, "changed": 0}
+
+  new, changed, _ = split_changes(target, docs)
+  if new:
+    insert_new_candles(target, new)
+  if changed:
+    replace_changed_candles(target, changed)
+  return {"new": len(new), "changed": len(changed)}
+
+
+def migrate_interval(
+        db,
+        interval: str,
+        batch_size: int = 5000,
+        pause: float = 0.0
+) -> List[Dict[str, Any]]:
+  """
+  Migrate the candles of one interval to time-series storage.
+
+  The time-series collection is filled next to the regular one, which keeps
+  serving reads and ingestion writes: candles are copied in batches, then the
+  series tails written meanwhile are synchronized. Running it again after
+  switching MONGO_STORAGE_MODE to 'timeseries' catches up the last writes
+  made to the regular collection.
+
+  Args:
+      db (Database): MongoDB database.
+      interval (str): Candlestick interval (e.g., '1d').
+      batch_size (int): Candles read and inserted per batch.
+      pause (float): Seconds to wait between batches.
+
+  Returns:
+      list[dict]: Per-symbol report, with the candle counts of both collections.
+  """
+  source = db[collection_name(interval, "standard")]
+  target = ensure_candle_collection(db, interval, "timeseries")
+  progress = db[MIGRATIONS_COLLECTION]
+
+  t0 = time.perf_counter()
+  copied = copy_batches(source, target, progress, batch_size=batch_size, pause=pause)
+  logger.info(f"{source.name} -> {target.name}: {copied} candles copied in {time.perf_counter() - t0:.1f}s")
+
+  reports = []
+  for symbol in sorted(source.distinct("symbol", {"interval": interval})):
+    synced = sync_tail(source, target, symbol, interval)
+    key = {"symbol": symbol, "interval": interval}
+    report = {
+      "symbol": symbol,
+      "interval": interval,
+      **synced,
+      "source_count": source.count_documents(key),
+      "target_count": target.count_documents(key),
+    }
+    if report["source_count"] != report["target_count"]:
+      logger.warning(f"{symbol} {interval}: {report['source_count']} candles in {source.name}, "
+                     f"{report['target_count']} in {target.name}")
+    reports.append(report)
+  return reports
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+  """Command line entry point of the migration."""
+  logging.basicConfig(level=logging.INFO)
+  parser = argparse.ArgumentParser(description="Migrate candle collections to MongoDB time-series collections.")
+  parser.add_argument("--interval", action="append",
+                      help="Interval to migrate, repeatable (default: INGEST_INTERVALS)")
+  parser.add_argument("--batch-size", type=int, default=5000)
+  parser.add_argument("--pause", type=float, default=0.05, help="Seconds between batches")
+  args = parser.parse_args(argv)
+
+  user = SETTINGS.get("MONGO_USER", "")
+  client = connect_to_mongo(
+    db_name=SETTINGS["MONGO_DB"],
+    host=SETTINGS["MONGO_HOST"],
+    port=int(SETTINGS["MONGO_PORT"]),
+    auth=bool(user),
+    user=user,
+    password=SETTINGS.get("MONGO_PASSWORD", "")
+  )
+  db = client[SETTINGS["MONGO_DB"]]
+  intervals = args.interval or list(parse_interval_catalog(SETTINGS["INGEST_INTERVALS"]))
+  for interval in intervals:
+    for report in migrate_interval(db, interval, batch_size=args.batch_size, pause=args.pause):
+      logger.info(
+        f"{report['symbol']} {interval}: {report['target_count']}/{report['source_count']} candles "
+        f"(tail: {report['new']} new, {report['changed']} changed)"
+      )
@@ -0,0 +1,132 @@
+import logging
+import random
+import threading
+import time
+from typing import Callable, Mapping, Optional
+
+logger = logging.getLogger("CRYPTO_BOT")
+
+# Binance REQUEST_WEIGHT limit per IP and the header reporting what the current minute used
+BINANCE_WEIGHT_PER_MINUTE = 6000
+USED_WEIGHT_HEADER = "X-MBX-USED-WEIGHT-1M"
+
+# Shortest wait of acquire(), so a clock coarser than the missing weight still moves forward
+MIN_WAIT = 1e-3
+
+
+def klines_weight(limit: int) -> int:
+  """
+  Request weight of a GET /api/v3/klines call.
+
+  Args:
+      limit (int): Number of candles requested.
+
+  Returns:
+      int: Weight counted by Binance for the request.
+  """
+  if limit < 100:
+    return 1
+  if limit < 500:
+    return 2
+  if limit <= 1000:
+    return 5
+  return 10
+
+
+class WeightRateLimiter:
+  """
+  Token bucket shared by every thread calling the Binance REST API.
+
+  The bucket holds request weight and refills continuously at the per-minute
+  budget. The used weight reported by Binance after each response is
+  authoritative: when other clients on the same IP spend weight, the bucket
+  is drained to match, and a 429/418 blocks every caller for Retry-After.
+  """
+
+  def __init__(
+          self,
+          weight_per_minute: int = BINANCE_WEIGHT_PER_MINUTE,
+          headroom: float = 0.8,
+          clock: Callable[[], float] = time.monotonic,
+          sleep: Callable[[float], None] = time.sleep
+  ):
+    """
+    Initialize the limiter.
+
+    Args:
+        weight_per_minute (int): Weight budget per minute granted by the server.
+        headroom (float): Fraction of the budget this process may use.
+        clock (callable): Monotonic clock, in seconds.
+        sleep (callable): Function used to wait, in seconds.
+    """
+    self.capacity = weight_per_minute * headroom
+    self.rate = self.capacity / 60.0
+    self._clock = clock
+    self._sleep = sleep
+    self._tokens = self.capacity
+    self._updated = clock()
+    self._blocked_until = 0.0
+    self._lock = threading.Lock()
+    self.waited = 0.0
+    self.throttled = 0
+
+  def _refill(self, now: float) -> None:
+    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+    self._updated = now
+
+  def acquire(self, weight: int = 1) -> None:
+    """
+    Block until `weight` can be spent.
+
+    Args:
+        weight (int): Weight of the request about to be sent.
+    """
+    while True:
+      with self._lock:
+        now = self._clock()
+        self._refill(now)
+        if now < self._blocked_until:
+          wait = self._blocked_until - now
+        elif self._tokens >= weight:
+          self._tokens -= weight
+          return
+        else:
+          wait = (weight - self._tokens) / self.rate
+        wait = max(wait, MIN_WAIT)
+        self.waited += wait
+      self._sleep(wait)
+
+  def observe(self, headers: Mapping[str, str]) -> None:
+    """
+    Align the bucket with the used weight reported by the server.
+
+    Args:
+        headers (Mapping): Response headers of a Binance REST call.
+    """
+    used = headers.get(USED_WEIGHT_HEADER)
+    if used is None:
+      return
+    with self._lock:
+      self._refill(self._clock())
+      self._tokens = min(self._tokens, self.capacity - int(used))
+
+  def backoff(self, retry_after: Optional[float], jitter: float = 1.0) -> None:
+    """
+    Stop every caller after the server rejected a request (HTTP 429 or 418).
+
+    Args:
+        retry_after (float, optional): Seconds to wait, from the Retry-After header.
+        jitter (float): Maximum random delay added, so callers do not resume all at once.
+    """
+    delay = (retry_after if retry_after is not None else 60.0) + random.uniform(0, jitter)
+    with self._lock:
+      now = self._clock()
+      self._blocked_until = max(self._blocked_until, now + delay)
+      self._tokens = 0.0
+      self._updated = now
+      self.throttled += 1
+    logger.warning(f"Binance rate limit hit, pausing requests for {delay:.1f}s")
+
+
+# Limiter shared by every Binance REST call of the process
+binance_limiter = WeightRateLimiter()
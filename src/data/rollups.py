@@ -0,0 +1,282 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo.collection import Collection
+
+from .intervals import interval_to_ms, DAY_MS
+
+logger = logging.getLogger("CRYPTO_BOT")
+
+# Catalog field telling readers the rollups of a series match its last stored candle
+ROLLUPS_MARKER = "rollups_last_open_time"
+
+_ONE_MS = timedelta(milliseconds=1)
+
+# Partial aggregates kept per block; they combine by sum/min/max into any larger range
+_GROUP_FIELDS = {
+  "count": {"$sum": 1},
+  "sum_close": {"$sum": "$close"},
+  "min_low": {"$min": "$low"},
+  "max_high": {"$max": "$high"},
+  "total_volume": {"$sum": "$volume"},
+  "first_open_time": {"$min": "$open_time"},
+  "last_open_time": {"$max": "$open_time"},
+}
+
+
+def _utc(dt: datetime) -> datetime:
+  """Make a datetime timezone aware (naive values are UTC, as stored by MongoDB)."""
+  return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def rollup_levels(interval: str) -> List[str]:
+  """
+  Get the block levels kept for an interval, coarsest first.
+
+  Daily candles only get monthly blocks; intraday candles also get daily
+  blocks, so the raw edges of a range never span more than one day.
+  """
+  if interval_to_ms(interval) < DAY_MS:
+    return ["month", "day"]
+  return ["month"]
+
+
+def floor_period(dt: datetime, level: str) -> datetime:
+  """Start of the day/month block containing dt."""
+  dt = _utc(dt).replace(hour=0, minute=0, second=0, microsecond=0)
+  if level == "month":
+    dt = dt.replace(day=1)
+  return dt
+
+
+def next_period(dt: datetime, level: str) -> datetime:
+  """Start of the block following the one containing dt."""
+  start = floor_period(dt, level)
+  if level == "day":
+    return start + timedelta(days=1)
+  if start.month == 12:
+    return start.replace(year=start.year + 1, month=1)
+  return start.replace(month=start.month + 1)
+
+
+def _ceil_period(dt: datetime, level: str) -> datetime:
+  start = floor_period(dt, level)
+  return start if start == _utc(dt) else next_period(dt, level)
+
+
+def plan_range(
+        lo: datetime,
+        hi: datetime,
+        levels: List[str]
+) -> Tuple[List[Tuple[str, datetime, datetime]], List[Tuple[datetime, datetime]]]:
+  """
+  Split the half-open range [lo, hi) into whole blocks and raw edges.
+
+  The largest aligned run of blocks of the first level is taken, then the
+  leftover edges are split with the next level, and whatever is left at the
+  end has to be aggregated from the candles themselves.
+
+  Args:
+      lo (datetime): Range start (inclusive).
+      hi (datetime): Range end (exclusive).
+      levels (list[str]): Block levels, coarsest first.
+
+  Returns:
+      tuple: ([(level, block_start, block_end)], [(raw_start, raw_end)]), all half-open.
+  """
+  blocks: List[Tuple[str, datetime, datetime]] = []
+  raw: List[Tuple[datetime, datetime]] = []
+
+  def split(start: datetime, end: datetime, remaining: List[str]) -> None:
+    if start >= end:
+      return
+    if not remaining:
+      raw.append((start, end))
+      return
+    level = remaining[0]
+    first = _ceil_period(start, level)
+    last = floor_period(end, level)
+    if first >= last:
+      split(start, end, remaining[1:])
+      return
+    blocks.append((level, first, last))
+    split(start, first, remaining[1:])
+    split(last, end, remaining[1:])
+
+  split(_utc(lo), _utc(hi), list(levels))
+  return blocks, raw
+
+
+def ensure_rollup_index(rollups: Collection) -> None:
+  """Create the unique index used to look up and $merge blocks."""
+  rollups.create_index([("symbol", 1), ("interval", 1), ("level", 1), ("period_start", 1)], unique=True)
+
+
+def invalidate_rollups(catalog: Collection, symbol: str, interval: str) -> bool:
+  """
+  Mark the rollups of a series as stale before writing new candles.
+
+  If the write fails half-way, readers fall back to scanning the candles and
+  the next refresh rebuilds the whole series.
+
+  Returns:
+      bool: True if the rollups were up to date, so an incremental refresh is enough.
+  """
+  previous = catalog.find_one_and_update(
+    {"symbol": symbol, "interval": interval},
+    {"$unset": {ROLLUPS_MARKER: ""}},
+    projection={"_id": 0, ROLLUPS_MARKER: 1}
+  )
+  return bool(previous and previous.get(ROLLUPS_MARKER))
+
+
+def refresh_rollups(
+        coll: Collection,
+        rollups: Collection,
+        catalog: Collection,
+        symbol: str,
+        interval: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+) -> None:
+  """
+  Recompute the blocks of a series touched by candles in [start, end].
+
+  Each level is rebuilt server-side with one $group on $dateTrunc merged into
+  the rollup collection. Without start/end the whole series (as recorded in
+  the coverage catalog) is rebuilt. The catalog entry is then marked fresh.
+
+  Args:
+      coll (Collection): Collection holding the candles.
+      rollups (Collection): Rollup collection.
+      catalog (Collection): Coverage catalog collection (entry must be up to date).
+      symbol (str): Trading pair symbol (e.g., 'BTCUSDT').
+      interval (str): Candlestick interval (e.g., '1d').
+      start (datetime, optional): First open_time written.
+      end (datetime, optional): Last open_time written.
+  """
+  entry = catalog.find_one({"symbol": symbol, "interval": interval})
+  if entry is None:
+    return
+  if start is None or end is None:
+    start, end = entry["first_open_time"], entry["last_open_time"]
+
+  for level in rollup_levels(interval):
+    lo = floor_period(start, level)
+    hi = next_period(end, level)
+    pipeline = [
+      {"$match": {"symbol": symbol, "interval": interval, "open_time": {"$gte": lo, "$lt": hi}}},
+      {"$group": {
+        "_id": {"$dateTrunc": {"date": "$open_time", "unit": level, "timezone": "UTC"}},
+        **_GROUP_FIELDS
+      }},
+      {"$project": {
+        "_id": 0,
+        "symbol": {"$literal": symbol},
+        "interval": {"$literal": interval},
+        "level": {"$literal": level},
+        "period_start": "$_id",
+        **{field: 1 for field in _GROUP_FIELDS}
+      }},
+      {"$merge": {
+        "into": rollups.name,
+        "on": ["symbol", "interval", "level", "period_start"],
+        "whenMatched": "replace",
+        "whenNotMatched": "insert"
+      }}
+    ]
+    coll.aggregate(pipeline)
+
+  catalog.update_one(
+    {"symbol": symbol, "interval": interval},
+    {"$set": {ROLLUPS_MARKER: entry["last_open_time"]}}
+  )
+  logger.info(f"Rollups {symbol} {interval}: refreshed {start} -> {end}")
+
+
+def combine_partials(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+  """
+  Merge partial aggregates (blocks or raw edges) into one.
+
+  Returns:
+      dict: count, sum_close, min_low, max_high, total_volume, first/last_open_time.
+  """
+  partials = [p for p in partials if p and p.get("count")]
+  if not partials:
+    return {"count": 0}
+  return {
+    "count": sum(p["count"] for p in partials),
+    "sum_close": sum(p["sum_close"] for p in partials),
+    "min_low": min(p["min_low"] for p in partials),
+    "max_high": max(p["max_high"] for p in partials),
+    "total_volume": sum(p["total_volume"] for p in partials),
+    "first_open_time": min(p["first_open_time"] for p in partials),
+    "last_open_time": max(p["last_open_time"] for p in partials),
+  }
+
+
+def get_range_stats(
+        coll: Collection,
+        rollups: Collection,
+        catalog: Collection,
+        symbol: str,
+        interval: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+) -> Optional[Dict[str, Any]]:
+  """
+  Aggregate a series over [start_time, end_time] from precomputed blocks.
+
+  Only the raw edges that do not fill a whole block are read from the candle
+  collection (at most a month of daily candles or a day of intraday candles
+  on each side).
+
+  Args:
+      coll (Collection): Collection holding the candles.
+      rollups (Collection): Rollup collection.
+      catalog (Collection): Coverage catalog collection.
+      symbol (str): Trading pair symbol (e.g., 'BTCUSDT').
+      interval (str): Candlestick interval (e.g., '1d').
+      start_time (datetime, optional): Range start (inclusive).
+      end_time (datetime, optional): Range end (inclusive).
+
+  Returns:
+      dict | None: Combined partial aggregates, or None if the rollups of the
+      series are missing or stale and the caller has to scan the candles.
+  """
+  entry = catalog.find_one({"symbol": symbol, "interval": interval})
+  if not entry or entry.get(ROLLUPS_MARKER) != entry.get("last_open_time"):
+    return None
+
+  # Work on the half-open range [lo, hi), clamped to what is stored
+  lo = _utc(entry["first_open_time"])
+  hi = _utc(entry["last_open_time"]) + _ONE_MS
+  if start_time is not None:
+    lo = max(lo, _utc(start_time))
+  if end_time is not None:
+    end_time = _utc(end_time)
+    hi = min(hi, end_time.replace(microsecond=end_time.microsecond // 1000 * 1000) + _ONE_MS)
+  if lo >= hi:
+    return {"count": 0}
+
+  blocks, raw = plan_range(lo, hi, rollup_levels(interval))
+  partials: List[Dict[str, Any]] = []
+
+  for level, block_start, block_end in blocks:
+    partials.extend(rollups.find(
+      {
+        "symbol": symbol,
+        "interval": interval,
+        "level": level,
+        "period_start": {"$gte": block_start, "$lt": block_end}
+      },
+      {"_id": 0, **{field: 1 for field in _GROUP_FIELDS}}
+    ))
+
+  for raw_start, raw_end in raw:
+    partials.extend(coll.aggregate([
+      {"$match": {"symbol": symbol, "interval": interval, "open_time": {"$gte": raw_start, "$lt": raw_end}}},
+      {"$group": {"_id": None, **_GROUP_FIELDS}}
+    ]))
+
+  return combine_partials(partials)
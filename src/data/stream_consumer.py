@@ -0,0 +1,408 @@
+import asyncio
+import json
+import logging
+import random
+import signal
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pymongo.database import Database
+from pymongo.errors import BulkWriteError
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed, InvalidHandshake
+
+from .config import SETTINGS
+from .connector.connector import connect_to_mongo
+from .candle_store import ensure_candle_collection
+from .stream_events import combined_stream_url, stream_names, parse_event
+from .coverage import ensure_coverage_index, mark_ingested
+from .rollups import ensure_rollup_index, invalidate_rollups
+from .fetch_historical_daily import (
+  SYMBOLS, split_changes, insert_new_candles, replace_changed_candles, refresh_series
+)
+
+logger = logging.getLogger("CRYPTO_BOT")
+
+# Binance accepts up to 1024 streams per connection and 5 incoming messages per second
+MAX_STREAMS_PER_CONNECTION = 1024
+SUBSCRIBE_CHUNK = 200
+SUBSCRIBE_INTERVAL = 0.25
+
+
+class StreamStats:
+  """Throughput and lag counters of a stream consumer."""
+
+  def __init__(self, clock: Callable[[], float] = time.monotonic):
+    """
+    Initialize the counters.
+
+    Args:
+        clock (callable): Monotonic clock, in seconds.
+    """
+    self._clock = clock
+    self.started = clock()
+    self.messages = 0
+    self.events: Dict[str, int] = defaultdict(int)
+    self.batches = 0
+    self.written = 0
+    self.write_errors = 0
+    self.reconnects = 0
+    self.subscriptions = 0
+    self.last_lag_ms = 0.0
+    self.max_lag_ms = 0.0
+
+  def record_event(self, doc: Dict[str, Any]) -> None:
+    """
+    Count one event and the delay between its emission by Binance and its reception.
+
+    Args:
+        doc (dict): Parsed event.
+    """
+    self.events[doc["type"]] += 1
+    lag = (datetime.now(timezone.utc) - doc["event_time"]).total_seconds() * 1000
+    self.last_lag_ms = lag
+    self.max_lag_ms = max(self.max_lag_ms, lag)
+
+  def snapshot(self) -> Dict[str, Any]:
+    """
+    Get the current counters.
+
+    Returns:
+        dict: Counters, with messages_per_second and written_per_second since the start.
+    """
+    elapsed = max(self._clock() - self.started, 1e-9)
+    return {
+      "messages": self.messages,
+      "events": dict(self.events),
+      "batches": self.batches,
+      "written": self.written,
+      "write_errors": self.write_errors,
+      "reconnects": self.reconnects,
+      "subscriptions": self.subscriptions,
+      "messages_per_second": self.messages / elapsed,
+      "written_per_second": self.written / elapsed,
+      "last_lag_ms": self.last_lag_ms,
+      "max_lag_ms": self.max_lag_ms,
+    }
+
+
+class StreamConsumer:
+  """
+  Consumer of Binance combined streams, writing events in micro-batches.
+
+  Events are buffered and handed to `write` when `batch_size` events are
+  pending or `flush_interval` seconds after the first one, whichever comes
+  first. `write` is blocking and runs in a worker thread, one batch at a
+  time; up to `max_pending` batches wait for it before reading the socket
+  pauses. On disconnection the consumer reconnects with exponential backoff
+  and subscribes to every stream again.
+  """
+
+  def __init__(
+          self,
+          url: str,
+          streams: List[str],
+          write: Callable[[List[Dict[str, Any]]], None],
+          batch_size: int = 500,
+          flush_interval: float = 1.0,
+          max_pending: int = 8,
+          max_backoff: float = 30.0,
+          stats: Optional[StreamStats] = None
+  ):
+    """
+    Initialize the consumer.
+
+    Args:
+        url (str): Combined-stream URL (see combined_stream_url).
+        streams (list[str]): Streams to subscribe to (see stream_names).
+        write (callable): Blocking function writing a batch of parsed events.
+        batch_size (int): Events per batch.
+        flush_interval (float): Maximum time an event waits in the buffer, in seconds.
+        max_pending (int): Batches allowed to wait for the writer.
+        max_backoff (float): Maximum delay between two connection attempts, in seconds.
+        stats (StreamStats, optional): Counters to update.
+    """
+    if len(streams) > MAX_STREAMS_PER_CONNECTION:
+      raise ValueError(f"At most {MAX_STREAMS_PER_CONNECTION} streams per connection, got {len(streams)}")
+    self.url = url
+    self.streams = streams
+    self.write = write
+    self.batch_size = batch_size
+    self.flush_interval = flush_interval
+    self.max_pending = max_pending
+    self.max_backoff = max_backoff
+    self.stats = stats or StreamStats()
+    self._buffer: List[Dict[str, Any]] = []
+    self._buffer_since = 0.0
+
+  async def _subscribe(self, ws) -> None:
+    for i in range(0, len(self.streams), SUBSCRIBE_CHUNK):
+      if i:
+        await asyncio.sleep(SUBSCRIBE_INTERVAL)
+      await ws.send(json.dumps({
+        "method": "SUBSCRIBE",
+        "params": self.streams[i:i + SUBSCRIBE_CHUNK],
+        "id": i // SUBSCRIBE_CHUNK + 1,
+      }))
+    self.stats.subscriptions += 1
+
+  async def _flush(self, batches: asyncio.Queue) -> None:
+    if self._buffer:
+      batch, self._buffer = self._buffer, []
+      await batches.put(batch)
+
+  async def _receive(self, ws, batches: asyncio.Queue) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+      timeout = None
+      if self._buffer:
+        timeout = max(0.0, self._buffer_since + self.flush_interval - loop.time())
+      try:
+        raw = await asyncio.wait_for(ws.recv(), timeout)
+      except asyncio.TimeoutError:
+        await self._flush(batches)
+        continue
+
+      self.stats.messages += 1
+      message = json.loads(raw)
+      doc = parse_event(message.get("data", message))
+      if doc is None:
+        continue  # Subscription acknowledgements and other events
+      self.stats.record_event(doc)
+      if not self._buffer:
+        self._buffer_since = loop.time()
+      self._buffer.append(doc)
+      if len(self._buffer) >= self.batch_size:
+        await self._flush(batches)
+
+  async def _write_batches(self, batches: asyncio.Queue) -> None:
+    while True:
+      batch = await batches.get()
+      try:
+        await asyncio.to_thread(self.write, batch)
+        self.stats.written += len(batch)
+      except Exception as e:
+        self.stats.write_errors += 1
+        logger.error(f"Failed to write {len(batch)} stream events: {e}")
+      finally:
+        self.stats.batches += 1
+        batches.task_done()
+
+  async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+    """
+    Consume the streams until `stop` is set, then write the pending events.
+
+    Args:
+        stop (asyncio.Event, optional): Set to stop the consumer.
+    """
+    stop = stop or asyncio.Event()
+    batches: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending)
+    writer = asyncio.create_task(self._write_batches(batches))
+    stopped = asyncio.create_task(stop.wait())
+    delay = 1.0
+    try:
+      while not stop.is_set():
+        try:
+          async with connect(self.url, max_size=2 ** 22) as ws:
+            await self._subscribe(ws)
+            delay = 1.0
+            logger.info(f"Subscribed to {len(self.streams)} streams on {self.url}")
+            receiver = asyncio.create_task(self._receive(ws, batches))
+            await asyncio.wait({receiver, stopped}, return_when=asyncio.FIRST_COMPLETED)
+            if not receiver.done():
+              receiver.cancel()
+              await asyncio.gather(receiver, return_exceptions=True)
+              break
+            receiver.result()  # Raises the disconnection error
+        except (ConnectionClosed, InvalidHandshake, OSError, asyncio.TimeoutError) as e:
+          self.stats.reconnects += 1
+          wait = min(delay, self.max_backoff) * random.uniform(0.5, 1.0)
+          logger.warning(f"Stream connection lost ({e!r}), reconnecting in {wait:.1f}s")
+          await asyncio.wait({stopped}, timeout=wait)
+          delay *= 2
+    finally:
+      stopped.cancel()
+      await self._flush(batches)
+      await batches.join()
+      writer.cancel()
+
+
+class MongoStreamWriter:
+  """
+  Write batches of stream events to MongoDB.
+
+  Trades are inserted in MONGO_COLLECTION_STREAMING. Closed klines are
+  written to the candle collection of their interval like the REST
+  ingestion does: the rollups of the series are invalidated, new candles
+  are inserted and changed ones replaced. Klines that are still open are
+  skipped.
+
+  Recomputing the catalog entry and rollups of a series on every batch
+  would cost more than the writes, so it is done at most every
+  `refresh_interval` seconds per series, and on `refresh()`. Until then,
+  readers see stale rollups and scan the candles instead.
+  """
+
+  def __init__(self, db: Database, refresh_interval: float = 60.0):
+    """
+    Initialize the writer and create the trade, catalog and rollup indexes.
+
+    Args:
+        db (Database): MongoDB database.
+        refresh_interval (float): Minimum seconds between two catalog/rollup refreshes of a series.
+    """
+    self.db = db
+    self.trades = db[SETTINGS["MONGO_COLLECTION_STREAMING"]]
+    # Unique per trade, so events received twice around a reconnection are stored once
+    self.trades.create_index([("symbol", 1), ("trade_id", 1)], unique=True)
+    self.catalog = db[SETTINGS["MONGO_COLLECTION_COVERAGE"]]
+    ensure_coverage_index(self.catalog)
+    self.rollups = db[SETTINGS["MONGO_COLLECTION_ROLLUPS"]]
+    ensure_rollup_index(self.rollups)
+    self.refresh_interval = refresh_interval
+    self._candles = {}
+    # (symbol, interval) -> written range and rollup state since the last refresh
+    self._dirty: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    self._refreshed_at: Dict[Tuple[str, str], float] = {}
+
+  def __call__(self, batch: List[Dict[str, Any]]) -> None:
+    """
+    Write a batch of parsed events.
+
+    Args:
+        batch (list[dict]): Events returned by parse_event.
+    """
+    trades = []
+    klines: Dict[Tuple[str, str], Dict[datetime, Dict[str, Any]]] = defaultdict(dict)
+    for doc in batch:
+      doc = {k: v for k, v in doc.items() if k != "type"}
+      if "trade_id" in doc:
+        trades.append(doc)
+      elif doc.pop("is_closed"):
+        doc.pop("event_time")
+        # The last update of a candle wins
+        klines[(doc["symbol"], doc["interval"])][doc["open_time"]] = doc
+
+    if trades:
+      try:
+        self.trades.insert_many(trades, ordered=False)
+      except BulkWriteError as e:
+        if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+          raise
+
+    for (symbol, interval), candles in klines.items():
+      if interval not in self._candles:
+        self._candles[interval] = ensure_candle_collection(self.db, interval)
+      coll = self._candles[interval]
+      new, changed, _ = split_changes(coll, list(candles.values()))
+      written = new + changed
+      if not written:
+        continue
+
+      key = (symbol, interval)
+      dirty = self._dirty.get(key)
+      if dirty is None:
+        # Rollups are marked stale until they have been refreshed for the new candles
+        dirty = self._dirty[key] = {
+          "incremental": invalidate_rollups(self.catalog, symbol, interval),
+          "new_series": self.catalog.find_one({"symbol": symbol, "interval": interval}, {"_id": 1}) is None,
+          "start": None,
+          "end": None,
+          "inserted": 0,
+        }
+      if new:
+        dirty["inserted"] += insert_new_candles(coll, new)
+      if changed:
+        replace_changed_candles(coll, changed)
+      open_times = [d["open_time"] for d in written]
+      dirty["start"] = min(open_times) if dirty["start"] is None else min(dirty["start"], min(open_times))
+      dirty["end"] = max(open_times) if dirty["end"] is None else max(dirty["end"], max(open_times))
+
+    self.refresh(force=False)
+
+  def refresh(self, force: bool = True) -> None:
+    """
+    Refresh the catalog entry and rollups of the series written since their last refresh.
+
+    Args:
+        force (bool): Refresh every written series, even if refreshed less than `refresh_interval` ago.
+    """
+    now = time.monotonic()
+    for key in list(self._dirty):
+      if not force and now - self._refreshed_at.get(key, float("-inf")) < self.refresh_interval:
+        continue
+      dirty = self._dirty.pop(key)
+      symbol, interval = key
+      refresh_series(self._candles[interval], self.catalog, self.rollups, symbol, interval,
+                     dirty["incremental"], dirty["start"], dirty["end"], dirty["inserted"])
+      if dirty["new_series"]:
+        # Its history was never fetched: the REST ingestion backfills it instead of resuming after the live candles
+        mark_ingested(self.catalog, symbol, interval, None)
+      self._refreshed_at[key] = now
+
+
+async def _report(stats: StreamStats, every: float) -> None:
+  while True:
+    await asyncio.sleep(every)
+    s = stats.snapshot()
+    logger.info(
+      f"Stream: {s['messages']} messages ({s['messages_per_second']:.0f}/s), "
+      f"{s['written']} written ({s['written_per_second']:.0f}/s), {s['write_errors']} write errors, "
+      f"{s['reconnects']} reconnects, lag {s['last_lag_ms']:.0f} ms (max {s['max_lag_ms']:.0f} ms)"
+    )
+
+
+async def consume_streams(stop: Optional[asyncio.Event] = None) -> None:
+  """
+  Consume the configured streams of every symbol and write them to MongoDB.
+
+  Channels come from STREAM_CHANNELS (default: trades and 1m klines); the
+  batch size and flush interval from STREAM_BATCH_SIZE and STREAM_FLUSH_SECONDS.
+
+  Args:
+      stop (asyncio.Event, optional): Set to stop the consumer.
+  """
+  user = SETTINGS.get("MONGO_USER", "")
+  client = connect_to_mongo(
+    db_name=SETTINGS["MONGO_DB"],
+    host=SETTINGS["MONGO_HOST"],
+    port=int(SETTINGS["MONGO_PORT"]),
+    auth=bool(user),
+    user=user,
+    password=SETTINGS.get("MONGO_PASSWORD", "")
+  )
+  channels = [c.strip() for c in SETTINGS["STREAM_CHANNELS"].split(",") if c.strip()]
+  writer = MongoStreamWriter(client[SETTINGS["MONGO_DB"]])
+  consumer = StreamConsumer(
+    url=combined_stream_url(SETTINGS["URL_STREAM"]),
+    streams=stream_names(SYMBOLS, channels),
+    write=writer,
+    batch_size=int(SETTINGS["STREAM_BATCH_SIZE"]),
+    flush_interval=float(SETTINGS["STREAM_FLUSH_SECONDS"])
+  )
+  reporter = asyncio.create_task(_report(consumer.stats, 30.0))
+  try:
+    await consumer.run(stop)
+  finally:
+    reporter.cancel()
+    # Catalog entries and rollups of the candles written since the last periodic refresh
+    await asyncio.to_thread(writer.refresh)
+
+
+def main() -> None:
+  """Run the stream consumer until SIGINT/SIGTERM, then write the pending events."""
+  logging.basicConfig(level=logging.INFO)
+
+  async def run() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+      try:
+        loop.add_signal_handler(sig, stop.set)
+      except NotImplementedError:
+        pass  # Windows: Ctrl+C cancels the consumer instead
+    await consume_streams(stop)
+
+  asyncio.run(run())
@@ -0,0 +1,83 @@
+"""
+Binance combined-stream URLs and event parsing.
+
+Kept free of database and ingestion imports, so the API can parse live
+events without loading the ingestion modules.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+
+def combined_stream_url(url: str) -> str:
+  """
+  Get the combined-stream endpoint from the raw-stream URL (URL_STREAM).
+
+  Args:
+      url (str): Raw-stream URL (e.g., 'wss://stream.binance.com:9443/ws').
+
+  Returns:
+      str: Combined-stream URL, whose messages are wrapped in {"stream": ..., "data": ...}.
+  """
+  url = url.rstrip("/")
+  if url.endswith("/ws"):
+    url = url[:-len("/ws")]
+  return f"{url}/stream"
+
+
+def stream_names(symbols: Iterable[str], channels: Iterable[str]) -> List[str]:
+  """
+  Names of the streams to subscribe to.
+
+  Args:
+      symbols (Iterable[str]): Trading pair symbols (e.g., 'BTCUSDT').
+      channels (Iterable[str]): Stream types (e.g., 'trade', 'kline_1m').
+
+  Returns:
+      list[str]: Stream names (e.g., 'btcusdt@trade').
+  """
+  return [f"{symbol.lower()}@{channel}" for symbol in symbols for channel in channels]
+
+
+def _ms_to_dt(ms: int) -> datetime:
+  return datetime.fromtimestamp(ms / 1000.0, tz=timezone.utc)
+
+
+def parse_event(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+  """
+  Map a trade or kline event to the document written to MongoDB.
+
+  Args:
+      data (dict): Event payload ('data' of a combined-stream message).
+
+  Returns:
+      dict | None: Document with a 'type' of 'trade' or 'kline', or None for other events.
+  """
+  event = data.get("e")
+  if event == "trade":
+    return {
+      "type": "trade",
+      "symbol": data["s"],
+      "trade_id": data["t"],
+      "price": float(data["p"]),
+      "quantity": float(data["q"]),
+      "trade_time": _ms_to_dt(data["T"]),
+      "event_time": _ms_to_dt(data["E"]),
+      "is_buyer_maker": data["m"],
+    }
+  if event == "kline":
+    k = data["k"]
+    return {
+      "type": "kline",
+      "symbol": data["s"],
+      "interval": k["i"],
+      "open_time": _ms_to_dt(k["t"]),
+      "open": float(k["o"]),
+      "high": float(k["h"]),
+      "low": float(k["l"]),
+      "close": float(k["c"]),
+      "volume": float(k["v"]),
+      "close_time": _ms_to_dt(k["T"]),
+      "is_closed": k["x"],
+      "event_time": _ms_to_dt(data["E"]),
+    }
+  return None
@@ -1,3 +1,4 @@
+import logging
 import sys
 import os
 
@@ -8,6 +9,7 @@ if src_dir not in sys.path:
 
 from data.config import SETTINGS
 from data.connector.connector import connect_to_mongo
+from data.connector.registry import registry
 from data.fetch_historical_daily import upsert_daily_history
 
 import traceback
@@ -15,6 +17,7 @@ import traceback
 
 def main():
   """Main function to fetch and store historical cryptocurrency data."""
+  logging.basicConfig(level=logging.INFO)
   print("=" * 60)
   print("Cryptocurrency Data Collection")
   print("=" * 60)
@@ -55,9 +58,9 @@ def main():
     print("  5. Verify network connectivity to Binance API")
     traceback.print_exc()
   finally:
-    # Close MongoDB connection
+    # Close the shared MongoDB client, also used by upsert_daily_history
     if 'mongo_client' in locals():
-      mongo_client.close()
+      registry.close()
       print("\n✅ MongoDB connection closed.")
 
 
@@ -0,0 +1,196 @@
+import functools
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+import pyarrow as pa
+import pytest
+from fastapi.testclient import TestClient
+
+# Add src directory to Python path to allow imports
+test_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(test_dir)
+src_dir = os.path.join(project_root, 'src')
+
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+import api.app as api_app
+from api.encoders import negotiate_format
+from api.executor import QueryExecutor
+from data.candle_store import collection_name
+from data.config import SETTINGS
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def candle(symbol, day, close):
+  open_time = START + timedelta(days=day)
+  return {
+    "symbol": symbol, "interval": "1d", "open_time": open_time,
+    "open": close - 1, "high": close + 1, "low": close - 2, "close": close, "volume": 10.0,
+    "close_time": open_time + timedelta(days=1) - timedelta(milliseconds=1),
+  }
+
+
+@pytest.fixture
+def db():
+  """Base mongomock de 5 bougies BTCUSDT"""
+  db = mongomock.MongoClient(tz_aware=True)["crypto_test"]
+  db[collection_name("1d")].insert_many([candle("BTCUSDT", day, 100.0 + day) for day in range(5)])
+  return db
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+  """API branchée sur la base mongomock, sans lifespan"""
+  executor = QueryExecutor(max_workers=2, max_pending=8)
+  monkeypatch.setattr(api_app, "mongo_db", db)
+  monkeypatch.setattr(api_app, "query_executor", executor)
+  yield TestClient(api_app.app)
+  executor.shutdown()
+
+
+def test_negotiate_format_honours_q_values():
+  """Vérifie le choix du format selon les q-values et l'ordre de l'en-tête Accept"""
+  assert negotiate_format(None) == "application/json"
+  assert negotiate_format("application/x-ndjson") == "application/x-ndjson"
+  assert negotiate_format("application/json, application/x-ndjson;q=0.1") == "application/json"
+  assert negotiate_format("application/x-ndjson;q=0") == "application/json"
+  assert negotiate_format("application/x-ndjson;q=0.5, application/vnd.apache.arrow.stream;q=0.9") \
+    == "application/vnd.apache.arrow.stream"
+  assert negotiate_format("application/x-ndjson, */*;q=0.1") == "application/x-ndjson"
+  assert negotiate_format("text/html, */*") == "application/json"
+
+
+def test_historical_ndjson_stream(client):
+  """Vérifie le flux NDJSON : une bougie par ligne, sans plafond de limit"""
+  response = client.get("/api/historical/BTCUSDT", params={"limit": 20000},
+                        headers={"Accept": "application/x-ndjson"})
+  assert response.status_code == 200
+  assert response.headers["content-type"].startswith("application/x-ndjson")
+  rows = [json.loads(line) for line in response.text.splitlines()]
+  assert [row["close"] for row in rows] == [100.0, 101.0, 102.0, 103.0, 104.0]
+  assert rows[0]["open_time"] == "2024-01-01T00:00:00+00:00"
+
+
+def test_historical_arrow_stream(client):
+  """Vérifie le flux Arrow IPC, avec ses colonnes typées et la projection fields="""
+  response = client.get("/api/historical/BTCUSDT", params={"fields": "close"},
+                        headers={"Accept": "application/vnd.apache.arrow.stream"})
+  assert response.status_code == 200
+  table = pa.ipc.open_stream(response.content).read_all()
+  assert table.column_names == ["open_time", "close"]
+  assert table.schema.field("open_time").type == pa.timestamp("ms", tz="UTC")
+  assert table["close"].to_pylist() == [100.0, 101.0, 102.0, 103.0, 104.0]
+
+
+def test_empty_stream_is_404(client):
+  """Vérifie qu'un flux sans aucune ligne répond 404 au lieu d'un corps vide"""
+  for accept in ("application/x-ndjson", "application/vnd.apache.arrow.stream"):
+    response = client.get("/api/historical/ETHUSDT", headers={"Accept": accept})
+    assert response.status_code == 404
+
+
+def test_fast_path_matches_validated_json(client):
+  """Vérifie que fast=true renvoie le même JSON que le chemin validé par Pydantic"""
+  for path in ("/api/historical/BTCUSDT", "/api/latest/BTCUSDT"):
+    validated = client.get(path, params={"limit": 3} if "historical" in path else {"count": 3})
+    fast = client.get(path, params={"limit": 3, "fast": True} if "historical" in path else {"count": 3, "fast": True})
+    assert validated.status_code == fast.status_code == 200
+    assert fast.json() == validated.json() and len(fast.json()) == 3
+  assert client.get("/api/historical/BTCUSDT", params={"limit": 3}).headers.get("X-Next-Cursor")
+
+
+def test_batch_partial_failures_and_duplicate_pairs(client, monkeypatch):
+  """Vérifie qu'un lot garde un résultat par sous-requête, dans l'ordre, y compris en cas d'échec
+  partiel et pour une même paire symbole/intervalle demandée sur deux périodes"""
+  query = api_app.get_historical_data_query
+
+  def failing_query(**kwargs):
+    if kwargs["symbol"] == "BROKEN":
+      raise RuntimeError("connection reset")
+    return query(**kwargs)
+
+  monkeypatch.setattr(api_app, "get_historical_data_query", failing_query)
+  queries = [
+    {"symbol": "BTCUSDT", "end_time": "2024-01-02T00:00:00Z"},
+    {"symbol": "BTCUSDT", "start_time": "2024-01-04T00:00:00Z"},
+    {"symbol": "ETHUSDT"},
+    {"symbol": "BTCUSDT", "interval": "7x"},
+    {"symbol": "BTCUSDT", "start_time": "yesterday"},
+    {"symbol": "BROKEN"},
+  ]
+  for fast in (False, True):
+    response = client.post("/api/historical/batch", params={"fast": fast}, json={"queries": queries})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["index"] for r in results] == list(range(6))
+    assert len({r["key"] for r in results}) == 6 and results[0]["key"] == "0:BTCUSDT:1d"
+    assert [r["status"] for r in results] == ["ok", "ok", "not_found", "invalid", "invalid", "error"]
+    assert [c["close"] for c in results[0]["data"]] == [100.0, 101.0]
+    assert [c["close"] for c in results[1]["data"]] == [103.0, 104.0]
+    assert results[3]["error"] == "Invalid interval: 7x" and "connection reset" in results[5]["error"]
+
+
+def test_max_points_over_row_cap_is_400(client, monkeypatch):
+  """Vérifie qu'un sous-échantillonnage au-delà du plafond de lignes répond 400 au lieu de tout charger"""
+  monkeypatch.setattr(api_app, "get_downsampled_data", functools.partial(api_app.get_downsampled_data, max_rows=4))
+  response = client.get("/api/historical/BTCUSDT", params={"max_points": 3})
+  assert response.status_code == 400 and "resample" in response.json()["detail"]
+  monkeypatch.setattr(api_app, "get_downsampled_data", functools.partial(api_app.get_downsampled_data, max_rows=5))
+  assert len(client.get("/api/historical/BTCUSDT", params={"max_points": 3}).json()) == 3
+
+
+def test_api_import_keeps_log_format():
+  """Vérifie que l'import de l'API ne charge pas l'ingestion et garde le format horodaté des logs"""
+  code = (
+    "import logging, sys; import api.app; "
+    "print('data.fetch_historical_daily' in sys.modules, logging.getLogger().handlers[0].formatter._fmt)"
+  )
+  result = subprocess.run([sys.executable, "-c", code], cwd=src_dir, capture_output=True, text=True, check=True)
+  assert result.stdout.startswith("False %(asctime)s")
+
+
+def test_symbols_and_intervals_from_catalog(client, db, monkeypatch):
+  """Vérifie la lecture des symboles et intervalles dans le catalogue configuré, et le repli sur distinct()"""
+  assert client.get("/api/symbols").json() == {"symbols": ["BTCUSDT"]}
+  assert client.get("/api/intervals").json() == {"intervals": ["1d"]}
+
+  monkeypatch.setitem(SETTINGS, "MONGO_COLLECTION_COVERAGE", "custom_coverage")
+  db["custom_coverage"].insert_many([
+    {"symbol": symbol, "interval": interval} for symbol in ("ETHUSDT", "BTCUSDT") for interval in ("1h", "1d")
+  ])
+  assert client.get("/api/symbols").json() == {"symbols": ["BTCUSDT", "ETHUSDT"]}
+  assert client.get("/api/intervals").json() == {"intervals": ["1d", "1h"]}
+
+
+def test_coverage_filters(client, db, monkeypatch):
+  """Vérifie les filtres symbol et interval de /api/coverage et le tri des entrées"""
+  monkeypatch.setitem(SETTINGS, "MONGO_COLLECTION_COVERAGE", "custom_coverage")
+  db["custom_coverage"].insert_many([
+    {"symbol": symbol, "interval": interval, "first_open_time": START, "last_open_time": START + timedelta(days=4),
+     "count": 5, "collection": "ignored"}
+    for symbol in ("ETHUSDT", "BTCUSDT") for interval in ("1h", "1d")
+  ])
+
+  coverage = client.get("/api/coverage").json()["coverage"]
+  assert [(e["symbol"], e["interval"]) for e in coverage] == [
+    ("BTCUSDT", "1d"), ("BTCUSDT", "1h"), ("ETHUSDT", "1d"), ("ETHUSDT", "1h")
+  ]
+  assert coverage[0]["last_open_time"] == "2024-01-05T00:00:00+00:00" and "collection" not in coverage[0]
+  assert [e["interval"] for e in client.get("/api/coverage", params={"symbol": "ETHUSDT"}).json()["coverage"]] \
+    == ["1d", "1h"]
+  assert [e["symbol"] for e in client.get("/api/coverage", params={"interval": "1h"}).json()["coverage"]] \
+    == ["BTCUSDT", "ETHUSDT"]
+  assert client.get("/api/coverage", params={"symbol": "ETHUSDT", "interval": "5m"}).json() == {"coverage": []}
+
+
+def test_resample_must_be_coarser(client):
+  """Vérifie que resample refuse un intervalle invalide, plus fin ou égal à interval"""
+  for resample in ("7x", "1h", "1d"):
+    response = client.get("/api/historical/BTCUSDT", params={"resample": resample})
+    assert response.status_code == 400 and "resample" in response.json()["detail"].lower()
@@ -0,0 +1,63 @@
+import gzip
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add src directory to Python path to allow imports
+test_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(test_dir)
+src_dir = os.path.join(project_root, 'src')
+
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from data.binance_session import create_binance_session, LatencyStats
+
+
+def test_session_retries_5xx_and_records_latency():
+  """Vérifie la reprise après un 503, la compression gzip, la réutilisation de connexion et les latences"""
+  state = {"requests": 0, "ports": set()}
+
+  class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+      state["requests"] += 1
+      state["ports"].add(self.client_address[1])
+      if state["requests"] == 1:
+        self.send_response(503)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        return
+      assert "gzip" in self.headers.get("Accept-Encoding", "")
+      body = gzip.compress(b"[]")
+      self.send_response(200)
+      self.send_header("Content-Type", "application/json")
+      self.send_header("Content-Encoding", "gzip")
+      self.send_header("Content-Length", str(len(body)))
+      self.end_headers()
+      self.wfile.write(body)
+
+    def log_message(self, *args):
+      pass
+
+  server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  url = f"http://127.0.0.1:{server.server_address[1]}/api/v3/klines"
+
+  stats = LatencyStats()
+  session = create_binance_session(backoff_factor=0, backoff_jitter=0, stats=stats)
+  try:
+    assert session.get(url).json() == []
+    assert session.get(url).json() == []
+  finally:
+    session.close()
+    server.shutdown()
+
+  assert state["requests"] == 3
+  # Les trois appels passent par la même connexion keep-alive
+  assert len(state["ports"]) == 1
+  snapshot = stats.snapshot()
+  assert snapshot["count"] == 2
+  assert snapshot["errors"] == 0
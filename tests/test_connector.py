@@ -0,0 +1,137 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pandas as pd
+import sqlalchemy
+
+# Add src directory to Python path to allow imports
+test_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(test_dir)
+src_dir = os.path.join(project_root, 'src')
+
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from data.connector.connector import (
+  iter_mongo_chunks, read_mongo_frame, get_table, write_to_postgres, _upsert_statement,
+  read_from_postgres, iter_postgres_batches
+)
+
+
+class FakeCursor:
+  """Curseur minimal, itérateur comme celui de PyMongo, qui mémorise la taille de lot demandée"""
+
+  def __init__(self, docs):
+    self.docs = docs
+    self.read = 0
+    self.batch = None
+    self.closed = False
+
+  def batch_size(self, n):
+    self.batch = n
+    return self
+
+  def __iter__(self):
+    return self
+
+  def __next__(self):
+    if self.read == len(self.docs):
+      raise StopIteration
+    self.read += 1
+    return dict(self.docs[self.read - 1])
+
+  def close(self):
+    self.closed = True
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+
+
+class FakeDatabase:
+  def __init__(self, docs):
+    self.docs = docs
+    self.cursors = []
+
+  def __getitem__(self, name):
+    return self
+
+  def find(self, query, projection=None, sort=None):
+    cursor = FakeCursor(self.docs)
+    self.cursors.append(cursor)
+    return cursor
+
+
+def make_docs(n):
+  start = datetime(2024, 1, 1)
+  docs = [{"open_time": start + timedelta(days=i), "close": float(i)} for i in range(n)]
+  docs[3]["volume"] = 7.0  # Field present in one document only
+  return docs
+
+
+def test_iter_mongo_chunks():
+  """Vérifie le découpage en blocs à partir d'un seul curseur, y compris les champs absents"""
+  db = FakeDatabase(make_docs(25))
+  chunks = list(iter_mongo_chunks(db, "historical_daily_data", chunk_size=10))
+
+  assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+  assert len(db.cursors) == 1 and db.cursors[0].batch == 10 and db.cursors[0].closed
+  assert chunks[0]["volume"].isna().sum() == 9 and chunks[0]["volume"].iloc[3] == 7.0
+  assert list(chunks[1].columns) == ["open_time", "close"]
+  assert str(chunks[0]["open_time"].dtype) == "datetime64[ns, UTC]"
+
+
+def test_read_mongo_frame_matches_chunks():
+  """Vérifie que la lecture en une fois donne le même DataFrame que la concaténation des blocs"""
+  db = FakeDatabase(make_docs(25))
+  frame = read_mongo_frame(db, "historical_daily_data", batch_size=10)
+  expected = pd.concat(iter_mongo_chunks(db, "historical_daily_data", chunk_size=10), ignore_index=True)
+
+  pd.testing.assert_frame_equal(frame, expected[frame.columns])
+  assert frame["close"].tolist() == [float(i) for i in range(25)]
+  assert read_mongo_frame(FakeDatabase([]), "historical_daily_data").empty
+
+
+def test_write_to_postgres_commits(tmp_path):
+  """Vérifie que les lignes écrites sont validées et que le schéma de la table n'est lu qu'une fois"""
+  engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'candles.db'}")
+  with engine.begin() as connection:
+    connection.execute(sqlalchemy.text("CREATE TABLE candles (symbol TEXT, close REAL)"))
+
+  write_to_postgres(engine, "candles", [{"symbol": "BTCUSDT", "close": 1.5}, {"symbol": "ETHUSDT", "close": 2.5}])
+  engine.dispose()
+  with engine.connect() as connection:
+    assert connection.execute(sqlalchemy.text("SELECT COUNT(*) FROM candles")).scalar() == 2
+  assert get_table(engine, "candles") is get_table(engine, "candles")
+
+
+def test_upsert_statement():
+  """Vérifie la requête d'upsert depuis la table de transit"""
+  statement = _upsert_statement("candles", "candles_staging", ["symbol", "open_time", "close"], ["symbol", "open_time"])
+  assert statement.as_string(None) == (
+    'INSERT INTO "candles" ("symbol", "open_time", "close") '
+    'SELECT "symbol", "open_time", "close" FROM "candles_staging" '
+    'ON CONFLICT ("symbol", "open_time") DO UPDATE SET "close" = EXCLUDED."close"'
+  )
+  assert _upsert_statement("t", "s", ["a"], ["a"]).as_string(None).endswith("DO NOTHING")
+
+
+def test_postgres_reads(tmp_path):
+  """Vérifie la lecture complète et la lecture par lots (tuples, colonnes, DataFrame)"""
+  engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'candles.db'}")
+  with engine.begin() as connection:
+    connection.execute(sqlalchemy.text("CREATE TABLE candles (symbol TEXT, close REAL)"))
+  write_to_postgres(engine, "candles", [{"symbol": f"SYM{i}", "close": float(i)} for i in range(5)])
+
+  assert read_from_postgres(engine, "SELECT * FROM candles")[0] == {"symbol": "SYM0", "close": 0.0}
+
+  query = "SELECT symbol, close FROM candles WHERE close >= :low ORDER BY close"
+  batches = list(iter_postgres_batches(engine, query, {"low": 1.0}, batch_size=2))
+  assert batches == [[("SYM1", 1.0), ("SYM2", 2.0)], [("SYM3", 3.0), ("SYM4", 4.0)]]
+  columns = next(iter_postgres_batches(engine, query, {"low": 1.0}, batch_size=2, output="columns"))
+  assert columns == {"symbol": ["SYM1", "SYM2"], "close": [1.0, 2.0]}
+  frames = list(iter_postgres_batches(engine, query, {"low": 1.0}, batch_size=3, output="frame"))
+  assert [len(frame) for frame in frames] == [3, 1] and list(frames[1].columns) == ["symbol", "close"]
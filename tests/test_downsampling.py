@@ -0,0 +1,66 @@
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+import numpy as np
+import pytest
+
+# Add src directory to Python path to allow imports
+test_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(test_dir)
+src_dir = os.path.join(project_root, 'src')
+
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from api.downsampling import lttb_indices
+from api.queries import get_downsampled_data, TooManyRowsError
+from data.intervals import interval_to_date_trunc
+
+
+def test_lttb_keeps_endpoints_and_budget():
+  """Vérifie que LTTB garde les extrémités et respecte le budget de points"""
+  x = np.arange(1000)
+  y = np.sin(x / 50.0)
+  indices = lttb_indices(x, y, 100)
+
+  assert len(indices) == 100
+  assert indices[0] == 0
+  assert indices[-1] == 999
+  assert np.all(np.diff(indices) > 0)
+
+
+def test_lttb_preserves_spike():
+  """Vérifie qu'un pic isolé survit au sous-échantillonnage"""
+  x = np.arange(500)
+  y = np.zeros(500)
+  y[317] = 100.0
+  assert 317 in lttb_indices(x, y, 20)
+
+
+def test_lttb_small_series_unchanged():
+  """Vérifie qu'une série plus courte que le budget est conservée"""
+  assert list(lttb_indices(np.arange(5), np.arange(5), 10)) == [0, 1, 2, 3, 4]
+
+
+def test_interval_to_date_trunc():
+  """Vérifie la conversion d'un intervalle en arguments $dateTrunc"""
+  assert interval_to_date_trunc("4h")["unit"] == "hour"
+  assert interval_to_date_trunc("4h")["binSize"] == 4
+  assert interval_to_date_trunc("1w")["startOfWeek"] == "monday"
+
+
+def test_downsampled_data_row_cap():
+  """Vérifie que max_points refuse de charger plus de max_rows bougies, et garde limit sans max_points"""
+  db = mongomock.MongoClient(tz_aware=True)["crypto_test"]
+  start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+  db["historical_daily_data"].insert_many([
+    {"symbol": "BTCUSDT", "interval": "1d", "open_time": start + timedelta(days=i), "close": float(i)}
+    for i in range(10)
+  ])
+
+  assert len(get_downsampled_data(db, "BTCUSDT", max_points=3, max_rows=10)) == 3
+  with pytest.raises(TooManyRowsError):
+    get_downsampled_data(db, "BTCUSDT", max_points=3, max_rows=9)
+  assert len(get_downsampled_data(db, "BTCUSDT", limit=4, max_rows=2)) == 4
@@ -0,0 +1,54 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+# Add src directory to Python path to allow imports
+test_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(test_dir)
+src_dir = os.path.join(project_root, 'src')
+
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from api.executor import QueryExecutor, ExecutorSaturatedError
+
+
+def test_event_loop_not_blocked():
+  """Vérifie qu'une requête lente ne bloque pas la boucle d'événements"""
+  executor = QueryExecutor(max_workers=2, max_pending=0)
+
+  async def scenario():
+    slow = asyncio.create_task(executor.run(time.sleep, 0.3))
+    t0 = time.perf_counter()
+    await asyncio.sleep(0.01)
+    tick = time.perf_counter() - t0
+    await slow
+    return tick
+
+  tick = asyncio.run(scenario())
+  executor.shutdown()
+  assert tick < 0.1
+  assert executor.stats()["completed"] == 1
+
+
+def test_rejects_when_saturated():
+  """Vérifie que les requêtes au-delà des limites sont rejetées"""
+  executor = QueryExecutor(max_workers=1, max_pending=1)
+
+  async def scenario():
+    tasks = [asyncio.create_task(executor.run(time.sleep, 0.1)) for _ in range(2)]
+    await asyncio.sleep(0)
+    with pytest.raises(ExecutorSaturatedError):
+      await executor.run(time.sleep, 0.1)
+    stats = executor.stats()
+    await asyncio.gather(*tasks)
+    return stats
+
+  stats = asyncio.run(scenario())
+  executor.shutdown()
+  assert stats["running"] == 1
+  assert stats["pending"] == 1
+  assert stats["rejected"] == 1
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import os
+import sys
+import time
+
+# Add src directory to Python path to allow imports
+test_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(test_dir)
+src_dir = os.path.join(project_root, 'src')
+
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from websockets.asyncio.server import serve
+
+from api.fanout import CandleBroadcaster, ClientQueue
+
+
+def kline(open_time, close):
+  """Message de flux combiné Binance pour une mise à jour de bougie 1m"""
+  now = int(time.time() * 1000)
+  return json.dumps({
+    "stream": "btcusdt@kline_1m",
+    "data": {
+      "e": "kline", "E": now, "s": "BTCUSDT",
+      "k": {"t": open_time, "T": open_time + 59_999, "i": "1m", "o": "1.0", "h": "2.0", "l": "0.5",
+            "c": str(close), "v": "10.0", "x": False},
+    },
+  })
+
+
+def test_client_queue_policies():
+  """Vérifie la fusion des mises à jour d'une même bougie et l'abandon des plus anciennes"""
+  async def scenario():
+    coalesce = ClientQueue("btcusdt@kline_1m", maxsize=2, policy="coalesce")
+    for key, message in [(1, "a1"), (1, "a2"), (2, "b1"), (3, "c1"), (3, "c2")]:
+      coalesce.put(key, message)
+    drop = ClientQueue("btcusdt@kline_1m", maxsize=2, policy="drop_oldest")
+    for key, message in [(1, "a1"), (1, "a2"), (2, "b1")]:
+      drop.put(key, message)
+    return coalesce, [await coalesce.get() for _ in range(2)], drop, [await drop.get() for _ in range(2)]
+
+  coalesce, received, drop, dropped = asyncio.run(scenario())
+  assert received == ["b1", "c2"]
+  assert coalesce.coalesced == 2 and coalesce.dropped == 1
+  assert dropped == ["a2", "b1"] and drop.dropped == 1
+
+
+def test_broadcaster_fans_out_one_upstream_feed():
+  """Vérifie qu'un seul flux amont est partagé par plusieurs clients, chacun selon sa politique,
+  et que le flux est désabonné quand le dernier client part"""
+  requests = []
+  unsubscribed = asyncio.Event()
+
+  async def upstream(ws):
+    async for raw in ws:
+      request = json.loads(raw)
+      requests.append((request["method"], request["params"]))
+      await ws.send(json.dumps({"result": None, "id": request["id"]}))
+      if request["method"] == "SUBSCRIBE":
+        for i in range(10):
+          await ws.send(kline(0, 100 + i))
+        await ws.send(kline(60_000, 200))
+      else:
+        unsubscribed.set()
+
+  async def scenario():
+    async with serve(upstream, "127.0.0.1", 0) as server:
+      port = server.sockets[0].getsockname()[1]
+      broadcaster = CandleBroadcaster(f"ws://127.0.0.1:{port}/stream")
+      fast = broadcaster.subscribe("BTCUSDT", "1m")
+      slow = broadcaster.subscribe("BTCUSDT", "1m", maxsize=8)
+      lossy = broadcaster.subscribe("BTCUSDT", "1m", policy="drop_oldest", maxsize=4)
+
+      received = []
+      while not received or json.loads(received[-1])["close"] != 200.0:
+        received.append(await asyncio.wait_for(fast.get(), 5))
+      stats = broadcaster.stats()
+      slow_messages = [await slow.get() for _ in range(len(slow))]
+      lossy_messages = [await lossy.get() for _ in range(len(lossy))]
+
+      for queue in (fast, slow, lossy):
+        broadcaster.unsubscribe(queue)
+      await asyncio.wait_for(unsubscribed.wait(), 5)
+      await broadcaster.close()
+      return received, slow_messages, lossy_messages, stats
+
+  received, slow_messages, lossy_messages, stats = asyncio.run(scenario())
+  assert requests == [("SUBSCRIBE", ["btcusdt@kline_1m"]), ("UNSUBSCRIBE", ["btcusdt@kline_1m"])]
+  assert json.loads(received[-1])["symbol"] == "BTCUSDT"
+  # Slow client: one message per candle, holding its last update
+  assert [json.loads(m)["close"] for m in slow_messages] == [109.0, 200.0]
+  # Lossy client: the 4 most recent updates
+  assert [json.loads(m)["close"] for m in lossy_messages] == [107.0, 108.0, 109.0, 200.0]
+  assert stats["subscribers"] == 3 and stats["streams"] == 1 and stats["published"] == 11
+  assert stats["dropped"] == 7 and stats["upstream_connected"]
+
+
+def test_broadcaster_skips_malformed_messages():
+  """Vérifie qu'un message amont illisible est ignoré sans interrompre le flux des clients"""
+  async def upstream(ws):
+    async for raw in ws:
+      request = json.loads(raw)
+      if request["method"] == "SUBSCRIBE":
+        await ws.send("not json {")
+        await ws.send(json.dumps({"data": {"e": "kline"}}))
+        await ws.send(json.dumps(["unexpected"]))
+        await ws.send(kline(0, 100))
+
+  async def scenario():
+    async with serve(upstream, "127.0.0.1", 0) as server:
+      port = server.sockets[0].getsockname()[1]
+      broadcaster = CandleBroadcaster(f"ws://127.0.0.1:{port}/stream")
+      queue = broadcaster.subscribe("BTCUSDT", "1m")
+      message = await asyncio.wait_for(queue.get(), 5)
+      stats = broadcaster.stats()
+      await broadcaster.close()
+      return message, stats
+
+  message, stats = asyncio.run(scenario())
+  assert json.loads(message)["close"] == 100.0
+  assert stats["reconnects"] == 0 and stats["upstream_connected"]
@@ -0,0 +1,33 @@
+import os
+import sys
+
+# Add src directory to Python path to allow imports
+test_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(test_dir)
+src_dir = os.path.join(project_root, 'src')
+
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from api.queries import candle_projection, CANDLE_PROJECTION
+from api.models import candle_list_adapter
+from api.encoders import candle_arrow_schema
+
+
+def test_candle_projection():
+  """Vérifie la projection MongoDB d'une sélection de champs"""
+  assert candle_projection(None) == CANDLE_PROJECTION
+  assert candle_projection(["close"]) == {"_id": 0, "open_time": 1, "close": 1}
+
+
+def test_trimmed_response_model():
+  """Vérifie que le modèle réduit ne sérialise que les champs demandés"""
+  adapter = candle_list_adapter(("open_time", "close"))
+  rows = adapter.validate_python([{"open_time": "2024-01-01T00:00:00", "close": "1.5"}])
+  assert adapter.dump_python(rows) == [{"open_time": "2024-01-01T00:00:00", "close": 1.5}]
+  assert candle_list_adapter(("open_time", "close")) is adapter
+
+
+def test_trimmed_arrow_schema():
+  """Vérifie le schéma Arrow réduit aux champs demandés"""
+  assert candle_arrow_schema(("open_time", "close")).names == ["open_time", "close"]
@@ -0,0 +1,202 @@
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add src directory to Python path to allow imports
+test_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(test_dir)
+src_dir = os.path.join(project_root, 'src')
+
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+import data.fetch_historical_daily as fetch_historical_daily
+from data.fetch_historical_daily import frame_to_documents, normalize_record, split_changes, ingest_symbol
+from data.coverage import last_stored_open_time, begin_ingest, pending_ingest, mark_ingested
+from data.rollups import ROLLUPS_MARKER, invalidate_rollups
+from data.candle_store import parse_interval_catalog, collection_name
+
+
+def make_frame(n):
+  open_time = pd.date_range("2024-01-01", periods=n, freq="D")
+  return pd.DataFrame({
+    "open_time": open_time,
+    "open": np.arange(n) + 1.0,
+    "high": 2.0 + np.arange(n),
+    "low": 0.5,
+    "close": 1.5,
+    "volume": 3.0,
+    "close_time": open_time + pd.Timedelta(days=1) - pd.Timedelta(milliseconds=1),
+  })
+
+
+class FakeCollection:
+  """Collection minimale : find renvoie les documents stockés (dates naïves, comme MongoDB)"""
+
+  def __init__(self, docs):
+    self.docs = docs
+
+  def find(self, query_filter, projection):
+    return [
+      {**d, "open_time": d["open_time"].replace(tzinfo=None), "close_time": d["close_time"].replace(tzinfo=None)}
+      for d in self.docs
+    ]
+
+
+def test_frame_to_documents_matches_normalize_record():
+  """Vérifie que la conversion par colonnes produit les mêmes documents que normalize_record"""
+  df = make_frame(5)
+  expected = [normalize_record("BTCUSDT", "1d", row.to_dict()) for _, row in df.iterrows()]
+  assert frame_to_documents("BTCUSDT", "1d", df) == expected
+
+
+def test_frame_to_documents_drops_malformed_rows():
+  """Vérifie que les lignes sans date ou avec un prix invalide sont écartées"""
+  df = make_frame(5)
+  df.loc[1, "close"] = np.nan
+  df.loc[3, "open_time"] = pd.NaT
+  docs = frame_to_documents("BTCUSDT", "1d", df)
+  assert [d["open"] for d in docs] == [1.0, 3.0, 5.0]
+
+
+def test_split_changes():
+  """Vérifie la répartition entre bougies nouvelles, modifiées et identiques"""
+  docs = frame_to_documents("BTCUSDT", "1d", make_frame(4))
+  stored = [dict(d) for d in docs[:3]]
+  stored[2]["close"] = 99.0
+
+  new, changed, identical = split_changes(FakeCollection(stored), docs)
+  assert new == [docs[3]]
+  assert changed == [docs[2]]
+  assert identical == 2
+
+
+def test_interval_catalog():
+  """Vérifie le catalogue d'intervalles et le nom de collection associé à chacun"""
+  assert parse_interval_catalog("1m:7, 1h,1d") == {"1m": 7, "1h": 365, "1d": 730}
+  assert collection_name("1d") == "historical_daily_data"
+  assert collection_name("1h") == "historical_data_1h"
+
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+DAY_MS = 86_400_000
+
+
+def kline(day):
+  """Bougie 1d brute de l'API Binance"""
+  open_ms = int(START.timestamp() * 1000) + day * DAY_MS
+  return [open_ms, "1.0", "2.0", "0.5", str(100.0 + day), "10.0", open_ms + DAY_MS - 1, "0", 1, "0", "0", "0"]
+
+
+@pytest.fixture
+def store(monkeypatch):
+  """Collections mongomock d'une série, et ingestion sans rollups (pas de $dateTrunc dans mongomock)"""
+  db = mongomock.MongoClient(tz_aware=True)["crypto_test"]
+  refreshed = []
+
+  def fake_refresh_rollups(coll, rollups, catalog, sym, interval, **kw):
+    refreshed.append(kw)
+    entry = catalog.find_one({"symbol": sym, "interval": interval})
+    catalog.update_one({"_id": entry["_id"]}, {"$set": {ROLLUPS_MARKER: entry["last_open_time"]}})
+
+  monkeypatch.setattr(fetch_historical_daily, "refresh_rollups", fake_refresh_rollups)
+  return db["candles"], db["coverage"], db["rollups"], db["progress"], refreshed
+
+
+def run_ingest(store, monkeypatch, pages, start=START, days=20):
+  """Ingère BTCUSDT 1d avec des pages simulées ; renvoie la date de début demandée à Binance"""
+  coll, catalog, rollups, progress, _ = store
+  requested = []
+
+  def fake_pages(symbol, interval, start_time, end_time, **kwargs):
+    requested.append(start_time)
+    for page in pages(start_time):
+      if isinstance(page, Exception):
+        raise page
+      yield page
+
+  monkeypatch.setattr(fetch_historical_daily, "iter_kline_pages", fake_pages)
+  ingest_symbol(coll, catalog, rollups, progress, "BTCUSDT", "1d", start, START + timedelta(days=days - 1), None)
+  return requested[0]
+
+
+def test_last_stored_open_time_sources():
+  """Vérifie l'ordre de lecture du point de reprise : run inachevé, puis catalogue, puis index"""
+  db = mongomock.MongoClient()["crypto_test"]
+  coll, catalog, progress = db["candles"], db["coverage"], db["progress"]
+  assert last_stored_open_time(coll, catalog, "BTCUSDT", "1d", progress) is None
+
+  coll.insert_one({"symbol": "BTCUSDT", "interval": "1d", "open_time": datetime(2024, 1, 9)})
+  # Index fallback, with naive datetimes read back as UTC
+  assert last_stored_open_time(coll, catalog, "BTCUSDT", "1d", progress) == START + timedelta(days=8)
+
+  catalog.insert_one({"symbol": "BTCUSDT", "interval": "1d", "last_open_time": datetime(2024, 1, 5)})
+  assert last_stored_open_time(coll, catalog, "BTCUSDT", "1d", progress) == START + timedelta(days=4)
+  # Live candles streamed after the last ingested one do not move the resume point
+  mark_ingested(catalog, "BTCUSDT", "1d", START + timedelta(days=3))
+  assert last_stored_open_time(coll, catalog, "BTCUSDT", "1d", progress) == START + timedelta(days=3)
+  mark_ingested(catalog, "BTCUSDT", "1d", None)
+  assert last_stored_open_time(coll, catalog, "BTCUSDT", "1d", progress) is None
+
+  begin_ingest(progress, "BTCUSDT", "1d", START + timedelta(days=2))
+  begin_ingest(progress, "BTCUSDT", "1d", START + timedelta(days=3))
+  assert pending_ingest(progress, "BTCUSDT", "1d") == START + timedelta(days=2)
+  assert last_stored_open_time(coll, catalog, "BTCUSDT", "1d", progress) == START + timedelta(days=2)
+
+
+def test_ingest_resumes_from_last_stored_candle(store, monkeypatch):
+  """Vérifie que la reprise part de la dernière bougie stockée, sans remonter avant le début demandé"""
+  coll, catalog, _, progress, _ = store
+  assert run_ingest(store, monkeypatch, lambda since: [[kline(d) for d in range(5)]], days=5) == START
+
+  # The last stored candle is fetched again, as it was possibly still open
+  since = run_ingest(store, monkeypatch, lambda since: [[kline(d) for d in range(4, 10)]], days=10)
+  assert since == START + timedelta(days=4)
+  entry = catalog.find_one({"symbol": "BTCUSDT"})
+  assert entry["count"] == 10 and entry["ingested_until"] == START + timedelta(days=9)
+  assert progress.count_documents({}) == 0
+
+  # A backfill start later than the stored history is kept
+  later = START + timedelta(days=30)
+  assert run_ingest(store, monkeypatch, lambda since: [[kline(30)]], start=later, days=31) == later
+
+
+def test_ingest_interrupted_mid_backfill(store, monkeypatch):
+  """Vérifie qu'un backfill interrompu après l'écriture d'une fenêtre récente reprend
+  avant le trou laissé par les fenêtres anciennes"""
+  coll, catalog, _, progress, refreshed = store
+  # Window [10, 20) arrives first, then window [0, 10) fails
+  interrupted = [[kline(d) for d in range(10, 15)], [kline(d) for d in range(15, 20)], ConnectionError("reset")]
+  with pytest.raises(ConnectionError):
+    run_ingest(store, monkeypatch, lambda since: interrupted)
+  assert coll.count_documents({}) == 10 and catalog.count_documents({}) == 0
+  assert pending_ingest(progress, "BTCUSDT", "1d") == START
+
+  since = run_ingest(store, monkeypatch, lambda since: [[kline(d) for d in range(20)]])
+  assert since == START
+  entry = catalog.find_one({"symbol": "BTCUSDT"})
+  assert entry["count"] == 20 and entry["first_open_time"] == START
+  assert progress.count_documents({}) == 0 and refreshed[-1] == {}
+
+
+def test_ingest_counts_inserted_candles(store, monkeypatch):
+  """Vérifie que le nombre de bougies du catalogue est incrémenté, et recompté seulement après des écritures
+  dont les rollups n'ont pas été rafraîchis"""
+  coll, catalog, _, _, _ = store
+  run_ingest(store, monkeypatch, lambda since: [[kline(d) for d in range(5)]], days=5)
+  assert catalog.find_one({"symbol": "BTCUSDT"})["count"] == 5
+
+  # A count that is not recomputed keeps its offset
+  catalog.update_one({"symbol": "BTCUSDT"}, {"$inc": {"count": 100}})
+  run_ingest(store, monkeypatch, lambda since: [[kline(d) for d in range(4, 10)]], days=10)
+  assert catalog.find_one({"symbol": "BTCUSDT"})["count"] == 110
+
+  # Another writer invalidated the rollups and was never refreshed: the series is counted again
+  invalidate_rollups(catalog, "BTCUSDT", "1d")
+  run_ingest(store, monkeypatch, lambda since: [[kline(d) for d in range(9, 12)]], days=12)
+  assert catalog.find_one({"symbol": "BTCUSDT"})["count"] == coll.count_documents({}) == 12
@@ -0,0 +1,30 @@
+import os
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+# Add src directory to Python path to allow imports
+test_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(test_dir)
+src_dir = os.path.join(project_root, 'src')
+
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from api.pagination import encode_cursor, decode_cursor
+
+
+def test_cursor_round_trip():
+  """Vérifie qu'un jeton de continuation se décode en la clé d'origine"""
+  token = encode_cursor("BTCUSDT", "1h", datetime(2024, 3, 1, 13))
+  symbol, interval, open_time = decode_cursor(token)
+  assert (symbol, interval) == ("BTCUSDT", "1h")
+  assert open_time == datetime(2024, 3, 1, 13, tzinfo=timezone.utc)
+  assert "=" not in token
+
+
+def test_invalid_cursor():
+  """Vérifie qu'un jeton invalide est refusé"""
+  with pytest.raises(ValueError):
+    decode_cursor("not-a-cursor")
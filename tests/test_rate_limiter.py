@@ -0,0 +1,203 @@
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+# Add src directory to Python path to allow imports
+test_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(test_dir)
+src_dir = os.path.join(project_root, 'src')
+
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from data.config import SETTINGS
+from data.rate_limiter import WeightRateLimiter, klines_weight
+from data.historical_data import get_historical_data, iter_kline_pages, split_windows
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+class FakeClock:
+  def __init__(self):
+    self.now = 0.0
+    self._lock = threading.Lock()
+
+  def __call__(self):
+    return self.now
+
+  def sleep(self, seconds):
+    # Shared by the fetch threads of a sharded download
+    with self._lock:
+      self.now += seconds
+
+
+def run_with_timeout(func, timeout=30.0):
+  """Exécute func dans un thread et échoue au lieu de bloquer s'il ne se termine pas à temps"""
+  outcome = {}
+
+  def target():
+    try:
+      outcome["result"] = func()
+    except BaseException as exc:
+      outcome["error"] = exc
+
+  thread = threading.Thread(target=target, daemon=True)
+  thread.start()
+  thread.join(timeout)
+  assert not thread.is_alive(), f"no result after {timeout}s"
+  if "error" in outcome:
+    raise outcome["error"]
+  return outcome["result"]
+
+
+def test_acquire_waits_for_refill():
+  """Vérifie qu'une requête attend que le budget se recharge"""
+  clock = FakeClock()
+  limiter = WeightRateLimiter(weight_per_minute=60, headroom=1.0, clock=clock, sleep=clock.sleep)
+  for _ in range(12):
+    limiter.acquire(5)
+  assert clock.now == 0.0
+  limiter.acquire(5)
+  assert clock.now == pytest.approx(5.0)
+
+
+def test_acquire_progresses_below_clock_resolution():
+  """Vérifie qu'un manque de poids plus petit que la résolution de l'horloge ne bloque pas acquire"""
+  clock = FakeClock()
+  clock.now = 1e6
+  limiter = WeightRateLimiter(weight_per_minute=60, headroom=1.0, clock=clock, sleep=clock.sleep)
+  limiter._tokens = 5 - 1e-13
+  limiter.acquire(5)
+  assert clock.now > 1e6
+
+
+def test_observe_and_backoff():
+  """Vérifie l'alignement sur le poids utilisé annoncé par Binance et la pause après un 429"""
+  clock = FakeClock()
+  limiter = WeightRateLimiter(weight_per_minute=60, headroom=1.0, clock=clock, sleep=clock.sleep)
+  limiter.observe({"X-MBX-USED-WEIGHT-1M": "58"})
+  limiter.acquire(2)
+  assert clock.now == 0.0
+  limiter.acquire(1)
+  assert clock.now == pytest.approx(1.0)
+
+  limiter.backoff(30)
+  limiter.acquire(1)
+  assert clock.now >= 31.0
+  assert limiter.throttled == 1
+
+
+def test_klines_weight():
+  """Vérifie le poids des requêtes klines selon la limite"""
+  assert klines_weight(50) == 1
+  assert klines_weight(1000) == 5
+
+
+@pytest.fixture
+def stub_binance(monkeypatch):
+  """Serveur local imitant /api/v3/klines : un 429 puis des pages de bougies journalières"""
+  state = {"requests": 0, "throttled": False}
+
+  class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+      state["requests"] += 1
+      if not state["throttled"]:
+        state["throttled"] = True
+        self.send_response(429)
+        self.send_header("Retry-After", "0")
+        self.end_headers()
+        return
+      params = parse_qs(urlparse(self.path).query)
+      start, end = int(params["startTime"][0]), int(params["endTime"][0])
+      limit = int(params["limit"][0])
+      first = -(-start // DAY_MS) * DAY_MS
+      rows = [
+        [t, "1", "2", "0.5", "1.5", "10", t + DAY_MS - 1, "0", 1, "0", "0", "0"]
+        for t in range(first, end + 1, DAY_MS)
+      ][:limit]
+      body = json.dumps(rows).encode()
+      self.send_response(200)
+      self.send_header("Content-Type", "application/json")
+      self.send_header("X-MBX-USED-WEIGHT-1M", str(state["requests"] * 5))
+      self.end_headers()
+      self.wfile.write(body)
+
+    def log_message(self, *args):
+      pass
+
+  server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+  thread = threading.Thread(target=server.serve_forever, daemon=True)
+  thread.start()
+  monkeypatch.setitem(SETTINGS, "URL_HISTORIQUE", f"http://127.0.0.1:{server.server_address[1]}/api/v3/klines")
+  yield state
+  server.shutdown()
+
+
+def test_get_historical_data_against_stub(stub_binance):
+  """Vérifie la pagination, la reprise après un 429 et la lecture du poids utilisé"""
+  clock = FakeClock()
+  limiter = WeightRateLimiter(clock=clock, sleep=clock.sleep)
+  end = datetime(2024, 1, 1, tzinfo=timezone.utc)
+  start = end - timedelta(days=1500)
+
+  df = get_historical_data("BTCUSDT", "1d", start, end, limiter=limiter)
+
+  assert len(df) == 1501
+  assert df["open_time"].is_monotonic_increasing
+  assert limiter.throttled == 1
+  # 1 réponse 429 + 2 pages
+  assert stub_binance["requests"] == 3
+
+
+def test_split_windows():
+  """Vérifie le découpage en fenêtres contiguës de pages entières"""
+  windows = split_windows(0, 5500 * 60_000 - 1, "1m", 4)
+  # 6 pages de 1000 minutes, réparties en fenêtres de 2 pages
+  assert windows == [(0, 120_000_000 - 1), (120_000_000, 240_000_000 - 1), (240_000_000, 5500 * 60_000 - 1)]
+  assert split_windows(0, 10, "1m", 4) == [(0, 10)]
+
+
+def test_get_historical_data_sharded(stub_binance):
+  """Vérifie que les fenêtres récupérées en parallèle sont fusionnées dans l'ordre, sans doublon"""
+  clock = FakeClock()
+  limiter = WeightRateLimiter(clock=clock, sleep=clock.sleep)
+  end = datetime(2024, 1, 1, tzinfo=timezone.utc)
+  start = end - timedelta(days=3500)
+
+  df = get_historical_data("BTCUSDT", "1d", start, end, limiter=limiter, shards=4)
+
+  assert len(df) == 3501
+  assert df["open_time"].is_monotonic_increasing
+  assert df["open_time"].is_unique
+
+
+def test_iter_kline_pages_bounded(stub_binance):
+  """Vérifie le pipeline par pages : file bornée, toutes les bougies reçues, arrêt anticipé sans blocage"""
+  clock = FakeClock()
+  limiter = WeightRateLimiter(clock=clock, sleep=clock.sleep)
+  end = datetime(2024, 1, 1, tzinfo=timezone.utc)
+  start = end - timedelta(days=3500)
+
+  pages = run_with_timeout(
+    lambda: list(iter_kline_pages("BTCUSDT", "1d", start, end, limiter=limiter, shards=2, max_pending=1))
+  )
+  assert all(len(page) <= 1000 for page in pages)
+  open_times = sorted(row[0] for page in pages for row in page)
+  assert len(open_times) == 3501
+  assert len(set(open_times)) == 3501
+
+  requests_before = stub_binance["requests"]
+
+  def first_page():
+    for page in iter_kline_pages("BTCUSDT", "1d", start, end, limiter=limiter, max_pending=1):
+      return page
+
+  run_with_timeout(first_page)
+  # La file bornée arrête la récupération peu après l'abandon du consommateur
+  assert stub_binance["requests"] - requests_before <= 3
@@ -0,0 +1,69 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import sqlalchemy
+
+# Add src directory to Python path to allow imports
+test_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(test_dir)
+src_dir = os.path.join(project_root, 'src')
+
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from data.connector.registry import ClientRegistry, PoolMetrics
+
+
+def test_mongo_client_shared_per_settings():
+  """Vérifie qu'un même client (et son pool) est rendu pour les mêmes paramètres de connexion"""
+  registry = ClientRegistry()
+  try:
+    client = registry.mongo(host="127.0.0.1", port=27999, user="", max_pool_size=8)
+    assert registry.mongo(host="127.0.0.1", port=27999, user="", max_pool_size=8) is client
+    assert registry.mongo(host="127.0.0.1", port=27999, user="", max_pool_size=16) is not client
+    assert client.options.pool_options.max_pool_size == 8
+
+    stats = registry.stats()
+    assert [pool["address"] for pool in stats["mongo"]] == ["127.0.0.1:27999", "127.0.0.1:27999"]
+    assert stats["mongo"][0]["in_use"] == 0 and stats["postgres"] == []
+  finally:
+    registry.close()
+  assert registry.stats() == {"mongo": [], "postgres": []}
+
+
+def test_pool_metrics_counts_checkouts():
+  """Vérifie le suivi des connexions ouvertes, empruntées et du pic d'utilisation"""
+  metrics = PoolMetrics()
+  event = SimpleNamespace()
+  for _ in range(3):
+    metrics.connection_created(event)
+    metrics.connection_checked_out(event)
+  metrics.connection_checked_in(event)
+  metrics.connection_checked_in(event)
+  metrics.connection_check_out_failed(event)
+  metrics.connection_closed(event)
+
+  assert metrics.snapshot() == {
+    "open": 2, "in_use": 1, "peak_in_use": 3, "checkouts": 3, "checkout_failures": 1
+  }
+
+
+def test_clients_dropped_after_fork(monkeypatch):
+  """Vérifie qu'un processus enfant n'utilise pas les clients hérités du parent, sans fermer leurs connexions"""
+  registry = ClientRegistry()
+  engine = sqlalchemy.create_engine("sqlite://")
+  registry._engines[("db", "user", "password", "host", 5432)] = engine
+  disposed = []
+  monkeypatch.setattr(engine, "dispose", lambda close=True: disposed.append(close))
+  parent = registry.mongo(host="127.0.0.1", port=27999, user="")
+
+  try:
+    monkeypatch.setattr(os, "getpid", lambda: -1)
+    assert registry.stats() == {"mongo": [], "postgres": []}
+    assert disposed == [False]
+    child = registry.mongo(host="127.0.0.1", port=27999, user="")
+    assert child is not parent
+    child.close()
+  finally:
+    parent.close()
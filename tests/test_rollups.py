@@ -0,0 +1,147 @@
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+import pytest
+
+# Add src directory to Python path to allow imports
+test_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(test_dir)
+src_dir = os.path.join(project_root, 'src')
+
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from data.rollups import plan_range, rollup_levels, floor_period, combine_partials, get_range_stats, ROLLUPS_MARKER
+from api.queries import get_aggregated_stats
+
+
+def utc(*args):
+  return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_rollup_levels():
+  """Vérifie les niveaux d'agrégats selon l'intervalle"""
+  assert rollup_levels("1d") == ["month"]
+  assert rollup_levels("1h") == ["month", "day"]
+
+
+def test_plan_range_covers_range_exactly():
+  """Vérifie que blocs et bords couvrent exactement l'intervalle, sans recouvrement"""
+  lo = utc(2023, 1, 15, 13, 30)
+  hi = utc(2024, 3, 2, 7)
+  blocks, raw = plan_range(lo, hi, ["month", "day"])
+
+  segments = sorted([(start, end) for _, start, end in blocks] + raw)
+  assert segments[0][0] == lo
+  assert segments[-1][1] == hi
+  for (_, end), (start, _) in zip(segments, segments[1:]):
+    assert end == start
+
+  # Un seul bloc de mois, encadré par des blocs de jours puis des bords bruts de moins d'un jour
+  months = [b for b in blocks if b[0] == "month"]
+  assert months == [("month", utc(2023, 2, 1), utc(2024, 3, 1))]
+  for level, start, end in blocks:
+    assert floor_period(start, level) == start
+    assert floor_period(end, level) == end
+  assert all(end - start < timedelta(days=1) for start, end in raw)
+
+
+def test_plan_range_small_range_is_raw():
+  """Vérifie qu'une plage plus courte qu'un bloc est lue directement"""
+  blocks, raw = plan_range(utc(2024, 5, 3), utc(2024, 5, 20), ["month"])
+  assert blocks == []
+  assert raw == [(utc(2024, 5, 3), utc(2024, 5, 20))]
+
+
+def test_combine_partials():
+  """Vérifie la combinaison des agrégats partiels"""
+  partials = [
+    {"count": 2, "sum_close": 3.0, "min_low": 1.0, "max_high": 5.0, "total_volume": 10.0,
+     "first_open_time": utc(2024, 1, 1), "last_open_time": utc(2024, 1, 2)},
+    {"count": 0},
+    {"count": 1, "sum_close": 4.0, "min_low": 0.5, "max_high": 4.0, "total_volume": 1.0,
+     "first_open_time": utc(2024, 2, 1), "last_open_time": utc(2024, 2, 1)},
+  ]
+  combined = combine_partials(partials)
+  assert combined["count"] == 3
+  assert combined["sum_close"] == 7.0
+  assert combined["min_low"] == 0.5
+  assert combined["max_high"] == 5.0
+  assert combined["first_open_time"] == utc(2024, 1, 1)
+  assert combined["last_open_time"] == utc(2024, 2, 1)
+  assert combine_partials([]) == {"count": 0}
+
+
+def brute_force(candles, lo, hi):
+  """Agrégat de référence des bougies dont l'ouverture est dans [lo, hi]"""
+  return combine_partials([{
+    "count": 1, "sum_close": c["close"], "min_low": c["low"], "max_high": c["high"], "total_volume": c["volume"],
+    "first_open_time": c["open_time"], "last_open_time": c["open_time"]
+  } for c in candles if lo <= c["open_time"] <= hi])
+
+
+@pytest.fixture
+def series():
+  """Bougies 1h du 30 janvier au 3 mars 2024, avec leurs agrégats mensuels et journaliers construits à la main"""
+  db = mongomock.MongoClient(tz_aware=True)["crypto_test"]
+  first = utc(2024, 1, 30, 5)
+  candles = []
+  for i in range(33 * 24):
+    close = 100.0 + i % 37
+    candles.append({
+      "symbol": "BTCUSDT", "interval": "1h", "open_time": first + timedelta(hours=i),
+      "close": close, "low": close - 1 - i % 5, "high": close + 1 + i % 7, "volume": 1.0 + i % 3,
+    })
+  db["candles"].insert_many([dict(c) for c in candles])
+
+  blocks = {}
+  for c in candles:
+    for level in ("month", "day"):
+      blocks.setdefault((level, floor_period(c["open_time"], level)), []).append(c)
+  db["rollups"].insert_many([
+    {"symbol": "BTCUSDT", "interval": "1h", "level": level, "period_start": start,
+     **brute_force(block, start, block[-1]["open_time"])}
+    for (level, start), block in blocks.items()
+  ])
+  last = candles[-1]["open_time"]
+  db["coverage"].insert_one({
+    "symbol": "BTCUSDT", "interval": "1h", "first_open_time": first, "last_open_time": last,
+    "count": len(candles), ROLLUPS_MARKER: last
+  })
+  return db, candles
+
+
+def test_get_range_stats_matches_scan(series):
+  """Vérifie que l'agrégat lu dans les blocs et les bords bruts égale un parcours de toutes les bougies"""
+  db, candles = series
+  ranges = [
+    (None, None),
+    (utc(2024, 1, 31, 13, 30), utc(2024, 3, 2, 7)),
+    (utc(2024, 2, 1), utc(2024, 2, 29, 23)),
+    (utc(2024, 2, 10, 3), utc(2024, 2, 10, 20)),
+    (utc(2023, 1, 1), utc(2024, 2, 1, 0, 59, 59, 999000)),
+    (utc(2024, 6, 1), None),
+  ]
+  for start, end in ranges:
+    stats = get_range_stats(db["candles"], db["rollups"], db["coverage"], "BTCUSDT", "1h", start, end)
+    expected = brute_force(candles, start or candles[0]["open_time"], end or candles[-1]["open_time"])
+    assert stats == expected
+
+
+def test_aggregated_stats_scans_when_rollups_are_stale(series):
+  """Vérifie le repli sur un parcours des bougies quand les rollups sont en retard sur le catalogue"""
+  db, candles = series
+  db["rollups"].update_many({}, {"$inc": {"count": 1000}})
+  kwargs = dict(symbol="BTCUSDT", interval="1h", collection_name="candles",
+                catalog_name="coverage", rollups_name="rollups")
+  assert get_aggregated_stats(db, **kwargs)["count"] > len(candles)
+
+  db["coverage"].update_one({}, {"$set": {ROLLUPS_MARKER: candles[-2]["open_time"]}})
+  assert get_range_stats(db["candles"], db["rollups"], db["coverage"], "BTCUSDT", "1h") is None
+  stats = get_aggregated_stats(db, **kwargs)
+  expected = brute_force(candles, candles[0]["open_time"], candles[-1]["open_time"])
+  assert stats["count"] == len(candles) and stats["total_volume"] == expected["total_volume"]
+  assert stats["avg_close"] == pytest.approx(expected["sum_close"] / len(candles))
+  assert stats["first_open_time"] == "2024-01-30T05:00:00+00:00"
@@ -0,0 +1,105 @@
+import os
+import sys
+
+import pytest
+
+# Add src directory to Python path to allow imports
+test_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(test_dir)
+src_dir = os.path.join(project_root, 'src')
+
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from data.candle_store import collection_name, timeseries_options
+from data.migrate_timeseries import copy_batches
+
+
+class Cursor(list):
+  def sort(self, key, direction):
+    return Cursor(sorted(self, key=lambda d: d[key], reverse=direction < 0))
+
+  def limit(self, n):
+    return Cursor(self[:n])
+
+
+class FakeCollection:
+  """Collection en mémoire, limitée aux filtres {"_id": {"$gt": x}} utilisés par la copie"""
+
+  def __init__(self, name, docs=None):
+    self.name = name
+    self.docs = list(docs or [])
+
+  def _match(self, query):
+    if not query:
+      return list(self.docs)
+    if "_id" in query and isinstance(query["_id"], dict):
+      return [d for d in self.docs if d["_id"] > query["_id"]["$gt"]]
+    return [d for d in self.docs if all(d.get(k) == v for k, v in query.items())]
+
+  def find(self, query=None, projection=None):
+    return Cursor(dict(d) for d in self._match(query or {}))
+
+  def find_one(self, query):
+    found = self._match(query)
+    return dict(found[0]) if found else None
+
+  def insert_many(self, docs, ordered=True):
+    self.docs.extend(dict(d) for d in docs)
+
+  def delete_many(self, query):
+    removed = self._match(query)
+    self.docs = [d for d in self.docs if d not in removed]
+
+  def update_one(self, query, update, upsert=False):
+    doc = self.find_one(query)
+    if doc is None:
+      doc = dict(query)
+    else:
+      self.docs = [d for d in self.docs if d["_id"] != doc["_id"]]
+    doc.update(update.get("$set", {}))
+    for key, value in update.get("$inc", {}).items():
+      doc[key] = doc.get(key, 0) + value
+    self.docs.append(doc)
+
+
+def test_collection_name_per_storage_mode():
+  """Vérifie que les collections time-series sont nommées à côté des collections classiques"""
+  assert collection_name("1d", "standard") == "historical_daily_data"
+  assert collection_name("1d", "timeseries") == "historical_daily_data_ts"
+  assert collection_name("1h", "timeseries") == "historical_data_1h_ts"
+  with pytest.raises(ValueError):
+    collection_name("1d", "columnar")
+
+
+def test_timeseries_options():
+  """Vérifie le regroupement par symbole et la granularité des buckets selon l'intervalle"""
+  assert timeseries_options("1m") == {"timeField": "open_time", "metaField": "symbol", "granularity": "minutes"}
+  assert timeseries_options("1h")["granularity"] == "hours"
+  assert timeseries_options("1d")["granularity"] == "hours"
+
+
+def test_copy_batches_resumes_after_interruption():
+  """Vérifie que la copie reprend après le dernier lot validé, sans doublon"""
+  source = FakeCollection("historical_daily_data", [{"_id": i, "close": float(i)} for i in range(10)])
+  target = FakeCollection("historical_daily_data_ts")
+  progress = FakeCollection("storage_migrations")
+
+  # Interrupted run: batch [0, 4) committed, batch [4, 8) inserted but not committed
+  progress.update_one({"_id": target.name}, {"$set": {"last_id": 3, "copied": 4}}, upsert=True)
+  target.insert_many(source.docs[:8])
+
+  assert copy_batches(source, target, progress, batch_size=4) == 6
+  assert sorted(d["_id"] for d in target.docs) == list(range(10))
+  state = progress.find_one({"_id": target.name})
+  assert state["copied"] == 10 and state["completed_at"] is not None
+
+  # A completed copy is not run again
+  assert copy_batches(source, target, progress, batch_size=4) == 0
+
+  # Interrupted before the first batch was saved: batch [0, 4) inserted, no last_id yet
+  target = FakeCollection("historical_data_1h_ts", source.docs[:4])
+  progress.update_one({"_id": target.name}, {"$set": {"source": source.name, "copied": 0}}, upsert=True)
+  assert copy_batches(source, target, progress, batch_size=4) == 10
+  assert sorted(d["_id"] for d in target.docs) == list(range(10))
+  assert progress.find_one({"_id": target.name})["copied"] == 10
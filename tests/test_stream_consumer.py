@@ -0,0 +1,154 @@
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+
+# Add src directory to Python path to allow imports
+test_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(test_dir)
+src_dir = os.path.join(project_root, 'src')
+
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from websockets.asyncio.server import serve
+
+import data.fetch_historical_daily as fetch_historical_daily
+from data.config import SETTINGS
+from data.coverage import last_stored_open_time
+from data.rollups import ROLLUPS_MARKER
+from data.stream_consumer import MongoStreamWriter, StreamConsumer, combined_stream_url, parse_event, stream_names
+
+
+def recorded_messages(n):
+  """Messages de flux combinés au format Binance : des trades et une bougie 1m clôturée toutes les 100"""
+  now = int(time.time() * 1000)
+  messages = []
+  for i in range(n):
+    if i % 100 == 99:
+      data = {
+        "e": "kline", "E": now, "s": "BTCUSDT",
+        "k": {"t": now - 60_000, "T": now - 1, "i": "1m", "o": "1.0", "h": "2.0", "l": "0.5",
+              "c": "1.5", "v": "10.0", "x": True},
+      }
+      stream = "btcusdt@kline_1m"
+    else:
+      data = {"e": "trade", "E": now, "s": "BTCUSDT", "t": i, "p": "42000.5", "q": "0.01", "T": now, "m": False}
+      stream = "btcusdt@trade"
+    messages.append(json.dumps({"stream": stream, "data": data}))
+  return messages
+
+
+def test_parse_event():
+  """Vérifie la conversion des événements trade et kline, et l'URL des flux combinés"""
+  assert combined_stream_url("wss://stream.binance.com:9443/ws/") == "wss://stream.binance.com:9443/stream"
+  assert stream_names(["BTCUSDT"], ["trade", "kline_1m"]) == ["btcusdt@trade", "btcusdt@kline_1m"]
+
+  trade, kline = (parse_event(json.loads(m)["data"]) for m in recorded_messages(100)[98:100])
+  assert trade["type"] == "trade" and trade["trade_id"] == 98 and trade["price"] == 42000.5
+  assert kline["type"] == "kline" and kline["interval"] == "1m" and kline["is_closed"] and kline["close"] == 1.5
+  assert parse_event({"result": None, "id": 1}) is None
+
+
+def test_consumer_batches_and_resubscribes():
+  """Rejoue des messages à haut débit, coupe la connexion à mi-parcours et vérifie
+  le découpage en lots, la reconnexion avec réabonnement et les compteurs"""
+  messages = recorded_messages(2000)
+  streams = stream_names(["BTCUSDT"], ["trade", "kline_1m"])
+  subscriptions = []
+  batches = []
+
+  async def replay(ws):
+    request = json.loads(await ws.recv())
+    subscriptions.append(request["params"])
+    await ws.send(json.dumps({"result": None, "id": request["id"]}))
+    if len(subscriptions) == 1:
+      for message in messages[:1000]:
+        await ws.send(message)
+      await ws.close()
+    else:
+      for message in messages[1000:]:
+        await ws.send(message)
+      await ws.wait_closed()
+
+  async def scenario():
+    async with serve(replay, "127.0.0.1", 0) as server:
+      port = server.sockets[0].getsockname()[1]
+      consumer = StreamConsumer(
+        url=f"ws://127.0.0.1:{port}/stream",
+        streams=streams,
+        write=batches.append,
+        batch_size=64,
+        flush_interval=0.05,
+      )
+      stop = asyncio.Event()
+      task = asyncio.create_task(consumer.run(stop))
+      deadline = time.monotonic() + 20
+      while sum(map(len, batches)) < len(messages) and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+      stop.set()
+      await asyncio.wait_for(task, 5)
+      return consumer.stats.snapshot()
+
+  stats = asyncio.run(scenario())
+  assert subscriptions == [streams, streams]
+  assert sum(map(len, batches)) == len(messages)
+  assert max(map(len, batches)) <= 64
+  assert [doc["trade_id"] for batch in batches for doc in batch if doc["type"] == "trade"] == \
+         [i for i in range(2000) if i % 100 != 99]
+  assert stats["reconnects"] == 1 and stats["subscriptions"] == 2
+  assert stats["events"] == {"trade": 1980, "kline": 20}
+  assert stats["written"] == 2000 and stats["write_errors"] == 0
+  # 2002 messages: the events plus one subscription acknowledgement per connection
+  assert stats["messages"] == 2002
+
+
+def closed_kline(symbol, open_time, close):
+  """Bougie 1m clôturée, telle que renvoyée par parse_event"""
+  return {
+    "type": "kline", "symbol": symbol, "interval": "1m", "open_time": open_time,
+    "open": 1.0, "high": 2.0, "low": 0.5, "close": close, "volume": 10.0,
+    "close_time": open_time + timedelta(seconds=59.999), "is_closed": True, "event_time": open_time,
+  }
+
+
+def test_writer_refreshes_catalog_and_rollups(monkeypatch):
+  """Vérifie que les bougies du flux passent par le catalogue et les rollups comme l'ingestion REST,
+  et qu'une série connue uniquement par le flux sera rattrapée depuis le début par l'ingestion"""
+  refreshed = []
+
+  def fake_refresh_rollups(coll, rollups, catalog, symbol, interval, start=None, end=None):
+    # $dateTrunc/$merge are not available in mongomock: only record the call and mark the rollups fresh
+    refreshed.append((symbol, start, end))
+    entry = catalog.find_one({"symbol": symbol, "interval": interval})
+    catalog.update_one({"_id": entry["_id"]}, {"$set": {ROLLUPS_MARKER: entry["last_open_time"]}})
+
+  monkeypatch.setattr(fetch_historical_daily, "refresh_rollups", fake_refresh_rollups)
+  db = mongomock.MongoClient(tz_aware=True)["crypto_test"]
+  db.create_collection("historical_data_1m")  # mongomock has no zstd storage option
+  catalog = db[SETTINGS["MONGO_COLLECTION_COVERAGE"]]
+  start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+  minute = timedelta(minutes=1)
+  writer = MongoStreamWriter(db, refresh_interval=3600)
+
+  writer([closed_kline("BTCUSDT", start, 1.0), closed_kline("BTCUSDT", start + minute, 2.0)])
+  entry = catalog.find_one({"symbol": "BTCUSDT", "interval": "1m"})
+  assert entry["count"] == 2 and entry["last_open_time"] == start + minute
+  assert entry[ROLLUPS_MARKER] == entry["last_open_time"] and refreshed == [("BTCUSDT", None, None)]
+  # Only streamed: the REST ingestion must fetch its history instead of resuming after the live candles
+  assert last_stored_open_time(db["historical_data_1m"], catalog, "BTCUSDT", "1m") is None
+
+  # Within refresh_interval: written, rollups stale (readers scan) until the next refresh
+  writer([closed_kline("BTCUSDT", start + 2 * minute, 3.0)])
+  entry = catalog.find_one({"symbol": "BTCUSDT", "interval": "1m"})
+  assert entry["count"] == 2 and ROLLUPS_MARKER not in entry
+
+  writer.refresh()
+  entry = catalog.find_one({"symbol": "BTCUSDT", "interval": "1m"})
+  assert entry["count"] == 3 and entry[ROLLUPS_MARKER] == start + 2 * minute
+  # The rollups were fresh before the write: only the written range is rebuilt
+  assert refreshed[-1] == ("BTCUSDT", start + 2 * minute, start + 2 * minute)